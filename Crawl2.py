@@ -1,8 +1,6 @@
 import asyncio
 #from fastapi import FastAPI
 import json
-import requests
-import uuid
 from datetime import datetime
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
 from crawl4ai.deep_crawling import BFSDeepCrawlStrategy
@@ -12,6 +10,7 @@ from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 from crawl4ai.content_filter_strategy import PruningContentFilter
 import re
+from meili_json import make_document_id, content_hash, send_changed_documents
 
 async def main():
     # --- 1. Define the Markdown Generator ---
@@ -61,44 +60,23 @@ async def main():
             print(f"Content: {result.markdown}") # Showing preview now
             
             #(Meilisearch data preparation logic)
-            page_id = str(uuid.uuid4())
+            # id มาจาก canonical URL -> crawl ซ้ำได้ id เดิม, content_hash ใช้เช็คว่าเนื้อหาเปลี่ยนไหม
             now_str = datetime.now().isoformat()
 
             page_data = {
-                "id": "scp_" + page_id,
+                "id": make_document_id(result.url),
                 "datetime": now_str,
                 "url": result.url,
-                "content": result.markdown
+                "content": result.markdown,
+                "content_hash": content_hash(result.markdown),
             }
             all_data.append(page_data)
 
     # Note: If content is still empty, the next step is to remove or correct 
     # the target_elements selector: target_elements=["#main-content"]
 
-        # ส่งเข้า Meilisearch
-        MEILI_URL = "http://10.1.0.150:7700/indexes/web_scraping/documents"
- 
-        HEADERS = {
-            "Content-Type": "application/json"
-        # "Authorization": "Bearer MASTER_KEY"
-                }
-        # try:
-        #     response = requests.post(MEILI_URL, headers=HEADERS, json=[page_data])
-        #     if response.status_code == 202:
-        #         status = "success"
-        #         message = f"ส่ง Request สำเร็จ!"
-        #     else:
-        #         status = "error"
-        #         message = f"ส่งไม่สำเร็จ ({response.status_code})"
-        # except Exception as e:
-        #     status = "error"
-        #     message = str(e)
-    
-        # print({
-        #     "status": status,
-        #     "message": message,
-        #     #"json_content": page_data  # 🔹 แสดงเนื้อไฟล์ JSON
-        #      })
+        # ส่งเข้า Meilisearch เฉพาะเอกสารที่ใหม่หรือเนื้อหาเปลี่ยน
+        print(send_changed_documents(all_data))
  
 
 if __name__ == "__main__":
@@ -1,19 +1,56 @@
-from fastapi import FastAPI, HTTPException, UploadFile, Request
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, UploadFile, Request, Query
+from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
+from contextlib import asynccontextmanager
 import logging
 import uvicorn
 import google_sentiment
+import sentiment_store
+import payload_codec
+import thai_lexicon
+import english_lexicon
+import scorers
+import http_client
+import tracing
+import asyncio
 import json
+import os
 
 # Logging setting 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Write-behind buffer: /api/sentiment ไม่ commit ทีละแถว แต่รวมเป็นก้อนแล้วเขียนเบื้องหลัง
+submission_writer = sentiment_store.BatchWriter(sentiment_store.insert_submissions)
+article_writer = sentiment_store.BatchWriter(sentiment_store.insert_article_batch)
+
+# ความถี่ (วินาที) ที่เช็คว่าไฟล์ lexicon ถูกแก้หรือไม่
+LEXICON_RELOAD_INTERVAL = float(os.environ.get("LEXICON_RELOAD_INTERVAL", "30"))
+
+# lexicon ของแต่ละภาษา (query ?lang= ของ /admin/lexicon)
+LEXICON_MANAGERS = {"th": thai_lexicon.lexicon_manager, "en": english_lexicon.lexicon_manager}
+
+async def watch_lexicon():
+    while True:
+        await asyncio.sleep(LEXICON_RELOAD_INTERVAL)
+        for manager in LEXICON_MANAGERS.values():
+            await asyncio.to_thread(manager.maybe_reload)
+
+@asynccontextmanager
+async def lifespan(app):
+    submission_writer.start()
+    article_writer.start()
+    lexicon_watcher = asyncio.create_task(watch_lexicon())
+    yield
+    lexicon_watcher.cancel()
+    submission_writer.stop()
+    article_writer.stop()
+
 app = FastAPI(
     title="Sentiment Analysis API",
-    description="API for processing keywords and receiving aggregate sentiment results."
+    description="API for processing keywords and receiving aggregate sentiment results.",
+    lifespan=lifespan
 )
 
 # Pydantic Model สำหรับรับผลลัพธ์รวม (Micro-Payload)
@@ -31,18 +68,39 @@ class SentimentData(BaseModel):
     # Label รวม: Positive, Neutral, หรือ Negative
     overall_label: str
 
+    # version ของ lexicon ที่ใช้ให้คะแนน (client เก่าไม่ได้ส่งมา)
+    lexicon_version: Optional[str] = None
+
+# Pydantic Model ของรายข่าวที่ส่งมากับผลรวม (gzip NDJSON / msgpack / news_articles ใน JSON)
+class ArticleData(BaseModel):
+    """
+    Schema ของข่าวหนึ่งรายการ (ตรวจก่อนเข้า buffer ไม่ให้แถวเสียไปพังตอนเขียนเบื้องหลัง)
+    """
+    title: str
+    sentiment: float = Field(..., ge=-1.0, le=1.0)
+    label: str
+    # RFC-822 หรือ ISO 8601 (ไม่มี = เวลาที่บันทึก)
+    published_at: Optional[str] = None
+    link: Optional[str] = None
+    source: Optional[str] = None
+    cluster_id: Optional[str] = None
+    lexicon_version: Optional[str] = None
+
 # Pydantic Model สำหรับรับ Keyword ใหม่ (จาก Client Script)
 class request(BaseModel):
     """
     Schema สำหรับรับ Keyword จาก Client เพื่อจำลองการเริ่มงาน
     """
     ticker: str = Field(..., description="The search keyword provided by the user.")
+    lang: str = Field("th", description="Google News edition to search: 'th' or 'en'.")
 
 # --- API Endpoints ---
 
 # NEW: Endpoint สำหรับรับ Keyword จาก Client Script (แทนที่ /extract)
+# def ธรรมดา (FastAPI รันใน threadpool): call_function บล็อกนานได้ (retry/timeout ของ http_client)
+# ถ้าเป็น async def จะค้างทั้ง event loop รวมถึง /api/sentiment ที่ call_function POST กลับมาหาตัวเอง
 @app.post("/analyze_keyword")
-async def analyze_keyword(data: request):
+def analyze_keyword(data: request):
     """
     รับ Keyword จาก Client เพื่อจำลองการเริ่มกระบวนการวิเคราะห์ Sentiment.
     """
@@ -55,7 +113,11 @@ async def analyze_keyword(data: request):
 
 
 
-    sentiment_result = google_sentiment.call_function(data.ticker)
+    if not data.ticker.strip():
+        raise HTTPException(status_code=422, detail="ticker must not be empty")
+
+    with tracing.span("api.analyze_keyword", keyword=data.ticker, lang=data.lang):
+        sentiment_result = google_sentiment.call_function(data.ticker, lang=data.lang)
 
 
     
@@ -80,25 +142,153 @@ async def analyze_keyword(data: request):
 
 
 # EXISTING: Endpoint สำหรับรับผลลัพธ์รวม (Micro-Payload) จาก Python Script
-@app.post("/api/sentiment")
-async def receive_sentiment_data(data: SentimentData):
+# รองรับ JSON ปกติ และแบบมีรายข่าว (gzip NDJSON / msgpack) ตาม Content-Type
+@app.post("/api/sentiment", openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {
+            payload_codec.JSON_CONTENT_TYPE: {"schema": SentimentData.model_json_schema()},
+            payload_codec.NDJSON_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            payload_codec.MSGPACK_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+})
+async def receive_sentiment_data(request: Request):
     """
     รับผลลัพธ์การวิเคราะห์ Sentiment (Micro-Payload) จาก Client
     """
+    body = await request.body()
+    try:
+        payload, articles = payload_codec.decode_payload(
+            body,
+            request.headers.get("content-type"),
+            request.headers.get("content-encoding"),
+        )
+        data = SentimentData(**payload)
+        articles = [ArticleData(**article).model_dump(exclude_none=True) for article in articles]
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    except (json.JSONDecodeError, UnicodeDecodeError, TypeError, AttributeError) as e:
+        # body อ่านได้ตาม Content-Type แต่เนื้อในเสีย (JSON พัง, ไม่ใช่ object, แถวข่าวไม่ใช่ array)
+        raise HTTPException(status_code=400, detail=f"Malformed payload: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
     logger.info(f"AGGREGATE DATA RECEIVED")
     logger.info(f"Keyword: {data.keyword}")
     logger.info(f"Avg Sentiment: {data.average_sentiment:.4f} ({data.overall_label})")
     
-    # ในการใช้งานจริง: บันทึก data ลงในฐานข้อมูล
+    # บันทึก data ลงในฐานข้อมูล (ผ่าน buffer เขียนเป็น batch)
+    # span ต่อ trace ของ client (header traceparent) และผูกด้วย analysis_id เดียวกัน
+    try:
+        with tracing.span("api.receive_sentiment", headers=request.headers, analysis_id=data.analysis_id,
+                          keyword=data.keyword, articles=len(articles)):
+            submission_writer.add(data.model_dump())
+            if articles:
+                for article in articles:
+                    article.setdefault("lexicon_version", data.lexicon_version)
+                article_writer.add_many([(data.keyword, data.analysis_id, article) for article in articles])
+    except OverflowError:
+        raise HTTPException(status_code=503, detail="Write buffer is full, retry later.")
     
     return {
         "status": "success",
         "message": "Aggregate Sentiment data processed and accepted.",
         "analysis_id": data.analysis_id,
         "average_sentiment": data.average_sentiment,
+        "articles_received": len(articles),
+        "processed_at": datetime.now().isoformat()
+    }
+
+# Endpoint สำหรับดู sentiment ย้อนหลังของ ticker แบบแบ่งช่วงเวลา
+@app.get("/tickers/{ticker}/sentiment")
+def ticker_sentiment(
+    ticker: str,
+    start: Optional[datetime] = Query(None, alias="from", description="Start time (inclusive), ISO 8601"),
+    end: Optional[datetime] = Query(None, alias="to", description="End time (exclusive), ISO 8601"),
+    bucket: str = Query("day", description="hour, day, week or month"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """
+    ค่าเฉลี่ย sentiment และจำนวนข่าวต่อ label ของ ticker แยกตามช่วงเวลา (เวลา UTC)
+    """
+    if bucket not in sentiment_store.BUCKET_FORMATS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {list(sentiment_store.BUCKET_FORMATS)}")
+
+    total, items = sentiment_store.query_sentiment(ticker, start, end, bucket, limit, offset)
+
+    return {
+        "ticker": ticker,
+        "bucket": bucket,
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "total_buckets": total,
+        "limit": limit,
+        "offset": offset,
+        "items": items,
+    }
+
+# Endpoint สำหรับรับผลลัพธ์รวมหลายรายการในครั้งเดียว (เช่นจาก sweeper)
+@app.post("/api/sentiment/bulk")
+async def receive_sentiment_bulk(data: List[SentimentData]):
+    """
+    รับผลลัพธ์การวิเคราะห์ Sentiment หลายรายการ (array ของ Micro-Payload)
+    """
+    logger.info(f"BULK AGGREGATE DATA RECEIVED: {len(data)} items")
+
+    try:
+        submission_writer.add_many([item.model_dump() for item in data])
+    except OverflowError:
+        raise HTTPException(status_code=503, detail="Write buffer is full, retry later.")
+
+    return {
+        "status": "success",
+        "message": "Aggregate Sentiment data processed and accepted.",
+        "accepted": len(data),
+        "analysis_ids": [item.analysis_id for item in data],
         "processed_at": datetime.now().isoformat()
     }
 
+# Endpoint สำหรับดู / สั่ง reload lexicon โดยไม่ต้อง restart server
+def lexicon_manager_for(lang):
+    if lang not in LEXICON_MANAGERS:
+        raise HTTPException(status_code=404, detail=f"No lexicon for language '{lang}'")
+    return LEXICON_MANAGERS[lang]
+
+@app.get("/admin/lexicon")
+def lexicon_info(lang: str = "th"):
+    manager = lexicon_manager_for(lang)
+    lexicon = manager.get()
+    return {"lang": lang, "version": lexicon.version, "entries": len(lexicon.entries), "path": manager.path}
+
+@app.post("/admin/lexicon/reload")
+def reload_lexicon(lang: str = "th"):
+    """
+    อ่านไฟล์ lexicon ใหม่ compile และสลับมาใช้ทันที (ไฟล์ผิดรูปแบบจะได้ 422 และใช้ version เดิมต่อ)
+    """
+    manager = lexicon_manager_for(lang)
+    previous = manager.get().version
+    try:
+        manager.reload(force=True)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    current = manager.get().version
+    logger.info(f"{manager.language} lexicon reloaded: {previous} -> {current}")
+    return {"previous_version": previous, "version": current, "changed": previous != current}
+
+# Endpoint สำหรับดูสถิติของ scorer (อัตราส่งต่อของ cascade, fallback ของ batcher)
+@app.get("/admin/scorer")
+def scorer_info():
+    scorer = scorers.get_scorer()
+    stats = scorer.stats() if hasattr(scorer, "stats") else {}
+    return {"scorer": scorer.name, "stats": stats}
+
+# Endpoint สำหรับดูสถานะ circuit breaker ของแต่ละ host (เช่น news.google.com โดน 429)
+@app.get("/admin/http")
+def http_info():
+    return {"breakers": http_client.breaker_stats()}
+
 @app.get("/")
 def home():
     return {"message": "Sentiment Analysis API is running. Check /docs for endpoints."}
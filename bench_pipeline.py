@@ -0,0 +1,89 @@
+"""
+เทียบการวิเคราะห์ทีละ ticker ตามลำดับ (แบบ google_sentiment.main) กับ pipeline.SweepPipeline
+ใช้ feed สังเคราะห์ + หน่วงเวลา fetch / sink จำลอง network และ API (ไม่ยิงออกจริง)
+
+    python bench_pipeline.py --tickers 200 --fetch-latency 0.2 --sink-latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import sentiment_store
+import google_sentiment
+import scorers
+import pipeline
+
+HEADLINES = [
+    "{t} กำไรไตรมาส 3 เติบโต 25% นักวิเคราะห์แนะนำซื้อ - ข่าวหุ้นธุรกิจออนไลน์",
+    "{t} ราคาหุ้นร่วงหนัก หลังงบออกมาต่ำกว่าคาด - Thunhoon",
+    "{t} ประกาศจ่ายปันผลระหว่างกาล - มิติหุ้น",
+    "{t} shares plunge as quarterly profit misses estimates - Bangkok Post",
+    "{t} wins sustainability award, outlook strong - The Nation",
+    "โบรกชี้ {t} ยังมีความเสี่ยงจากต้นทุนพลังงาน - efinanceThai",
+]
+
+
+def make_feed(ticker, items):
+    return [
+        {"title": HEADLINES[i % len(HEADLINES)].format(t=ticker) + f" ({i})",
+         "link": f"https://news.example.com/{ticker}/{i}",
+         "pubDate": "Wed, 20 Nov 2025 08:31:46 GMT"}
+        for i in range(items)
+    ]
+
+
+def run_sequential(tickers, fetch, sink_latency):
+    scorer = scorers.get_scorer()
+    for ticker in tickers:
+        records, representatives = google_sentiment.prepare_records(fetch(ticker), ticker)
+        google_sentiment.analyze_sentiment(google_sentiment.distinct_records(representatives), scorer=scorer)
+        google_sentiment.copy_cluster_scores(records, representatives)
+        payload = google_sentiment.build_payload(ticker, records, ticker)
+        sentiment_store.insert_records(ticker, records, analysis_id=payload["analysis_id"])
+        time.sleep(sink_latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--fetch-latency", type=float, default=0.2)
+    parser.add_argument("--sink-latency", type=float, default=0.02, help="per ticker (API POST)")
+    parser.add_argument("--fetch-workers", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    sentiment_store.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    feeds = {ticker: make_feed(ticker, args.items) for ticker in tickers}
+
+    def fetch(ticker, lang="th"):
+        time.sleep(args.fetch_latency)
+        return feeds[ticker]
+
+    class BenchPipeline(pipeline.SweepPipeline):
+        def flush(self, batch):
+            super().flush(batch)
+            time.sleep(args.sink_latency * len(batch))
+
+    # โหลด lexicon ก่อนจับเวลา
+    scorers.get_scorer()
+
+    start = time.perf_counter()
+    run_sequential(tickers, fetch, args.sink_latency)
+    sequential = time.perf_counter() - start
+
+    bench = BenchPipeline(fetch_fn=fetch, post=False, fetch_workers=args.fetch_workers,
+                          processes=args.processes)
+    start = time.perf_counter()
+    asyncio.run(bench.run(tickers))
+    staged = time.perf_counter() - start
+
+    print(f"{args.tickers} tickers x {args.items} headlines, fetch {args.fetch_latency}s, "
+          f"sink {args.sink_latency}s/ticker, {bench.processes} scoring processes")
+    print(f"{'sequential':<12}{sequential:>9.2f} s  {args.tickers / sequential:>8.1f} tickers/s")
+    print(f"{'pipeline':<12}{staged:>9.2f} s  {args.tickers / staged:>8.1f} tickers/s  "
+          f"({sequential / staged:.1f}x)  {bench.stats['score_batches']} score batches, "
+          f"{bench.stats['sink_batches']} sink batches")
@@ -0,0 +1,99 @@
+"""
+memory ของข่าว 1M รายการในรูปแบบต่างๆ ที่เคยใช้ใน pipeline เทียบกับ NewsRecord
+(ไม่นับ title/link ซึ่งเป็นข้อมูลจริงที่ทุกแบบต้องเก็บเท่ากัน)
+
+    python bench_record_memory.py --items 1000000
+"""
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from sources import NewsRecord
+
+PUBLISHERS = [f"สำนักข่าว {i}" for i in range(40)]
+KEYWORDS = ["AIS", "KBANK", "SCB", "CPALL", "PTTEP", "GULF"]
+START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def raw_fields(i):
+    """ค่าที่ได้จาก parser: string ใหม่ทุกครั้ง เหมือน text ที่ XML parser สร้างให้แต่ละ item"""
+    published = START - timedelta(minutes=i)
+    return (
+        "".join(KEYWORDS[i % len(KEYWORDS)]),
+        "".join(PUBLISHERS[i % len(PUBLISHERS)]),
+        published,
+    )
+
+
+def as_dicts(titles, links):
+    # sentiment_th_analysis: dict ต่อข่าว
+    items = []
+    for i, (title, link) in enumerate(zip(titles, links)):
+        keyword, publisher, published = raw_fields(i)
+        items.append({
+            'keyword': keyword, 'date': published.strftime("%Y-%m-%d"), 'time': published.strftime("%H:%M:%S"),
+            'title': title, 'source': publisher, 'link': link,
+            'sentiment': 0.1 * (i % 10), 'sentiment_label': 'positive', 'matched_words': 'ไม่มี',
+        })
+    return items
+
+
+def as_lists(titles, links):
+    # google_sentiment เดิม: dict จาก RSS (news_table) + list ที่ append คะแนนต่อท้าย
+    news_table, items = [], []
+    for i, (title, link) in enumerate(zip(titles, links)):
+        _, _, published = raw_fields(i)
+        news_table.append({'title': title, 'link': link,
+                           'pubDate': published.strftime('%a, %d %b %Y %H:%M:%S GMT')})
+        news = [published.strftime("%d-%b-%y"), published.strftime("%H:%M:%S"), title]
+        news.append(0.1 * (i % 10))
+        news.append('positive')
+        news.append(f"c_{i:012x}")
+        items.append(news)
+    return news_table, items
+
+
+def as_records(titles, links):
+    items = []
+    for i, (title, link) in enumerate(zip(titles, links)):
+        keyword, publisher, published = raw_fields(i)
+        record = NewsRecord('google_news', keyword, title, url=link, published_at=published, publisher=publisher)
+        record.sentiment = 0.1 * (i % 10)
+        record.sentiment_label = 'positive'
+        record.matched_words = 'ไม่มี'
+        record.cluster_id = f"c_{i:012x}"
+        items.append(record)
+    return items
+
+
+def measure(build, titles, links):
+    gc.collect()
+    tracemalloc.start()
+    items = build(titles, links)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    gc.collect()
+    return current / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per news item")
+    parser.add_argument('--items', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    titles = [f"หุ้นตัวอย่าง {i} รายงานกำไรเพิ่มขึ้นตามคาด" for i in range(args.items)]
+    links = [f"https://news.google.com/rss/articles/{i:012d}" for i in range(args.items)]
+
+    print(f"{args.items:,} items, excluding title/link strings")
+    print(f"{'layout':<32}{'MB':>10}{'bytes/item':>12}")
+    for label, build in (("dict (sentiment_th_analysis)", as_dicts),
+                         ("dict + list (google_sentiment)", as_lists),
+                         ("NewsRecord", as_records)):
+        mb = measure(build, titles, links)
+        print(f"{label:<32}{mb:>10.1f}{mb * 2**20 / args.items:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
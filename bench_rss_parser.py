@@ -0,0 +1,84 @@
+"""
+เทียบ parser RSS เดิม (ET.fromstring + find ซ้ำ + strptime) กับ rss_parser (pull parser + date cache)
+บน feed สังเคราะห์ขนาดใหญ่
+
+    python bench_rss_parser.py --items 5000 --limit 100 --repeat 20
+"""
+import argparse
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+import rss_parser
+
+
+def make_feed(items):
+    start = datetime(2026, 10, 1, 8, 0, 0)
+    description = escape('<a href="#">รายละเอียดข่าว</a>' * 5)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>bench</title>']
+    for i in range(items):
+        published = (start - timedelta(minutes=7 * i)).strftime('%a, %d %b %Y %H:%M:%S GMT')
+        parts.append(
+            f'<item><title>{escape(f"หุ้นตัวอย่าง {i} รายงานกำไรเพิ่มขึ้น - สำนักข่าว {i % 40}")}</title>'
+            f'<link>https://news.google.com/rss/articles/{i:08d}</link>'
+            f'<guid isPermaLink="false">{i:08d}</guid>'
+            f'<pubDate>{published}</pubDate>'
+            f'<description>{description}</description>'
+            f'<source url="https://example.com">สำนักข่าว {i % 40}</source></item>'
+        )
+    parts.append('</channel></rss>')
+    return ''.join(parts).encode('utf-8')
+
+
+def old_parse(content, limit):
+    soup = ET.fromstring(content)
+    news_list = []
+    for item in soup.findall('./channel/item')[:limit]:
+        title = item.find('title').text if item.find('title') is not None else 'N/A'
+        link = item.find('link').text if item.find('link') is not None else 'N/A'
+        pub_date = item.find('pubDate').text if item.find('pubDate') is not None else 'N/A'
+        news_list.append({'title': title, 'link': link, 'pubDate': pub_date})
+    for news in news_list:
+        try:
+            datetime.strptime(news['pubDate'], '%a, %d %b %Y %H:%M:%S %Z')
+        except ValueError:
+            pass
+    return news_list
+
+
+def new_parse(content, limit):
+    news_list = rss_parser.parse_rss_items(content, limit)
+    for news in news_list:
+        rss_parser.parse_rfc822(news['pubDate'])
+    return news_list
+
+
+def timeit(fn, content, limit, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(content, limit)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RSS parsing")
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    content = make_feed(args.items)
+    assert old_parse(content, args.limit) == new_parse(content, args.limit)
+    print(f"feed: {args.items} items, {len(content) / 1024:.0f} KB (best of {args.repeat}, ms)")
+    print(f"{'limit':<10}{'old':>10}{'new':>10}{'speedup':>10}")
+    for limit in (args.limit, args.items):
+        old = timeit(old_parse, content, limit, args.repeat)
+        new = timeit(new_parse, content, limit, args.repeat)
+        print(f"{limit:<10}{old:>10.2f}{new:>10.2f}{old / new:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
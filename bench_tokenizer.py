@@ -0,0 +1,72 @@
+"""
+เทียบการตัดคำหัวข่าวด้วยพจนานุกรมของ pythainlp อย่างเดียว กับพจนานุกรมที่เพิ่ม domain terms + คำใน lexicon
+ใช้หัวข่าวจากไฟล์ *_thai_sentiment.csv ใน repo
+
+    python bench_tokenizer.py --repeat 5
+"""
+import argparse
+import csv
+import glob
+import time
+
+from pythainlp.tokenize import word_tokenize
+
+import pythainlp
+from pythainlp.corpus import thai_words
+from pythainlp.util import Trie
+
+import lexicon_snapshot
+import thai_lexicon
+
+
+def load_titles(pattern="*_thai_sentiment.csv"):
+    titles = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8-sig") as f:
+            titles.extend(row["title"] for row in csv.DictReader(f) if row.get("title"))
+    return titles
+
+
+def run(titles, word_trie, repeat):
+    def tokenize(text):
+        return [t for t in (t.strip() for t in word_tokenize(text, engine="newmm", custom_dict=word_trie)) if t]
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokenized = [tokenize(title) for title in titles]
+        best = min(best, time.perf_counter() - start)
+    tokens = sum(len(t) for t in tokenized)
+    short = sum(1 for ts in tokenized for t in ts if len(t) < 2)
+    return tokens / len(titles), short / len(titles), best * 1e6 / len(titles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tokenizer dictionary")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    titles = load_titles()
+    lexicon = thai_lexicon.get_lexicon()
+    # รอบแรกไม่จับเวลา (โหลดพจนานุกรมเริ่มต้นของ pythainlp)
+    word_tokenize(titles[0], engine="newmm")
+
+    print(f"{len(titles)} titles (best of {args.repeat})")
+    print(f"{'dictionary':<20}{'tokens/title':>14}{'short/title':>13}{'us/title':>10}")
+    extra = list(thai_lexicon.read_domain_terms()) + list(lexicon.entries.keys())
+    words = list(thai_words()) + extra
+    # snapshot แยกชื่อจากของ thai_lexicon (ไม่ขึ้นกับ THAI_SHARED_TABLES)
+    snapshot = lexicon_snapshot.load_or_compile_words(f"bench_words.{pythainlp.__version__}.{len(words)}",
+                                                      lambda: words, thai_lexicon.LEXICON_COMPILED_DIR)
+    dictionaries = (
+        ("pythainlp", None),
+        ("+ domain (Trie)", Trie(words)),
+        ("+ domain (mmap)", snapshot),
+    )
+    for label, word_trie in dictionaries:
+        tokens, short, us = run(titles, word_trie, args.repeat)
+        print(f"{label:<20}{tokens:>14.1f}{short:>13.2f}{us:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
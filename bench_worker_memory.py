@@ -0,0 +1,80 @@
+"""
+วัด memory ต่อ worker เมื่อเปิดหลาย process แบบ uvicorn --workers
+เทียบตารางแยกต่อ process (THAI_SHARED_TABLES=0) กับตารางร่วมผ่าน mmap (THAI_SHARED_TABLES=1)
+
+    python bench_worker_memory.py --workers 4
+
+RSS นับหน้าที่แชร์ซ้ำในทุก process จึงดู PSS (หารหน้าที่แชร์ตามจำนวน process)
+และ USS (หน้าของ process นั้นเอง) ประกอบ ตัวเลขเหล่านี้อ่านจาก /proc (Linux เท่านั้น)
+"""
+import argparse
+import multiprocessing
+import os
+
+SAMPLE_TITLES = [
+    "ธนาคารกสิกรไทยรายงานกำไรสุทธิไตรมาส 3 เพิ่มขึ้น 12% นักวิเคราะห์แนะนำซื้อ",
+    "หุ้นเอไอเอสร่วงหลังผลประกอบการต่ำกว่าคาด นักลงทุนกังวลการแข่งขันรุนแรง",
+    "ทิสโก้ไม่ได้ขาดทุนมากอย่างที่ตลาดกังวล ราคาหุ้นฟื้นตัว",
+    "ปตท.สผ. เดินหน้าลงทุนแหล่งก๊าซใหม่ คาดรายได้เติบโตต่อเนื่อง",
+]
+
+
+def read_memory():
+    """คืน {'rss', 'pss', 'uss'} เป็น MB ของ process ปัจจุบัน"""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def worker(shared, ready, done, results):
+    os.environ["THAI_SHARED_TABLES"] = "1" if shared else "0"
+    before = read_memory()
+    import thai_lexicon
+    thai_lexicon.analyze_sentiment_batch(SAMPLE_TITLES)
+    # รอให้ทุก worker โหลดเสร็จก่อนวัด เพื่อให้ PSS สะท้อนการแชร์หน้าจริง
+    ready.wait()
+    after = read_memory()
+    results.put({key: after[key] - before[key] for key in after})
+    done.wait()
+
+
+def run(workers, shared):
+    ctx = multiprocessing.get_context("spawn")  # uvicorn --workers ก็ spawn process ใหม่
+    ready, done = ctx.Barrier(workers), ctx.Event()
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(shared, ready, done, results)) for _ in range(workers)]
+    for p in processes:
+        p.start()
+    measured = [results.get() for _ in processes]
+    done.set()
+    for p in processes:
+        p.join()
+    return {key: sum(m[key] for m in measured) / workers for key in measured[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker memory of the Thai lexicon tables")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    # compile snapshot ไว้ก่อน ไม่ให้ worker แรกของรอบ shared ต้อง compile เอง
+    os.environ["THAI_SHARED_TABLES"] = "1"
+    import thai_lexicon  # noqa: F401
+
+    print(f"Memory added per worker by thai_lexicon, {args.workers} workers (MB)")
+    print(f"{'tables':<10}{'RSS':>10}{'PSS':>10}{'USS':>10}")
+    for label, shared in (("private", False), ("shared", True)):
+        m = run(args.workers, shared)
+        print(f"{label:<10}{m['rss']:>10.1f}{m['pss']:>10.1f}{m['uss']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import re
+
+import lexicon_snapshot
+import thai_lexicon
+
+# lexicon ภาษาอังกฤษ (รูปแบบไฟล์และ snapshot เดียวกับ thai_sentiment.tsv)
+ENGLISH_LEXICON_PATH = os.getenv('ENGLISH_LEXICON_PATH',
+                                 os.path.join(thai_lexicon.LEXICON_DIR, 'english_sentiment.tsv'))
+
+NEGATION_WORDS = ('not', 'no', 'never', 'without', "isn't", "aren't", "wasn't", "don't", "doesn't",
+                  "didn't", "won't", "can't", 'fails', 'failed')
+
+# คำภาษาอังกฤษไม่ต้องใช้พจนานุกรม: ตัวพิมพ์เล็ก แยกตามช่องว่าง/เครื่องหมาย (เก็บ ' ไว้ใน don't)
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text):
+    return _WORD.findall((text or '').lower().replace('’', "'"))
+
+
+class CompiledEnglishLexicon:
+    """CompiledLexicon ของภาษาอังกฤษ: snapshot + trie ของวลี ใช้กับ thai_lexicon.analyze_sentiment_lexicon ได้เลย"""
+    __slots__ = ('version', 'entries', 'trie')
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.version = entries.version
+        self.trie = thai_lexicon.build_phrase_trie(entries, NEGATION_WORDS, tokenizer=tokenize)
+
+    def tokenize(self, text):
+        return tokenize(text)
+
+
+class EnglishLexiconManager(thai_lexicon.LexiconManager):
+    language = 'English'
+
+    def __init__(self, path=ENGLISH_LEXICON_PATH, compiled_dir=thai_lexicon.LEXICON_COMPILED_DIR):
+        super().__init__(path, compiled_dir, terms_path=None)
+
+    def compile(self, entries):
+        return CompiledEnglishLexicon(entries)
+
+
+lexicon_manager = EnglishLexiconManager()
+
+def get_lexicon():
+    return lexicon_manager.get()
@@ -3,20 +3,61 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import os
+import re
 import time
 import random
 import json
+import hashlib
+from urllib.parse import urljoin
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# CSS selector ของกล่องโพสต์ (ตรงกับ class ที่ใช้ใน extract_posts_with_bs)
+POST_SELECTOR = "div.x1n2onr6.x1ja2u2z"
+POST_CLASS = "x1n2onr6 x1ja2u2z"
+
+# ดึงเฉพาะกล่องโพสต์ที่ยังไม่เคยอ่าน แล้วทำ marker ไว้ รอบถัดไปจะไม่ส่งกลับมาอีก
+# กล่องที่ยังโหลดเนื้อหาไม่เสร็จ (ไม่มีข้อความ) จะยังไม่ถูก mark เพื่อให้รอบหน้าอ่านใหม่
+EXTRACT_NEW_POSTS_JS = """
+const cls = arguments[0];
+const fresh = [];
+for (const el of document.querySelectorAll('div[class="' + cls + '"]:not([data-scraped])')) {
+    if (!el.innerText || !el.innerText.trim()) continue;
+    el.setAttribute('data-scraped', '1');
+    fresh.push(el.outerHTML);
+}
+return fresh;
+"""
+
+POST_ID_PATTERNS = [
+    re.compile(r"/posts/([\w.-]+)"),
+    re.compile(r"story_fbid=(\w+)"),
+    re.compile(r"/permalink/(\d+)"),
+    re.compile(r"/videos/(\d+)"),
+    re.compile(r"fbid=(\d+)"),
+]
 
 class FacebookScraper:
     def __init__(self, email, password):
         self.email = email
         self.password = password
         self.driver = None
+        self.seen_post_ids = set()
         
-    def initialize_driver(self):
+    def initialize_driver(self, headless=False):
         """Initialize the Edge webdriver with custom options"""
         options = webdriver.EdgeOptions()
+        if headless:
+            options.add_argument("--headless=new")
         options.add_argument("--disable-blink-features=AutomationControlled")
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option("useAutomationExtension", False)
@@ -56,55 +97,154 @@ class FacebookScraper:
             .click()\
             .perform()
             
-        time.sleep(15)
+        # รอจนกว่า login สำเร็จ (มี cookie c_user) แทนการ sleep ตายตัว
+        WebDriverWait(self.driver, 30).until(lambda d: self.is_logged_in())
+
+    def is_logged_in(self):
+        """Check whether the current session has a Facebook user cookie"""
+        return self.driver.get_cookie("c_user") is not None
+
+    def save_cookies(self, cookie_path):
+        """Persist the session cookies so other drivers/runs can reuse the login"""
+        tmp_path = cookie_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.driver.get_cookies(), f)
+        os.replace(tmp_path, cookie_path)
+
+    def load_cookies(self, cookie_path):
+        """Load persisted session cookies, returns True if the session is valid"""
+        if not os.path.exists(cookie_path):
+            return False
+        with open(cookie_path, "r", encoding="utf-8") as f:
+            cookies = json.load(f)
+
+        # ต้องเปิดโดเมน facebook ก่อนถึงจะ add_cookie ได้
+        self.driver.get("https://www.facebook.com/")
+        for cookie in cookies:
+            cookie.pop("sameSite", None)
+            try:
+                self.driver.add_cookie(cookie)
+            except Exception as e:
+                print("Error loading cookie:", e)
+        self.driver.refresh()
+        return self.is_logged_in()
+
+    def ensure_session(self, cookie_path):
+        """Reuse saved cookies if still valid, otherwise login and save new cookies"""
+        if self.load_cookies(cookie_path):
+            return
+        self.login()
+        self.save_cookies(cookie_path)
         
-    def navigate_to_profile(self, profile_url):
+    def navigate_to_profile(self, profile_url, timeout=10):
         """Navigate to a specific Facebook profile"""
         self.driver.get(profile_url)
-        time.sleep(4)
+        self.seen_post_ids = set()
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, POST_SELECTOR))
+            )
+        except TimeoutException:
+            print(f"No posts loaded for {profile_url} after {timeout}s")
+
+    def count_posts(self):
+        """Count post containers currently in the DOM"""
+        return len(self.driver.find_elements(By.CSS_SELECTOR, POST_SELECTOR))
+
+    def wait_for_new_posts(self, previous_count, timeout=6):
+        """Wait until more posts than previous_count are loaded, returns the new count"""
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.25).until(
+                lambda d: self.count_posts() > previous_count
+            )
+        except TimeoutException:
+            pass
+        return self.count_posts()
         
     def slow_scroll(self, step=500):
-        """Scroll the page slowly"""
+        """Scroll the page and wait for new posts instead of a fixed sleep"""
+        previous_count = self.count_posts()
         self.driver.execute_script(f"window.scrollBy(0, {step});")
-        time.sleep(2)
+        return self.wait_for_new_posts(previous_count)
         
+    def parse_post(self, post):
+        """Extract the fields of one post container (BeautifulSoup element)"""
+        message_elements = post.find_all("div", {"data-ad-preview": "message"})
+        post_text = " ".join([msg.get_text(strip=True) for msg in message_elements])
+        
+        likes_element = post.select_one("span.xt0b8zv.x1jx94hy.xrbpyxo.xl423tq > span > span")
+        likes = likes_element.get_text(strip=True) if likes_element else None
+        
+        comments_element = post.select("div > div > span > div > div > div > span > span.html-span ")
+        comments = comments_element[0].text if comments_element else None
+        
+        
+        shares_element =post.select("div > div > span > div > div > div > span > span.html-span ")
+        shares = shares_element[1].text if len(shares_element) > 1 else None
+
+        timeelement=post.select_one("div.xu06os2.x1ok221b > span > div > span > span > a > span")
+        post_time= timeelement.get_text(strip=True) if timeelement else None
+
+        return {
+            "post_id": self.get_post_id(post, post_text, post_time),
+            "permalink": self.find_permalink(post)[0],
+            "post_text": post_text,
+            "likes": likes,
+            "comments": comments,
+            "shares": shares,
+            "post_time": post_time
+        }
+
+    def find_permalink(self, post):
+        """(permalink, post ID) of the first link that points at the post itself, or (None, None)"""
+        for link in post.find_all("a", href=True):
+            for pattern in POST_ID_PATTERNS:
+                match = pattern.search(link["href"])
+                if match:
+                    return urljoin("https://www.facebook.com/", link["href"]), match.group(1)
+        return None, None
+
+    def get_post_id(self, post, post_text, post_time):
+        """Post ID from the permalink, or a hash of text/time when no permalink is found"""
+        _, post_id = self.find_permalink(post)
+        if post_id:
+            return post_id
+        key = f"{post_text}|{post_time}"
+        return "h_" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
     def extract_posts_with_bs(self):
         """Extract posts data using BeautifulSoup"""
         page_source = self.driver.page_source
-        soup = BeautifulSoup(page_source, "html.parser")
+        soup = BeautifulSoup(page_source, HTML_PARSER)
         posts_data = []
         
-        posts = soup.find_all("div", {"class": "x1n2onr6 x1ja2u2z"})
+        posts = soup.find_all("div", {"class": POST_CLASS})
         
         for post in posts:
             try:
-                message_elements = post.find_all("div", {"data-ad-preview": "message"})
-                post_text = " ".join([msg.get_text(strip=True) for msg in message_elements])
-                
-                likes_element = post.select_one("span.xt0b8zv.x1jx94hy.xrbpyxo.xl423tq > span > span")
-                likes = likes_element.get_text(strip=True) if likes_element else None
-                
-                comments_element = post.select("div > div > span > div > div > div > span > span.html-span ")
-                comments = comments_element[0].text if comments_element else None
-                
+                posts_data.append(self.parse_post(post))
+            except Exception as e:
+                print("Error extracting post data:", e)
                 
-                shares_element =post.select("div > div > span > div > div > div > span > span.html-span ")
-                shares = shares_element[1].text if shares_element else None
+        return posts_data
 
-                timeelement=post.select_one("div.xu06os2.x1ok221b > span > div > span > span > a > span")
-                post_time= timeelement.get_text(strip=True) if timeelement else None
+    def extract_new_posts(self):
+        """Extract only post containers loaded since the last call, skipping known post IDs"""
+        fragments = self.driver.execute_script(EXTRACT_NEW_POSTS_JS, POST_CLASS)
+        posts_data = []
 
-                
-                posts_data.append({
-                    "post_text": post_text,
-                    "likes": likes,
-                    "comments": comments,
-                    "shares": shares,
-                    "post_time": post_time
-                })
+        for fragment in fragments:
+            try:
+                post = BeautifulSoup(fragment, HTML_PARSER).find("div")
+                data = self.parse_post(post)
             except Exception as e:
                 print("Error extracting post data:", e)
-                
+                continue
+            if data["post_id"] in self.seen_post_ids:
+                continue
+            self.seen_post_ids.add(data["post_id"])
+            posts_data.append(data)
+
         return posts_data
         
     def remove_duplicates(self, data_list):
@@ -118,16 +258,22 @@ class FacebookScraper:
                 unique_data.append(data)
         return unique_data
         
-    def scrape_posts(self, max_posts):
+    def scrape_posts(self, max_posts, max_idle_scrolls=5):
         """Scrape a specified number of posts"""
         all_posts = []
+        idle_scrolls = 0
         
         while len(all_posts) < max_posts:
-            posts = self.extract_posts_with_bs()
+            # อ่านเฉพาะโพสต์ที่เพิ่งโหลดมา ไม่ parse ทั้งหน้าใหม่ทุกรอบ
+            posts = self.extract_new_posts()
             all_posts.extend(posts)
-            all_posts = self.remove_duplicates(all_posts)
             print(f"Extracted {len(all_posts)} unique posts so far.")
             # print(all_posts)
+
+            # หยุดเมื่อ scroll แล้วไม่มีโพสต์ใหม่ติดกันหลายรอบ (สุดหน้า)
+            idle_scrolls = idle_scrolls + 1 if not posts else 0
+            if idle_scrolls >= max_idle_scrolls:
+                break
             self.slow_scroll()
             
             if len(all_posts) >= max_posts:
@@ -153,6 +299,88 @@ class FacebookScraper:
         if self.driver:
             self.driver.quit()
 
+
+class FacebookScraperPool:
+    """
+    Pool of browser instances sharing one login (via persisted cookies)
+    that scrapes many profiles/pages concurrently
+    """
+    def __init__(self, email, password, size=4, cookie_path="fb_cookies.json", headless=False):
+        self.email = email
+        self.password = password
+        self.size = size
+        self.cookie_path = cookie_path
+        self.headless = headless
+        self.scrapers = []
+        self.idle = queue.Queue()
+
+    def start(self):
+        """Start the browsers, login once and share the session with the rest"""
+        started = []
+        try:
+            first = FacebookScraper(self.email, self.password)
+            started.append(first)
+            first.initialize_driver(headless=self.headless)
+            first.ensure_session(self.cookie_path)
+
+            for _ in range(self.size - 1):
+                scraper = FacebookScraper(self.email, self.password)
+                started.append(scraper)
+                scraper.initialize_driver(headless=self.headless)
+                if not scraper.load_cookies(self.cookie_path):
+                    # cookie ใช้ไม่ได้ (เช่นหมดอายุระหว่างทาง) -> login ใหม่แล้วบันทึกทับ
+                    scraper.ensure_session(self.cookie_path)
+        except BaseException:
+            # ปิด browser ที่เปิดไปแล้ว (รวมตัวที่พัง) ไม่ให้ค้างเป็น process กำพร้า
+            for scraper in started:
+                try:
+                    scraper.close()
+                except Exception as e:
+                    print("Error closing browser:", e)
+            raise
+
+        for scraper in started:
+            self._add(scraper)
+        return self
+
+    def _add(self, scraper):
+        self.scrapers.append(scraper)
+        self.idle.put(scraper)
+
+    def scrape_profile(self, profile_url, max_posts):
+        """Borrow an idle browser, scrape one profile and give it back"""
+        scraper = self.idle.get()
+        try:
+            scraper.navigate_to_profile(profile_url)
+            return scraper.scrape_posts(max_posts=max_posts)
+        except Exception as e:
+            print(f"Error scraping {profile_url}:", e)
+            return []
+        finally:
+            self.idle.put(scraper)
+
+    def scrape_profiles(self, profile_urls, max_posts):
+        """Scrape many profiles concurrently, returns {profile_url: posts}"""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = {
+                url: executor.submit(self.scrape_profile, url, max_posts)
+                for url in profile_urls
+            }
+            return {url: future.result() for url, future in futures.items()}
+
+    def close(self):
+        """Close all browsers in the pool"""
+        for scraper in self.scrapers:
+            scraper.close()
+        self.scrapers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
 # Example usage
 if __name__ == "__main__":
     # Initialize the scraper
@@ -0,0 +1,171 @@
+import re
+import math
+from datetime import datetime, timedelta
+import pandas as pd
+import scorers
+
+# ตัวคูณของตัวย่อจำนวน (ไทย/อังกฤษ) ที่ Facebook ใช้แสดง likes/comments/shares
+ENGAGEMENT_MULTIPLIERS = {
+    "k": 1_000, "m": 1_000_000, "b": 1_000_000_000,
+    "พัน": 1_000, "หมื่น": 10_000, "แสน": 100_000, "ล้าน": 1_000_000,
+}
+
+# ตัวย่ออังกฤษต้องไม่ติดตัวอักษรอื่น ("12 members" ไม่ใช่ 12M, "5 bookmarks" ไม่ใช่ 5B)
+ENGAGEMENT_PATTERN = re.compile(r"(\d+(?:[.,]\d+)*)\s*((?:k|m|b)(?![a-z])|พัน|หมื่น|แสน|ล้าน)?", re.IGNORECASE)
+
+# หน่วยเวลาแบบสัมพัทธ์ เช่น "3 ชม.", "5m", "2 วัน"
+RELATIVE_TIME_UNITS = {
+    "วินาที": "seconds", "s": "seconds", "sec": "seconds",
+    "นาที": "minutes", "m": "minutes", "min": "minutes", "mins": "minutes",
+    "ชม.": "hours", "ชั่วโมง": "hours", "h": "hours", "hr": "hours", "hrs": "hours",
+    "วัน": "days", "d": "days",
+    "สัปดาห์": "weeks", "w": "weeks",
+}
+
+RELATIVE_TIME_PATTERN = re.compile(r"^(\d+)\s*(วินาที|นาที|ชม\.|ชั่วโมง|วัน|สัปดาห์|sec|mins?|hrs?|[smhdw])(?![a-z])", re.IGNORECASE)
+
+# น้ำหนักของแต่ละ engagement (การแชร์/คอมเมนต์สะท้อนการกระจายข่าวมากกว่ากดไลก์)
+ENGAGEMENT_WEIGHTS = {"likes": 1.0, "comments": 2.0, "shares": 3.0}
+
+
+def parse_engagement(value):
+    """
+    แปลงข้อความจำนวน engagement เป็นตัวเลข เช่น "1.2K" -> 1200, "3 พัน" -> 3000,
+    "ความคิดเห็น 1,234 รายการ" -> 1234
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+
+    match = ENGAGEMENT_PATTERN.search(str(value).strip())
+    if not match:
+        return 0
+
+    number, suffix = match.groups()
+    # คอมมาคือตัวคั่นหลักพันเสมอ ("1,234.5K" -> 1234.5K)
+    try:
+        number = float(number.replace(",", ""))
+    except ValueError:
+        # เช่น "1.2.3" อ่านไม่ได้ ไม่นับดีกว่าให้โพสต์เดียวพัง/ถ่วงทั้งชุด
+        return 0
+    if suffix:
+        return int(round(number * ENGAGEMENT_MULTIPLIERS[suffix.lower()]))
+    return int(number)
+
+
+def parse_post_time(value, now=None):
+    """
+    แปลงเวลาโพสต์ของ Facebook ("3 ชม.", "5m", "เมื่อวานนี้", "Yesterday at 10:00")
+    เป็น datetime ถ้าแปลงไม่ได้จะคืนเวลาที่ scrape (now)
+    """
+    now = now or datetime.now()
+    if not value:
+        return now
+
+    text = value.strip()
+    lowered = text.lower()
+
+    if lowered in ("just now", "เมื่อสักครู่", "เมื่อสักครู่นี้"):
+        return now
+    if lowered.startswith(("yesterday", "เมื่อวาน")):
+        return now - timedelta(days=1)
+
+    match = RELATIVE_TIME_PATTERN.match(lowered)
+    if match:
+        amount, unit = match.groups()
+        unit = RELATIVE_TIME_UNITS.get(unit, RELATIVE_TIME_UNITS.get(unit.rstrip("s")))
+        return now - timedelta(**{unit: int(amount)})
+
+    return now
+
+
+def engagement_weight(likes, comments, shares):
+    """
+    น้ำหนักของโพสต์ตาม engagement (log scale เพื่อไม่ให้โพสต์ไวรัลโพสต์เดียวครอบงำค่าเฉลี่ย)
+    """
+    raw = (likes * ENGAGEMENT_WEIGHTS["likes"]
+           + comments * ENGAGEMENT_WEIGHTS["comments"]
+           + shares * ENGAGEMENT_WEIGHTS["shares"])
+    return 1.0 + math.log1p(raw)
+
+
+def score_posts(posts, page, batch_size=64, now=None, scorer=None):
+    """
+    ให้คะแนน sentiment ของโพสต์ (ทีละ batch) พร้อมแปลง engagement และเวลาโพสต์เป็นตัวเลข
+    """
+    now = now or datetime.now()
+    scorer = scorer or scorers.get_scorer()
+    texts = [post.get("post_text") or "" for post in posts]
+    sentiments = []
+    for start in range(0, len(texts), batch_size):
+        sentiments.extend(scorer.score_batch(texts[start:start + batch_size]))
+
+    scored_posts = []
+    for post, (polarity, label, matched_words, version) in zip(posts, sentiments):
+        likes = parse_engagement(post.get("likes"))
+        comments = parse_engagement(post.get("comments"))
+        shares = parse_engagement(post.get("shares"))
+
+        scored_posts.append({
+            "page": page,
+            "post_id": post.get("post_id"),
+            "post_text": post.get("post_text"),
+            "posted_at": parse_post_time(post.get("post_time"), now=now),
+            "likes": likes,
+            "comments": comments,
+            "shares": shares,
+            "weight": engagement_weight(likes, comments, shares),
+            "sentiment": polarity,
+            "sentiment_label": label,
+            "matched_words": ', '.join(matched_words) if matched_words else 'ไม่มี',
+            "lexicon_version": version,
+        })
+    return scored_posts
+
+
+def aggregate_sentiment(scored_posts, bucket="1h"):
+    """
+    รวม sentiment แบบถ่วงน้ำหนักด้วย engagement ต่อเพจและช่วงเวลา (bucket เป็น pandas freq เช่น '1h', '1D')
+    """
+    columns = ['page', 'bucket', 'posts', 'weighted_sentiment', 'average_sentiment',
+               'total_engagement', 'positive', 'neutral', 'negative']
+    if not scored_posts:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.DataFrame(scored_posts)
+    df['bucket'] = pd.to_datetime(df['posted_at']).dt.floor(bucket)
+    df['weighted_score'] = df['sentiment'] * df['weight']
+    df['engagement'] = df['likes'] + df['comments'] + df['shares']
+
+    grouped = df.groupby(['page', 'bucket'])
+    summary = grouped.agg(
+        posts=('sentiment', 'size'),
+        weighted_score=('weighted_score', 'sum'),
+        weight=('weight', 'sum'),
+        average_sentiment=('sentiment', 'mean'),
+        total_engagement=('engagement', 'sum'),
+    )
+    summary['weighted_sentiment'] = summary['weighted_score'] / summary['weight']
+
+    label_counts = grouped['sentiment_label'].value_counts().unstack(fill_value=0)
+    summary = summary.join(label_counts)
+    for label in ('positive', 'neutral', 'negative'):
+        if label not in summary:
+            summary[label] = 0
+
+    return summary.reset_index()[columns]
+
+
+def scrape_and_score(pool, profile_urls, max_posts=50, bucket="1h"):
+    """
+    Scrape หลายเพจพร้อมกันด้วย FacebookScraperPool แล้วคืน (โพสต์ที่ให้คะแนนแล้ว, ตารางสรุปต่อเพจ/ช่วงเวลา)
+    """
+    now = datetime.now()
+    results = pool.scrape_profiles(profile_urls, max_posts=max_posts)
+
+    scored_posts = []
+    for page, posts in results.items():
+        scored_posts.extend(score_posts(posts, page, now=now))
+
+    return pd.DataFrame(scored_posts), aggregate_sentiment(scored_posts, bucket=bucket)
@@ -0,0 +1,141 @@
+import time
+from collections import deque
+import requests
+import http_client
+from google_sentiment import build_news_url, parse_rss_items
+from xml.etree.ElementTree import ParseError
+
+class FeedState:
+    """
+    สถานะของ feed ต่อ ticker: validator สำหรับ conditional request,
+    ลิงก์ที่เคยเห็น และอัตราข่าวใหม่ (EWMA ต่อชั่วโมง)
+    """
+    def __init__(self, interval, max_seen=500):
+        self.etag = None
+        self.last_modified = None
+        self.seen_links = set()
+        self.seen_order = deque()
+        self.max_seen = max_seen
+        self.rate = None
+        self.interval = interval
+        self.last_poll = None
+        self.polls = 0
+        self.not_modified = 0
+
+    def remember(self, link):
+        """จำลิงก์ (จำกัดจำนวน ลิงก์เก่าสุดจะถูกลืมก่อน)"""
+        self.seen_links.add(link)
+        self.seen_order.append(link)
+        if len(self.seen_order) > self.max_seen:
+            self.seen_links.discard(self.seen_order.popleft())
+
+
+class FeedPoller:
+    """
+    ดึง Google News RSS แบบ conditional (ETag / If-Modified-Since) และปรับรอบ poll
+    ของแต่ละ ticker ตามอัตราข่าวใหม่: รอบถัดไป = target_new_items / rate
+    feed ที่เงียบจะถูก poll ห่างขึ้นเรื่อยๆ จนถึง max_interval feed ที่คึกคักจะถี่ขึ้นถึง min_interval
+    """
+    def __init__(self, lang="th", limit=20, interval=900, min_interval=120, max_interval=3600,
+                 target_new_items=3, alpha=0.3, timeout=15):
+        self.lang = lang
+        self.limit = limit
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new_items = target_new_items
+        self.alpha = alpha
+        self.timeout = timeout
+        self.states = {}
+        # ใช้ breaker ของ news.google.com ร่วมกับ get_google_news (เปิดแล้วทุก ticker หยุดยิงพร้อมกัน)
+        self.session = http_client.ResilientSession(timeout=timeout, headers={'User-Agent': 'Mozilla/5.0'})
+
+    def state(self, ticker):
+        if ticker not in self.states:
+            self.states[ticker] = FeedState(self.interval)
+        return self.states[ticker]
+
+    def poll(self, ticker):
+        """
+        ดึง feed ของ ticker คืน (ข่าวทั้งหมดใน feed, ข่าวที่ไม่เคยเห็น)
+        ถ้า server ตอบ 304 หรือดึงไม่สำเร็จ คืน (None, [])
+        """
+        state = self.state(ticker)
+        url = build_news_url(ticker, self.lang)
+        if url is None:
+            print("Unsuported language.")
+            return None, []
+
+        headers = {}
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+
+        now = time.monotonic()
+        elapsed = now - state.last_poll if state.last_poll is not None else None
+        state.last_poll = now
+        state.polls += 1
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                state.not_modified += 1
+                self.update_rate(state, 0, elapsed)
+                return None, []
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching data: {e}")
+            return None, []
+
+        try:
+            news_list = parse_rss_items(response.content, self.limit)
+        except ParseError as e:
+            # ไม่ใช่ RSS (เช่นหน้า captcha) ไม่นับเป็นรอบที่ไม่มีข่าวใหม่
+            print(f"Error parsing RSS feed: {e}")
+            return None, []
+
+        # เก็บ validator หลัง parse ผ่านแล้วเท่านั้น (ไม่ให้ ETag ของหน้า captcha ทำให้ได้ 304 ต่อไปเรื่อยๆ)
+        state.etag = response.headers.get('ETag', state.etag)
+        state.last_modified = response.headers.get('Last-Modified', state.last_modified)
+
+        first_poll = not state.seen_links
+        new_items = [item for item in news_list if item['link'] not in state.seen_links]
+        for item in new_items:
+            state.remember(item['link'])
+
+        # รอบแรกทุกข่าวเป็น "ใหม่" ไม่นับเป็นอัตรา
+        if not first_poll:
+            self.update_rate(state, len(new_items), elapsed)
+        return news_list, new_items
+
+    def update_rate(self, state, new_count, elapsed):
+        """
+        อัปเดตอัตราข่าวใหม่ (EWMA) แล้วคำนวณรอบ poll ถัดไป
+        """
+        if not elapsed:
+            return state.interval
+        observed = new_count / (elapsed / 3600)
+        state.rate = observed if state.rate is None else self.alpha * observed + (1 - self.alpha) * state.rate
+
+        if state.rate > 0:
+            interval = self.target_new_items / state.rate * 3600
+        else:
+            interval = state.interval * 2
+        state.interval = max(self.min_interval, min(self.max_interval, interval))
+        return state.interval
+
+    def next_interval(self, ticker):
+        return self.state(ticker).interval
+
+    def stats(self):
+        """สรุปสถานะของทุก ticker (อัตราข่าวใหม่/ชม., รอบ poll, จำนวน 304)"""
+        return {
+            ticker: {
+                'rate_per_hour': state.rate,
+                'interval': state.interval,
+                'polls': state.polls,
+                'not_modified': state.not_modified,
+            }
+            for ticker, state in self.states.items()
+        }
@@ -4,173 +4,168 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, date
-import xml.etree.ElementTree as ET
-from pythainlp.tokenize import word_tokenize
-from pythainlp.corpus import thai_stopwords
 import json
+import os
 import uuid
-
-THAI_SENTIMENT_LEXICON = {
-    # คำเชิงบวกมาก (0.8 - 1.0)
-    "ดีเยี่ยม": 1.0, "เยี่ยมยอด": 1.0, "สุดยอด": 1.0, "ยอดเยี่ยม": 1.0, 
-    "เจริญ": 0.9, "รุ่งเรือง": 0.9, "เติบโต": 0.9, "พุ่ง": 0.9, "ทะยาน": 0.9,
-    "สำเร็จ": 0.8, "ชนะ": 0.8, "ได้": 0.8, "ดี": 0.8, "เยี่ยม": 0.9,
-    
-    # คำเชิงบวกปานกลาง (0.4 - 0.7)
-    "ชอบ": 0.7, "พอใจ": 0.7, "ยินดี": 0.7, "ดีใจ": 0.7, "สดใส": 0.7,
-    "ขึ้น": 0.6, "เพิ่ม": 0.6, "ดีขึ้น": 0.6, "ฟื้นตัว": 0.6, "แข็งแกร่ง": 0.6,
-    "มั่นคง": 0.5, "ราบรื่น": 0.5, "ปกติ": 0.4, "โอเค": 0.4,
-    
-    # คำเชิงลบมาก (-0.8 ถึง -1.0)
-    "แย่มาก": -1.0, "ล้มเหลว": -1.0, "เจ๊ง": -1.0, "ล่มสลาย": -1.0, "วิกฤต": -1.0,
-    "ทุจริต": -0.9, "โกง": -0.9, "ฉ้อโกง": -0.9, "คอร์รัปชั่น": -0.9, "หลอกลวง": -0.9,
-    "ขาดทุน": -0.9, "ตกต่ำ": -0.9, "ย่ำแย่": -0.9, "ตกกระป๋อง": -0.9, "ดิ่ง": -0.9,
-    "แย่": -0.8, "สแกม": -0.8, "สแกมเมอร์": -0.8, "เสีย": -0.8, "เลวร้าย": -0.8,
-    "ฟอกเงิน": -0.9, "ฟอกเงิน": -0.9, "ผิดกฏหมาย": -0.9,
-    
-    # คำเชิงลบปานกลาง (-0.4 ถึง -0.7)
-    "ปัญหา": -0.7, "กังวล": -0.7, "ห่วง": -0.7, "เสี่ยง": -0.7, "อันตราย": -0.7,
-    "ลดลง": -0.6, "ลด": -0.6, "หด": -0.6, "ตก": -0.6, "ลง": -0.6,
-    "อ่อนแอ": -0.5, "ชะลอ": -0.5, "ซบเซา": -0.5, "ซึม": -0.5, "ติดขัด": -0.5,
-    "แพง": -0.4, "เหนื่อย": -0.4, "ยาก": -0.4,
-    
-    # คำเกี่ยวกับเศรษฐกิจและการเงิน
-    "กำไร": 0.8, "รายได้": 0.6, "เงินทุน": 0.5, "ลงทุน": 0.5,
-    "หนี้": -0.6, "ขาดดุล": -0.7, "เงินเฟ้อ": -0.6, "ว่างงาน": -0.7,
-    
-    # คำเกี่ยวกับหุ้น
-    "แกว่ง": 0.0, "คาดการณ์": 0.0, "ประเมิน": 0.0, "วิเคราะห์": 0.0,
-    "ขาย": -0.3, "ถือ": 0.1, "ซื้อ": 0.4, "แนะนำซื้อ": 0.7,
-    
-    # คำเสริมความหมาย (Intensifiers)
-    "มาก": 1.2, "มากมาย": 1.2, "สุด": 1.3, "ที่สุด": 1.3, "เกินไป": 1.2,
-    "ไม่": -1.5, "ไม่ใช่": -1.5, "ไม่ได้": -1.5,
-}
-THAI_STOPWORDS = set(thai_stopwords())
+import sentiment_store
+import payload_codec
+import headline_dedup
+import http_client
+import tracing
+import scorers
+import relevance
+from rss_parser import CHUNK_SIZE, parse_rss_items
+from xml.etree.ElementTree import ParseError
+from sources import NewsRecord, score_records
+
+# ปลายทางของผลลัพธ์ (ตั้งผ่าน env ได้ เช่นตอนรัน sweeper คู่กับ web บน dyno)
+API_ENDPOINT = os.environ.get("SENTIMENT_API_URL", "http://127.0.0.1:8001/api/sentiment")
+
+def build_news_url(keyword, lang="th"):
+    """
+    Build the Google News RSS search URL, returns None for unsupported languages
+    """
+    if lang == "th":
+        return f"https://news.google.com/rss/search?q={keyword}&hl=th&gl=TH&ceid=TH:th"
+    elif lang =="en":
+        return f"https://news.google.com/rss/search?q={keyword}&hl=en-US&gl=US&ceid=US:en"
+    return None
 
 def get_google_news(keyword, lang="th", limit=20):
     """
     Fetch the lastest new for a given stock from google.com
     """
-    if lang == "th":
-        url = f"https://news.google.com/rss/search?q={keyword}&hl=th&gl=TH&ceid=TH:th"
-    elif lang =="en":
-        url =  f"https://news.google.com/rss/search?q={keyword}&hl=en-US&gl=US&ceid=US:en"
-    else:
+    url = build_news_url(keyword, lang)
+    if url is None:
         print("Unsuported language.")
         return []
 
-    headers = {'User-Agent': 'Mozilla/5.0'}
-
-    try:
-        response  = requests.get(url, headers=headers)
-        response.raise_for_status() # check HTTP status
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching data: {e}")
-        return []
-    
-    # Use XML Parsiing for analyst RSS Feed 
-    soup = ET.fromstring(response.content)
-    news_list = []
-
-    #RSS News items อยู่ใน <item> in <channel>
-    for item in soup.findall('./channel/item')[:limit]:
-        title = item.find('title').text if item.find('title') is not None else 'N/A'
-        link = item.find('link').text if item.find('link') is not None else 'N/A'
-        pub_date = item.find('pubDate').text if item.find('pubDate') is not None else 'N/A'
-
-        news_list.append({
-            'title':title,
-            'link': link,
-            'pubDate': pub_date
-        })
-    return news_list
-
-def parse_news(news_list):
+    with tracing.span("get_google_news", keyword=keyword, lang=lang, limit=limit) as span:
+        try:
+            # stream: parse ระหว่างดาวน์โหลด และเลิกอ่านทันทีเมื่อได้ครบ limit
+            # (timeout / retry / circuit breaker ของ news.google.com อยู่ใน http_client)
+            # อ่าน body ภายใน session: body ขาดกลางทางถูกนับเข้า breaker และลองใหม่ทั้งคำขอ
+            def read_feed(response):
+                span.set_attribute("http.status_code", response.status_code)
+                response.raise_for_status() # check HTTP status
+                return parse_rss_items(response.iter_content(CHUNK_SIZE), limit)
+
+            news_list = http_client.get_session().get(url, stream=True, consume=read_feed)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching data: {e}")
+            span.set_attribute("error", str(e))
+            return []
+        except ParseError as e:
+            # ได้ 200 แต่ไม่ใช่ RSS (เช่นหน้า captcha / consent ของ Google)
+            print(f"Error parsing RSS feed: {e}")
+            span.set_attribute("error", f"ParseError: {e}")
+            return []
+        span.set_attribute("items", len(news_list))
+        return news_list
+
+def format_published(dt):
     """
-    Parse the news table and extract relevant information
+    (date, time) สำหรับแสดงผล ถ้าไม่มีเวลาเผยแพร่ใช้วันนี้และ "N/A"
     """
-    parsed_news = []
-    for news_item in news_list:
-        title = news_item['title']
-        pub_date_str = news_item['pubDate']
-
-        #Attemp to parse the date and time from the RRS pubDate string
-        try:
-            # Format 'Wed, 20 Nov 2025 08:31:46 GMT'
-            dt = datetime.strptime(pub_date_str,'%a, %d %b %Y %H:%M:%S %Z')
-            current_date = dt.strftime("%d-%b-%y")
-            time = dt.strftime("%H:%M:%S")
-        
-        except ValueError:
-            current_date = date.today().strftime("%d-%b-%y")
-            time = "N/A"
-
-        # Append the formatted data
-        parsed_news.append([current_date, time,title])
+    # Format 'Wed, 20 Nov 2025 08:31:46 GMT' -> ('20-Nov-25', '08:31:46')
+    if dt is None:
+        return date.today().strftime("%d-%b-%y"), "N/A"
+    return dt.strftime("%d-%b-%y"), dt.strftime("%H:%M:%S")
 
-    return parsed_news
+def parse_news(news_list, keyword=None):
+    """
+    Parse the news table into NewsRecord (one compact record per item from fetch to storage)
+    """
+    with tracing.span("parse_news", items=len(news_list)):
+        return [NewsRecord.from_rss(news_item, keyword) for news_item in news_list]
 
-def analyze_sentiment(parsed_news):
+def analyze_sentiment(records, scorer=None):
     """
     Perform sentiment analysis on the parsed news
+    (scorer: scorers.Scorer ค่าเริ่มต้นตาม SENTIMENT_SCORER)
     """
-    for news in parsed_news:
-        title = news[2]
-        
-        # 1. Word Segmentation (Tokenization)
-        # Use the default dictionary for segmentation
-        tokens = word_tokenize(title, engine='newmm') 
-        
-        # 2. Cleanup and Score Calculation
-        total_score = 0
-        word_count = 0
-        
-        # Improvment : Implement simple intensification logic
-        intensifier_multiplier = 1.0
-
-        for token in tokens:
-            # Clean up the token (remove punctuation, normalize)
-            token = token.strip()
-
-            # Skip stop words and short tokens
-            if not token or token in THAI_STOPWORDS or len(token) < 2:
-                # Reset multiplier if hit a stopword/filler 
-                intensifier_multiplier =1.0
-                continue
-
-            # 3. Lexicon Lookup and scoring
-            score = THAI_SENTIMENT_LEXICON.get(token, 0)
-
-            # Apply multiplier to the word's score
-            final_score = score * intensifier_multiplier
-
-            if score != 0:
-                total_score += final_score
-                word_count += 1
-        
-        # Reset multiplier after use (or if it was a negative modifier, the effect is already applied)
-        intensifier_multiplier = 1.0
-
-        # Calculate average polarity
-        polarity = total_score / word_count if word_count > 0 else 0
-        
-        # จำกัดช่วงคะแนน
-        polarity = max(-1.0, min(1.0, polarity))
-    
-        # กำหนด label
-        if polarity > 0.1:
-            label = 'positive'
-        elif polarity < -0.1:
-            label = 'negative'
-        else:
-            label = 'neutral'
-        
-        # 4. Append results to the current news item (list)
-        news.append(polarity)
-        news.append(label)
-    
-    return parsed_news
+    with tracing.span("analyze_sentiment", items=len(records), scorer=scorer.name if scorer else None):
+        return score_records(records, scorer=scorer)
+
+def news_frame(records):
+    """
+    DataFrame สำหรับแสดงผล / บันทึก CSV (คอลัมน์เดิม: date, time, title, sentiment, label, cluster_id)
+    """
+    published = [format_published(record.published_at) for record in records]
+    return pd.DataFrame({
+        'date': [d for d, _ in published],
+        'time': [t for _, t in published],
+        'title': [record.title for record in records],
+        'sentiment': [record.sentiment for record in records],
+        'label': [record.sentiment_label for record in records],
+        'cluster_id': [record.cluster_id for record in records],
+    })
+
+def average_sentiment(records):
+    """
+    ค่าเฉลี่ยถ่วงด้วย weight ของข่าว (คะแนนความเกี่ยวข้อง) นับแต่ละกลุ่มข่าวซ้ำครั้งเดียว
+    """
+    clusters = {}
+    for record in records:
+        clusters.setdefault(record.cluster_id, record)
+    total = sum(record.weight for record in clusters.values())
+    if not total:
+        return 0.0
+    return sum(record.sentiment * record.weight for record in clusters.values()) / total
+
+def prepare_records(news_table, ticker):
+    """
+    parse -> ตัดข่าวที่ไม่เกี่ยวข้อง -> จัดกลุ่มข่าวซ้ำ (ทุกขั้นตอนก่อนให้คะแนน)
+    คืน (records, representatives) representatives[i] คือ record ตัวแทนกลุ่มของ records[i]
+    """
+    records = parse_news(news_table, ticker)
+
+    # ทิ้งข่าวที่ไม่ได้พูดถึง ticker ก่อนขั้นตอนที่แพง (ข่าวที่เหลือลด weight ตามคะแนนความเกี่ยวข้อง)
+    with tracing.span("relevance_filter", items=len(records)) as span:
+        records, dropped = relevance.filter_records(records, ticker)
+        span.set_attribute("dropped", dropped)
+    if dropped:
+        print(f"Relevance filter: dropped {dropped} off-topic item(s) for '{ticker}'")
+
+    # ข่าวเดียวกันที่หลายสำนักลงซ้ำ -> ให้คะแนนเฉพาะตัวแทนกลุ่ม แล้วคัดลอกคะแนนให้ข่าวที่เหลือ
+    with tracing.span("cluster_headlines", items=len(records)):
+        cluster_ids, representatives = headline_dedup.cluster_headlines([record.title for record in records])
+    for record, cluster_id in zip(records, cluster_ids):
+        record.cluster_id = cluster_id
+    return records, [records[i] for i in representatives]
+
+def distinct_records(records):
+    """ตัด record ที่ซ้ำ (ตัว object เดียวกัน) ออกโดยคงลำดับเดิม"""
+    return list({id(record): record for record in records}.values())
+
+def copy_cluster_scores(records, representatives):
+    for record, rep in zip(records, representatives):
+        if record is not rep:
+            record.copy_score(rep)
+
+def build_payload(ticker, records, analysis_id):
+    """
+    Micro-payload ของหนึ่ง ticker จาก records ที่ให้คะแนนแล้ว
+    """
+    # Calculate average sentiment (นับแต่ละข่าวครั้งเดียว ไม่นับข่าวที่ลงซ้ำ ถ่วงด้วยความเกี่ยวข้อง)
+    avg_sentiment = average_sentiment(records)
+
+    sentiment_result = (
+        "Positve" if avg_sentiment > 0.1 else 
+        "Neutral" if avg_sentiment >= -0.1 else
+        "Negative"
+    )
+
+    return {
+        "analysis_id": analysis_id,
+        "analysis_date": datetime.now().isoformat(),
+        "keyword": ticker,
+        "total_articles": len(records),
+        "average_sentiment": float(f"{avg_sentiment:.4f}"),
+        "overall_label": sentiment_result,
+        "lexicon_version": ",".join(sorted({record.lexicon_version for record in records})),
+        # (news_articles ส่งแยกเฉพาะเมื่อ detail=True)
+    }
 
 def plot_sentiment(df, ticker, avg_sentiment):
     """
@@ -214,64 +209,80 @@ def plot_sentiment(df, ticker, avg_sentiment):
     plt.title('Proportion of Positive vs Negative Sentiments')
     plt.show()  # Show the third plot on a separate page
 
-def send_results_to_api(json_data, api_url):
+def send_results_to_api(json_data, api_url, articles=None, encoding="ndjson"):
     """
     Sends the generated JSON data (Micro-Payload) to a specified API endpoint.
+    If articles are given, they are shipped as per-headline detail in a compact
+    encoding ("ndjson" = gzip'd NDJSON, "msgpack") negotiated via Content-Type.
     """
-    headers = {'Content-Type': 'application/json'}
-    try:
-        response = requests.post(api_url, headers=headers, json=json_data, timeout=10)
-        response.raise_for_status() 
-        
-        return {
-            "status": "success", 
-            "message": f"Data sent successfully. Status code: {response.status_code}",
-            "response_data": response.json()
-        }
-    except requests.exceptions.RequestException as e:
-        return {
-            "status": "error", 
-            "message": "API request failed. Ensure the FastAPI server is running.",
-            "details": str(e)
-        }
-
-def main(ticker):
+    body, headers = payload_codec.encode_payload(json_data, articles, encoding)
+    with tracing.span("send_results_to_api", analysis_id=json_data.get("analysis_id"), bytes=len(body),
+                      articles=len(articles) if articles else 0) as span:
+        try:
+            response = requests.post(api_url, headers=tracing.inject_headers(dict(headers)), data=body, timeout=10)
+            span.set_attribute("http.status_code", response.status_code)
+            response.raise_for_status() 
+            
+            return {
+                "status": "success", 
+                "message": f"Data sent successfully. Status code: {response.status_code}",
+                "response_data": response.json()
+            }
+        except requests.exceptions.RequestException as e:
+            span.set_attribute("error", str(e))
+            return {
+                "status": "error", 
+                "message": "API request failed. Ensure the FastAPI server is running.",
+                "details": str(e)
+            }
+
+@tracing.traced("analyze_ticker")
+def main(ticker, news_table=None, detail=False, detail_encoding="ndjson", lang="th", analysis_id=None):
     """
     Main function to run the sentiment analysis
+    (news_table: ข่าวที่ดึงมาแล้ว เช่นจาก feed_poller ถ้าไม่ส่งมาจะดึงใหม่จาก Google News ภาษา lang)
+    (แต่ละหัวข่าวถูกให้คะแนนด้วย scorer ของภาษาตัวเอง ไม่ขึ้นกับ lang)
+    (detail: ส่งรายข่าวไปกับ payload ด้วย ในรูปแบบ detail_encoding)
+    (analysis_id: ใช้ผูก span ทั้งหมดของงานนี้ ไม่ส่งมาจะสร้างใหม่)
     """
-    news_table = get_google_news(ticker, lang="th")
+    analysis_id = analysis_id or str(uuid.uuid4()) # ใช้ uuid ที่ import มา
+    tracing.set_analysis_id(analysis_id)
+    tracing.set_attribute("keyword", ticker)
+
+    if news_table is None:
+        news_table = get_google_news(ticker, lang=lang)
 
     if not news_table:
         print(f"No news found for '{ticker}'. Skipping Analysis.")
         return None 
 
-    parsed_news = parse_news(news_table)
-    analyzed_news = analyze_sentiment(parsed_news)
+    records, representatives = prepare_records(news_table, ticker)
+    if not records:
+        print(f"No relevant news found for '{ticker}'. Skipping Analysis.")
+        return None
 
-    df = pd.DataFrame(analyzed_news, columns=['date', 'time', 'title', 'sentiment','label'])
+    scorer = scorers.get_scorer()
+    analyze_sentiment(distinct_records(representatives), scorer=scorer)
+    copy_cluster_scores(records, representatives)
 
-    # Calculate average sentiment
-    avg_sentiment = df['sentiment'].mean()
+    df = news_frame(records)
 
-    sentiment_result = (
-        "Positve" if avg_sentiment > 0.1 else 
-        "Neutral" if avg_sentiment >= -0.1 else
-        "Negative"
-    )
-
-    API_ENDPOINT = "http://127.0.0.1:8001/api/sentiment" 
+    # เก็บรายข่าวลง store สำหรับ query ย้อนหลัง
+    try:
+        with tracing.span("store.insert_records", rows=len(records)):
+            sentiment_store.insert_records(ticker, records, analysis_id=analysis_id)
+    except Exception as e:
+        print(f"\n Error saving to store: {e}")
 
-    json_payload = {
-        "analysis_id": str(uuid.uuid4()), # ใช้ uuid ที่ import มา
-        "analysis_date": datetime.now().isoformat(),
-        "keyword": ticker,
-        "total_articles": len(df),
-        "average_sentiment": float(f"{avg_sentiment:.4f}"),
-        "overall_label": sentiment_result,
-        # (ไม่มี news_articles)
-    }
+    json_payload = build_payload(ticker, records, analysis_id)
+    avg_sentiment = json_payload["average_sentiment"]
+    sentiment_result = json_payload["overall_label"]
+    # ค่าเฉลี่ยเดียวกับที่ส่งเข้า API (นับข่าวซ้ำครั้งเดียว + ถ่วงความเกี่ยวข้อง) ให้ผู้เรียกใช้ต่อ
+    df.attrs["average_sentiment"] = avg_sentiment
 
-    api_response = send_results_to_api(json_payload, API_ENDPOINT)
+    api_response = send_results_to_api(json_payload, API_ENDPOINT,
+                                       articles=[record.to_article() for record in records] if detail else None,
+                                       encoding=detail_encoding)
 
     # Display Results
     print(f"\n{'='*70}")
@@ -281,6 +292,11 @@ def main(ticker):
     print(df.to_string())
     print(f"\n Average sentiment: {avg_sentiment:.2f}")
     print(sentiment_result)
+    if isinstance(scorer.primary, scorers.CascadeScorer):
+        stats = scorer.stats()
+        print(f"Cascade: {stats['escalated']}/{stats['items']} escalated "
+              f"(lexicon {stats['tiers']['cheap']['ms_per_item']} ms/item, "
+              f"{stats['tiers']['heavy']['scorer']} {stats['tiers']['heavy']['ms_per_item']} ms/item)")
 
     # ADD: API Response Print
     print("\n--- API Submission Status ---")
@@ -292,26 +308,37 @@ def main(ticker):
     return df
 
 #if __name__ == "__main__":
-def call_function(ticker):
+@tracing.traced()
+def call_function(ticker, lang="th"):
     #ticker = input("Enter keywords: ")
     #main(ticker)
     search_keyword = ticker.strip()
-    final_df = main(search_keyword)
-
-    avg_sentiment = final_df['sentiment'].mean()
+    if not search_keyword:
+        print("Empty keyword. Skipping Analysis.")
+        return None
+    analysis_id = str(uuid.uuid4())
+    tracing.set_analysis_id(analysis_id)
+    final_df = main(search_keyword, lang=lang, analysis_id=analysis_id)
+
+    # ไม่มีข่าว / ดึงข่าวไม่สำเร็จ -> main คืน None
+    if final_df is None:
+        return None
+
+    # ใช้ค่าเฉลี่ยเดียวกับ payload ไม่ใช่ mean ของทุกแถว (แถวมีข่าวซ้ำและ weight ไม่เท่ากัน)
+    avg_sentiment = final_df.attrs["average_sentiment"]
     sentiment_result = (
         "Positive" if avg_sentiment > 0.1 else 
         "Neutral" if avg_sentiment >= -0.1 else
         "Negative"
     )
-    
-    if final_df is not None:
-        try:
-            file_name = f'{search_keyword.replace(" ", "_")}_thai_sentiment.csv'
+
+    try:
+        file_name = f'{search_keyword.replace(" ", "_")}_thai_sentiment.csv'
+        with tracing.span("write_csv", path=file_name, rows=len(final_df)):
             final_df.to_csv(file_name, index=False)
-            print(f"\n Saved detailed results to {file_name}")
-        except Exception as e :
-            print(f"\n Error saving file: {e}")
+        print(f"\n Saved detailed results to {file_name}")
+    except Exception as e :
+        print(f"\n Error saving file: {e}")
     
     return sentiment_result
 
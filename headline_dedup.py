@@ -0,0 +1,136 @@
+import re
+import hashlib
+import zlib
+import numpy as np
+
+# Google News ต่อท้ายหัวข่าวด้วยชื่อสำนักข่าว เช่น " - มิติหุ้น", " - ThaiPost"
+# บางสำนักมี tagline ของเว็บอีกชั้น (" - มิติหุ้น | ชี้ชัดทุกการลงทุน - มิติหุ้น")
+SOURCE_SEPARATOR = " - "
+MAX_SOURCE_LENGTH = 60
+MIN_TITLE_LENGTH = 10
+
+NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+NUMBER_PATTERN = re.compile(r"\d+")
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.7
+
+# seed ของแต่ละ hash function (คงที่ เพื่อให้ signature/cluster id เหมือนเดิมทุกครั้งที่รัน)
+_SEEDS = np.random.RandomState(1).randint(0, 1 << 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_EMPTY_SIGNATURE = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+def strip_source_suffix(title):
+    """
+    ตัดชื่อสำนักข่าวที่ต่อท้ายหัวข่าวออก (ไม่ตัดจนหัวข่าวเหลือสั้นเกินไป)
+    """
+    title = (title or "").strip()
+    head, separator, source = title.rpartition(SOURCE_SEPARATOR)
+    if not separator or len(head) < MIN_TITLE_LENGTH or len(source) > MAX_SOURCE_LENGTH:
+        return title
+
+    # ชื่อสำนักข่าวซ้ำในหัวข่าว = tagline ของเว็บ ตัดตั้งแต่ตรงนั้น
+    tagline = head.find(SOURCE_SEPARATOR + source.strip())
+    if tagline >= MIN_TITLE_LENGTH:
+        head = head[:tagline]
+    return head.rstrip()
+
+
+def normalize_title(title):
+    """ตัด suffix สำนักข่าว, ตัวพิมพ์เล็ก, ตัดช่องว่าง/เครื่องหมาย"""
+    return NON_WORD_PATTERN.sub("", strip_source_suffix(title).lower())
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """
+    Shingle แบบตัวอักษรติดกัน size ตัว (ภาษาไทยไม่มีช่องว่างระหว่างคำ
+    ใช้ตัวอักษรแทน token เพื่อไม่ต้อง tokenize ก่อนรู้ว่าข่าวซ้ำ)
+    """
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _mix64(x):
+    """splitmix64 finalizer (คูณแบบ wrap-around ของ uint64 ตั้งใจให้ล้น)"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def minhash_signature(shingle_set):
+    """MinHash signature ขนาด NUM_PERM ของชุด shingle"""
+    if not shingle_set:
+        return _EMPTY_SIGNATURE
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set),
+                         dtype=np.uint64, count=len(shingle_set))
+    with np.errstate(over="ignore"):
+        permuted = _mix64(hashes[None, :] ^ _SEEDS[:, None])
+    return permuted.min(axis=1)
+
+
+def numbers_compatible(a, b):
+    """
+    ข่าวแบบ template เดียวกันแต่คนละวัน/ไตรมาส ("ค่าเงินบาทวันที่ 26" กับ "28") ไม่ใช่ข่าวเดียวกัน
+    ถือว่าเข้ากันได้เมื่อตัวเลขของฝั่งหนึ่งอยู่ในอีกฝั่งทั้งหมด
+    """
+    numbers_a = set(NUMBER_PATTERN.findall(a))
+    numbers_b = set(NUMBER_PATTERN.findall(b))
+    return numbers_a <= numbers_b or numbers_b <= numbers_a
+
+
+def cluster_id_for(text):
+    return "c_" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def cluster_headlines(titles, threshold=SIMILARITY_THRESHOLD):
+    """
+    จัดกลุ่มหัวข่าวที่เกือบซ้ำกัน (MinHash + LSH) ใช้เวลาเชิงเส้นตามจำนวนหัวข่าว
+    คืน (cluster_ids, representatives)
+      cluster_ids[i]      = id ของกลุ่มของหัวข่าว i
+      representatives[i]  = index ของหัวข่าวตัวแทนกลุ่ม (ตัวแรกที่พบ)
+    """
+    stripped = [strip_source_suffix(title) for title in titles]
+    normalized = [NON_WORD_PATTERN.sub("", title.lower()) for title in stripped]
+    signatures = [minhash_signature(shingles(text)) for text in normalized]
+
+    parent = list(range(len(titles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            # ให้ index ที่น้อยกว่าเป็นตัวแทน (ข่าวที่มาก่อนใน feed)
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    buckets = {}
+    for i, signature in enumerate(signatures):
+        for band in range(BANDS):
+            key = (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+            j = buckets.setdefault(key, i)
+            if j != i and find(i) != find(j):
+                # candidate จาก LSH -> ยืนยันด้วย Jaccard โดยประมาณจาก signature
+                if normalized[i] == normalized[j] or (
+                    np.mean(signatures[i] == signatures[j]) >= threshold
+                    and numbers_compatible(stripped[i], stripped[j])
+                ):
+                    union(i, j)
+
+    representatives = [find(i) for i in range(len(titles))]
+    # id มาจากหัวข่าว (normalize แล้ว) ที่น้อยที่สุดในกลุ่ม ไม่ใช่ตัวแทน
+    # เพื่อให้ลำดับใน feed เปลี่ยนแต่ id ของข่าวเดิมไม่เปลี่ยน (store ใช้ id นี้นับข่าวซ้ำข้ามรอบ)
+    keys = {}
+    for i, rep in enumerate(representatives):
+        if rep not in keys or normalized[i] < keys[rep]:
+            keys[rep] = normalized[i]
+    cluster_ids = [cluster_id_for(keys[rep]) for rep in representatives]
+    return cluster_ids, representatives
@@ -0,0 +1,233 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+# (connect, read) วินาที: read timeout นับต่อ chunk ไม่ใช่ทั้ง response
+DEFAULT_TIMEOUT = (5, 15)
+# status ที่ลองใหม่ได้ (429/503 = server ขอให้ชะลอ ดู Retry-After)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+THROTTLE_STATUS = (429, 503)
+# method ที่ส่งซ้ำได้โดยไม่เกิดผลซ้ำ (POST ไม่ลองใหม่)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# ข้อผิดพลาดระหว่างเชื่อมต่อหรืออ่าน body ที่ลองใหม่ได้
+RETRY_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+               requests.exceptions.ChunkedEncodingError)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """host นี้ล้มเหลวติดกันหรือสั่งให้รอ (429/503) จึงไม่ยิงจนกว่าจะครบเวลา"""
+
+
+def parse_retry_after(value):
+    """Retry-After เป็นวินาทีหรือวันที่ HTTP คืนจำนวนวินาที (None ถ้าไม่มี/อ่านไม่ได้)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker ต่อ host:
+    - closed: ยิงได้ปกติ นับความล้มเหลวติดกัน ครบ failure_threshold -> open
+    - open: ไม่ยิงเลย (fail fast) จนครบ reset_timeout หรือ Retry-After ที่ server ส่งมา
+    - half-open: ครบเวลาแล้วปล่อยให้ลองทีละคำขอ สำเร็จ -> closed ล้มเหลว -> open ใหม่
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.open_until > time.monotonic():
+                return 'open'
+            return 'half-open' if self.failures >= self.failure_threshold else 'closed'
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.open_until > now:
+                return False
+            if self.failures >= self.failure_threshold:
+                # half-open: ให้ผ่านแค่คำขอเดียวระหว่างทดสอบ
+                if self.probing:
+                    return False
+                self.probing = True
+            return True
+
+    def retry_in(self):
+        with self.lock:
+            return max(0.0, self.open_until - time.monotonic())
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+
+    def release(self):
+        """คืนสิทธิ์ทดสอบ (half-open) โดยไม่นับเป็นผลสำเร็จหรือล้มเหลว"""
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self, retry_after=None):
+        with self.lock:
+            now = time.monotonic()
+            self.failures += 1
+            self.probing = False
+            if retry_after:
+                # server บอกให้รอ: ทั้ง host หยุดตามนั้นโดยไม่ต้องรอครบ threshold
+                self.open_until = max(self.open_until, now + retry_after)
+                self.opened += 1
+            elif self.failures >= self.failure_threshold:
+                self.open_until = max(self.open_until, now + self.reset_timeout)
+                self.opened += 1
+
+    def stats(self):
+        return {'state': self.state, 'failures': self.failures, 'opened': self.opened,
+                'retry_in': round(self.retry_in(), 1)}
+
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+def get_breaker(host, failure_threshold=5, reset_timeout=60):
+    """Breaker ของ host ที่ใช้ร่วมกันทั้ง process (ทุก session ที่ยิง host เดียวกันเห็นสถานะเดียวกัน)"""
+    with _BREAKERS_LOCK:
+        if host not in _BREAKERS:
+            _BREAKERS[host] = CircuitBreaker(failure_threshold, reset_timeout)
+        return _BREAKERS[host]
+
+def breaker_stats():
+    with _BREAKERS_LOCK:
+        breakers = dict(_BREAKERS)
+    return {host: breaker.stats() for host, breaker in breakers.items()}
+
+
+def _consume(response, consume):
+    if consume is None:
+        return response
+    with response:
+        return consume(response)
+
+
+class ResilientSession:
+    """
+    requests.Session (หนึ่งตัวต่อ thread) + timeout เริ่มต้น + retry แบบ exponential backoff
+    มี full jitter (สุ่ม 0..backoff * 2^attempt) ไม่ให้ worker ทุกตัวลองใหม่พร้อมกัน
+    - 429/503: เคารพ Retry-After และเปิด breaker ของ host ทันที ถ้าต้องรอนานกว่า max_backoff เลิกเลย
+    - host ที่ breaker เปิดอยู่จะได้ CircuitOpenError ทันทีโดยไม่ยิง
+    - stream=True: ส่ง consume มาอ่าน body ด้วย ไม่งั้นนับผลสำเร็จตั้งแต่ได้ header
+    """
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=3, backoff=0.5, max_backoff=30,
+                 failure_threshold=5, reset_timeout=60, headers=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.headers = dict(headers or {})
+        self.local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.headers.update(self.headers)
+        return session
+
+    def backoff_delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method, url, consume=None, **kwargs):
+        """
+        consume(response): อ่าน body ภายใน retry loop (ใช้คู่กับ stream=True)
+        ถ้าการอ่าน body ขาดกลางทาง (read timeout, ChunkedEncodingError) นับเป็นความล้มเหลวของ host
+        และลองใหม่ทั้งคำขอ คืนค่าที่ consume คืน (ไม่ส่ง consume = คืน response ตามเดิม)
+        """
+        host = urlsplit(url).netloc
+        breaker = get_breaker(host, self.failure_threshold, self.reset_timeout)
+        retries = self.retries if method.upper() in IDEMPOTENT_METHODS else 0
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {host}, retry in {breaker.retry_in():.0f}s")
+            last = attempt == retries
+            try:
+                response = self.session.request(method, url, **kwargs)
+                throttled = response.status_code in RETRY_STATUS
+                if not throttled:
+                    result = _consume(response, consume)
+            except RETRY_ERRORS:
+                # ต่อไม่ได้ / หมดเวลา / body ขาดกลางทาง: ลองใหม่ได้
+                breaker.record_failure()
+                if last:
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+                continue
+            except requests.exceptions.HTTPError:
+                # raise_for_status ใน consume (เช่น 404) = host ตอบปกติ
+                breaker.record_success()
+                raise
+            except requests.exceptions.RequestException:
+                # ข้อผิดพลาดอื่นของ requests (redirect วน, header/encoding เสีย ฯลฯ) ลองใหม่ไม่ช่วย
+                breaker.record_failure()
+                raise
+            except Exception:
+                # ข้อผิดพลาดของ consume เอง (เช่น parse ไม่ได้) ไม่ใช่ความผิดของการเชื่อมต่อ
+                breaker.record_success()
+                raise
+            except BaseException:
+                # เช่น KeyboardInterrupt: ไม่ใช่ความผิดของ host แต่ต้องคืนสิทธิ์ทดสอบ ไม่งั้น half-open ค้าง
+                breaker.release()
+                raise
+
+            if not throttled:
+                breaker.record_success()
+                return result
+
+            retry_after = None
+            if response.status_code in THROTTLE_STATUS:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            breaker.record_failure(retry_after)
+            # ผู้เรียกจัดการ status เองด้วย raise_for_status
+            if last or (retry_after or 0) > self.max_backoff:
+                return _consume(response, consume)
+            response.close()
+            time.sleep(max(retry_after or 0, self.backoff_delay(attempt)))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+def get_session():
+    """ResilientSession ที่ใช้ร่วมกันทั้ง process"""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = ResilientSession(headers={'User-Agent': 'Mozilla/5.0'})
+        return _SESSION
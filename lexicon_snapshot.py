@@ -0,0 +1,285 @@
+import os
+import mmap
+import struct
+import hashlib
+from bisect import bisect_left
+
+# รูปแบบไฟล์ snapshot (little-endian):
+#   header   : magic "THLX", format, จำนวนคำ, ความยาว version
+#   version  : utf-8 (เติมให้ครบ 8 byte)
+#   offsets  : uint32 x (จำนวนคำ + 1)  ตำแหน่งของแต่ละคำใน blob
+#   weights  : float64 x จำนวนคำ
+#   blob     : คำทั้งหมดเรียงตาม utf-8 bytes ต่อกัน
+# ทุก process ที่ mmap ไฟล์เดียวกันใช้ page cache ชุดเดียวกัน ไม่ต้องมีสำเนาของตัวเอง
+MAGIC = b"THLX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHxxII")
+SNAPSHOT_SUFFIX = ".lexbin"
+
+def _pad8(n):
+    return (n + 7) & ~7
+
+
+def read_lexicon_file(path):
+    """
+    อ่านไฟล์ lexicon แบบ TSV (คำ<TAB>น้ำหนัก) บรรทัด '#' เป็น comment
+    บรรทัด '@version<TAB>...' กำหนด version คืน (version, {คำ: น้ำหนัก}, content hash)
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    version = "0"
+    entries = {}
+    for line_no, line in enumerate(raw.decode("utf-8-sig").splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split("\t")
+        if parts[0] == "@version":
+            version = parts[1].strip()
+            continue
+        if len(parts) != 2:
+            raise ValueError(f"{path}:{line_no}: expected 'word<TAB>weight', got {line!r}")
+        word, weight = parts[0].strip(), parts[1].strip()
+        try:
+            entries[word] = float(weight)
+        except ValueError:
+            raise ValueError(f"{path}:{line_no}: invalid weight {weight!r}")
+
+    return version, entries, hashlib.sha1(raw).hexdigest()
+
+
+def write_snapshot(entries, version, path):
+    """
+    Compile {คำ: น้ำหนัก} เป็นไฟล์ snapshot (เขียนไฟล์ชั่วคราวแล้ว os.replace จึงไม่มีใครเห็นไฟล์ครึ่งๆ)
+    """
+    words = sorted(entries, key=lambda w: w.encode("utf-8"))
+    encoded = [w.encode("utf-8") for w in words]
+    version_bytes = version.encode("utf-8")
+
+    offsets = [0]
+    for word in encoded:
+        offsets.append(offsets[-1] + len(word))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(words), len(version_bytes)))
+        f.write(version_bytes.ljust(_pad8(len(version_bytes)), b"\0"))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        if len(offsets) % 2:
+            f.write(b"\0" * 4)  # ให้ weights เริ่มที่ขอบ 8 byte
+        f.write(struct.pack(f"<{len(words)}d", *(entries[w] for w in words)))
+        f.write(b"".join(encoded))
+    os.replace(tmp_path, path)
+    return path
+
+
+class LexiconSnapshot:
+    """
+    อ่าน snapshot ผ่าน mmap แบบ read-only ใช้งานเหมือน dict (get / in / items)
+    ค้นคำด้วย binary search บน mmap ไม่ต้องโหลดทั้งไฟล์เป็น dict
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, count, version_len = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a lexicon snapshot (format {FORMAT_VERSION})")
+
+        pos = HEADER.size
+        self.version = bytes(self.mm[pos:pos + version_len]).decode("utf-8")
+        pos += _pad8(version_len)
+
+        self.count = count
+        self.offsets = memoryview(self.mm)[pos:pos + 4 * (count + 1)].cast("I")
+        pos += _pad8(4 * (count + 1))
+        self.weights = memoryview(self.mm)[pos:pos + 8 * count].cast("d")
+        self.blob_start = pos + 8 * count
+
+    def _word_bytes(self, i):
+        return self.mm[self.blob_start + self.offsets[i]:self.blob_start + self.offsets[i + 1]]
+
+    def _find(self, word):
+        key = word.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._word_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._word_bytes(lo) == key:
+            return lo
+        return -1
+
+    def get(self, word, default=None):
+        i = self._find(word)
+        return self.weights[i] if i >= 0 else default
+
+    def __contains__(self, word):
+        return self._find(word) >= 0
+
+    def __getitem__(self, word):
+        i = self._find(word)
+        if i < 0:
+            raise KeyError(word)
+        return self.weights[i]
+
+    def __len__(self):
+        return self.count
+
+    def keys(self):
+        return (self._word_bytes(i).decode("utf-8") for i in range(self.count))
+
+    def items(self):
+        return ((self._word_bytes(i).decode("utf-8"), self.weights[i]) for i in range(self.count))
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+def snapshot_path(source_path, version, content_hash, compiled_dir):
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(compiled_dir, f"{name}.{version}.{content_hash[:8]}{SNAPSHOT_SUFFIX}")
+
+
+def load_or_compile(source_path, compiled_dir):
+    """
+    โหลด snapshot ของไฟล์ lexicon (compile ใหม่ถ้ายังไม่มี snapshot ของเนื้อหานี้)
+    version ที่บันทึกใน snapshot = "<version ในไฟล์>+<hash 8 ตัว>" เพื่อให้แก้น้ำหนักโดยลืมเปลี่ยน
+    version ก็ยังแยกผลลัพธ์ออกจากกันได้
+    """
+    version, entries, content_hash = read_lexicon_file(source_path)
+    path = snapshot_path(source_path, version, content_hash, compiled_dir)
+    if not os.path.exists(path):
+        os.makedirs(compiled_dir, exist_ok=True)
+        write_snapshot(entries, f"{version}+{content_hash[:8]}", path)
+    return LexiconSnapshot(path)
+
+
+# รูปแบบไฟล์ word trie (little-endian) สำหรับเป็น custom_dict ของ newmm:
+#   header     : magic "THTR", format, จำนวน node, จำนวน edge, จำนวนคำ
+#   first      : uint32 x (node + 1)  edge ของ node k อยู่ในช่วง [first[k], first[k+1])
+#   edge_char  : uint32 x edge  (code point ของตัวอักษร เรียงจากน้อยไปมากภายใน node)
+#   edge_child : uint32 x edge
+#   end        : uint8 x node  (1 = มีคำจบที่ node นี้)
+TRIE_MAGIC = b"THTR"
+TRIE_HEADER = struct.Struct("<4sHxxIII")
+TRIE_SUFFIX = ".trie"
+
+
+def write_word_trie(words, path):
+    """Compile ชุดคำเป็นไฟล์ word trie (node เรียงแบบ BFS)"""
+    root = {}
+    word_count = 0
+    for word in set(w.strip() for w in words):
+        if not word:
+            continue
+        node = root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[None] = True
+        word_count += 1
+
+    nodes = [root]
+    first = [0]
+    edge_char, edge_child, end = [], [], []
+    for node in nodes:  # nodes โตขึ้นระหว่างวน = BFS
+        end.append(1 if None in node else 0)
+        for ch in sorted(ch for ch in node if ch is not None):
+            edge_char.append(ord(ch))
+            edge_child.append(len(nodes))
+            nodes.append(node[ch])
+        first.append(len(edge_char))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(TRIE_HEADER.pack(TRIE_MAGIC, FORMAT_VERSION, len(nodes), len(edge_char), word_count))
+        f.write(struct.pack(f"<{len(first)}I", *first))
+        f.write(struct.pack(f"<{len(edge_char)}I", *edge_char))
+        f.write(struct.pack(f"<{len(edge_child)}I", *edge_child))
+        f.write(bytes(end))
+    os.replace(tmp_path, path)
+    return path
+
+
+class WordTrieSnapshot:
+    """
+    Word trie บน mmap ที่ใช้แทน pythainlp.util.Trie ได้ (prefixes / in / len / iter)
+    ทุก worker ที่เปิดไฟล์เดียวกันใช้หน้า memory ร่วมกัน ไม่ต้องสร้าง Trie.Node หลายหมื่นตัวต่อ process
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, node_count, edge_count, word_count = TRIE_HEADER.unpack_from(self.mm, 0)
+        if magic != TRIE_MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a word trie snapshot (format {FORMAT_VERSION})")
+
+        view = memoryview(self.mm)
+        pos = TRIE_HEADER.size
+        self.first = view[pos:pos + 4 * (node_count + 1)].cast("I")
+        pos += 4 * (node_count + 1)
+        self.edge_char = view[pos:pos + 4 * edge_count].cast("I")
+        pos += 4 * edge_count
+        self.edge_child = view[pos:pos + 4 * edge_count].cast("I")
+        pos += 4 * edge_count
+        self.end = view[pos:pos + node_count]
+        self.word_count = word_count
+
+    def _child(self, node, ch):
+        lo, hi = self.first[node], self.first[node + 1]
+        if lo == hi:
+            return -1
+        code = ord(ch)
+        i = bisect_left(self.edge_char, code, lo, hi)
+        if i == hi or self.edge_char[i] != code:
+            return -1
+        return self.edge_child[i]
+
+    def prefixes(self, text, start=0):
+        """คำใน trie ทั้งหมดที่เริ่มที่ text[start] (เหมือน pythainlp.util.Trie.prefixes)"""
+        res = []
+        node = 0
+        for i in range(start, len(text)):
+            node = self._child(node, text[i])
+            if node < 0:
+                break
+            if self.end[node]:
+                res.append(text[start:i + 1])
+        return res
+
+    def __contains__(self, word):
+        node = 0
+        for ch in word:
+            node = self._child(node, ch)
+            if node < 0:
+                return False
+        return bool(self.end[node])
+
+    def __len__(self):
+        return self.word_count
+
+    def __iter__(self):
+        stack = [(0, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if self.end[node]:
+                yield prefix
+            for i in range(self.first[node + 1] - 1, self.first[node] - 1, -1):
+                stack.append((self.edge_child[i], prefix + chr(self.edge_char[i])))
+
+
+def load_or_compile_words(name, words_fn, compiled_dir):
+    """
+    โหลด word trie ชื่อ name (compile จาก words_fn() ถ้ายังไม่มี)
+    name ควรผูกกับที่มาของคำ (เช่น version ของ pythainlp) เพื่อให้ compile ใหม่เมื่อคำเปลี่ยน
+    """
+    path = os.path.join(compiled_dir, name + TRIE_SUFFIX)
+    if not os.path.exists(path):
+        os.makedirs(compiled_dir, exist_ok=True)
+        write_word_trie(words_fn(), path)
+    return WordTrieSnapshot(path)
@@ -2,6 +2,8 @@ from fastapi import FastAPI
 import json
 import requests
 import os
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
  
 app = FastAPI()
  
@@ -15,6 +17,138 @@ HEADERS = {
  
 # 🔹 Path ของไฟล์ JSON ที่ต้องการส่ง
 JSON_FILE_PATH = r"C:\Users\artit\IKP_2025\Web_Scraping\crawl_output.json"
+
+# 🔹 ไฟล์เก็บ content_hash ของเอกสารที่ส่งเข้า index แล้ว (id -> content_hash)
+INDEX_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "meili_index_state.json")
+
+# query parameter ที่เป็น tracking ไม่มีผลกับเนื้อหา ตัดทิ้งก่อนทำ id
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def canonical_url(url):
+    """
+    แปลง URL ให้อยู่ในรูปแบบมาตรฐาน เพื่อให้ URL เดียวกันได้ id เดียวกันทุกครั้ง
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def make_document_id(url, prefix="scp_"):
+    """
+    สร้าง document id แบบ deterministic จาก canonical URL (Meilisearch รับได้แค่ a-z A-Z 0-9 - _)
+    """
+    digest = hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+    return prefix + digest
+
+
+def content_hash(content):
+    """
+    Hash ของเนื้อหา ใช้ตรวจว่าเอกสารเปลี่ยนไปจากรอบก่อนหรือไม่
+    """
+    normalized = " ".join((content or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def load_index_state(path=INDEX_STATE_PATH):
+    """
+    อ่าน state ของเอกสารที่เคยส่งเข้า index (id -> content_hash)
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index_state(state, path=INDEX_STATE_PATH):
+    """
+    บันทึก state แบบ atomic (เขียนไฟล์ชั่วคราวแล้ว replace)
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def prepare_document(data):
+    """
+    เติม id และ content_hash ให้เอกสาร (รองรับไฟล์เก่าที่ใช้ key 'markdown' แทน 'content')
+    """
+    doc = dict(data)
+    content = doc.get("content", doc.get("markdown", ""))
+    if doc.get("url"):
+        doc["id"] = make_document_id(doc["url"])
+    doc["content_hash"] = content_hash(content)
+    return doc
+
+
+def select_changed_documents(documents, state):
+    """
+    คืนเฉพาะเอกสารที่ยังไม่เคยส่ง หรือเนื้อหาเปลี่ยนไปจากรอบก่อน
+    """
+    changed = []
+    for doc in documents:
+        if state.get(doc["id"]) != doc["content_hash"]:
+            changed.append(doc)
+    return changed
+
+
+def send_changed_documents(documents, state_path=INDEX_STATE_PATH):
+    """
+    ส่งเข้า Meilisearch เฉพาะเอกสารที่เปลี่ยน แล้วอัปเดต state เมื่อส่งสำเร็จ
+    """
+    state = load_index_state(state_path)
+    prepared = [prepare_document(doc) for doc in documents]
+    changed = select_changed_documents(prepared, state)
+
+    if not changed:
+        return {
+            "status": "success",
+            "message": "ไม่มีเอกสารที่เปลี่ยนแปลง",
+            "sent": 0,
+            "skipped": len(prepared),
+        }
+
+    try:
+        response = requests.post(MEILI_URL, headers=HEADERS, json=changed, timeout=30)
+        if response.status_code == 202:
+            for doc in changed:
+                state[doc["id"]] = doc["content_hash"]
+            save_index_state(state, state_path)
+            status = "success"
+            message = f"ส่ง {len(changed)} เอกสารสำเร็จ!"
+        else:
+            status = "error"
+            message = f"ส่งไม่สำเร็จ ({response.status_code})"
+    except Exception as e:
+        status = "error"
+        message = str(e)
+
+    return {
+        "status": status,
+        "message": message,
+        "sent": len(changed) if status == "success" else 0,
+        "skipped": len(prepared) - len(changed),
+    }
  
  
 def read_and_send_json():
@@ -33,21 +167,15 @@ def read_and_send_json():
     else:
         data_list = data
  
-    # ส่งเข้า Meilisearch
-    try:
-        response = requests.post(MEILI_URL, headers=HEADERS, json=data_list)
-        if response.status_code == 202:
-            status = "success"
-            message = f"ส่งไฟล์ {os.path.basename(JSON_FILE_PATH)} สำเร็จ!"
-        else:
-            status = "error"
-            message = f"ส่งไม่สำเร็จ ({response.status_code})"
-    except Exception as e:
-        status = "error"
-        message = str(e)
+    # ส่งเข้า Meilisearch (เฉพาะเอกสารที่เปลี่ยน)
+    result = send_changed_documents(data_list)
+    if result["status"] == "success":
+        message = f"ส่งไฟล์ {os.path.basename(JSON_FILE_PATH)} สำเร็จ! ({result['sent']} ส่ง, {result['skipped']} ไม่เปลี่ยน)"
+    else:
+        message = result["message"]
  
     return {
-        "status": status,
+        "status": result["status"],
         "message": message,
         "json_content": data  # 🔹 แสดงเนื้อไฟล์ JSON
     }
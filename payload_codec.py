@@ -0,0 +1,84 @@
+import gzip
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+JSON_CONTENT_TYPE = "application/json"
+
+# ลำดับ field ของรายข่าว ส่งเป็น array แทน object เพื่อไม่ต้องส่งชื่อ key ซ้ำทุกแถว
+ARTICLE_FIELDS = ("title", "published_at", "link", "sentiment", "label", "cluster_id")
+
+def compact_article(article):
+    return [article.get(field) for field in ARTICLE_FIELDS]
+
+
+def expand_article(values):
+    return dict(zip(ARTICLE_FIELDS, values))
+
+
+def encode_payload(aggregate, articles=None, encoding="ndjson"):
+    """
+    เข้ารหัส Micro-Payload พร้อมรายข่าว คืน (body bytes, headers)
+    - "ndjson": gzip ของ NDJSON บรรทัดแรกเป็นผลรวม บรรทัดต่อไปเป็นข่าวละบรรทัด
+    - "msgpack": msgpack ของผลรวม + news_articles (ต้องติดตั้ง msgpack ถ้าไม่มีจะใช้ ndjson)
+    - "json": JSON ธรรมดา (ไม่มีรายข่าว)
+    """
+    if articles is None or encoding == "json":
+        body = json.dumps(aggregate, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return body, {"Content-Type": JSON_CONTENT_TYPE}
+
+    rows = [compact_article(article) for article in articles]
+
+    if encoding == "msgpack" and msgpack is not None:
+        body = msgpack.packb(dict(aggregate, article_fields=list(ARTICLE_FIELDS), news_articles=rows))
+        return body, {"Content-Type": MSGPACK_CONTENT_TYPE}
+
+    lines = [json.dumps(dict(aggregate, article_fields=list(ARTICLE_FIELDS)), ensure_ascii=False, separators=(",", ":"))]
+    lines.extend(json.dumps(row, ensure_ascii=False, separators=(",", ":")) for row in rows)
+    body = gzip.compress("\n".join(lines).encode("utf-8"))
+    return body, {"Content-Type": NDJSON_CONTENT_TYPE, "Content-Encoding": "gzip"}
+
+
+def decode_payload(body, content_type=None, content_encoding=None):
+    """
+    ถอดรหัส body ตาม Content-Type / Content-Encoding คืน (ผลรวม dict, list ของรายข่าว dict)
+    ขึ้น ValueError ถ้า content type ไม่รองรับหรือข้อมูลเสีย
+    """
+    media_type = (content_type or JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+
+    if (content_encoding or "").strip().lower() == "gzip":
+        try:
+            body = gzip.decompress(body)
+        except OSError as e:
+            raise ValueError(f"Invalid gzip body: {e}")
+
+    if media_type == JSON_CONTENT_TYPE:
+        aggregate = json.loads(body)
+        articles = aggregate.pop("news_articles", None) or []
+        return aggregate, [a if isinstance(a, dict) else expand_article(a) for a in articles]
+
+    if media_type == NDJSON_CONTENT_TYPE:
+        lines = [line for line in body.decode("utf-8").splitlines() if line.strip()]
+        if not lines:
+            raise ValueError("Empty NDJSON body")
+        aggregate = json.loads(lines[0])
+        fields = aggregate.pop("article_fields", ARTICLE_FIELDS)
+        return aggregate, [dict(zip(fields, json.loads(line))) for line in lines[1:]]
+
+    if media_type == MSGPACK_CONTENT_TYPE:
+        if msgpack is None:
+            raise ValueError("msgpack is not installed on the server")
+        try:
+            aggregate = msgpack.unpackb(body)
+        except Exception as e:
+            raise ValueError(f"Invalid msgpack body: {e}")
+        fields = aggregate.pop("article_fields", ARTICLE_FIELDS)
+        rows = aggregate.pop("news_articles", None) or []
+        return aggregate, [dict(zip(fields, row)) for row in rows]
+
+    raise ValueError(f"Unsupported Content-Type: {media_type}")
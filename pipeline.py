@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import google_sentiment
+import scorers
+import sentiment_store
+import thai_lexicon
+import tracing
+import english_lexicon
+from sources import apply_scores
+
+# สัญญาณปิดคิว (ส่งหนึ่งตัวต่อ consumer หนึ่งตัว)
+_DONE = None
+
+
+def _init_worker(scorer_name):
+    # โหลด lexicon / พจนานุกรมตัดคำตอนเริ่ม process (THAI_SHARED_TABLES=1 = ใช้ตาราง mmap ร่วมกับ process อื่น)
+    scorers.get_scorer(scorer_name)
+
+
+def _score_texts(texts, scorer_name=None):
+    """รันใน process pool: ตัดคำ + ให้คะแนน (เช็คไฟล์ lexicon ก่อนทุกก้อนเหมือน sweeper)"""
+    thai_lexicon.lexicon_manager.maybe_reload()
+    english_lexicon.lexicon_manager.maybe_reload()
+    return scorers.get_scorer(scorer_name).score_batch(texts)
+
+
+class SweepPipeline:
+    """
+    วิเคราะห์หลาย ticker แบบเป็นขั้น ให้แต่ละขั้นทำงานซ้อนกันข้าม ticker:
+
+        fetch (async, fetch_workers งาน) -> [prepared] -> score (process pool) -> [scored] -> sink (เป็นก้อน)
+
+    - fetch: ดึง RSS + parse + ตัดข่าวไม่เกี่ยวข้อง + จัดกลุ่มข่าวซ้ำ (ใน thread)
+    - score: รวมหัวข่าวของหลาย ticker เป็นก้อนละไม่เกิน score_batch ข้อความ แล้วตัดคำ/ให้คะแนนใน process pool
+      (processes=0 = ให้คะแนนใน process นี้ เช่นตอนใช้ ONNX scorer ที่มี batcher ของตัวเองอยู่แล้ว)
+    - sink: บันทึก store ครั้งเดียวต่อก้อน (sink_batch ticker) แล้วส่ง payload เข้า API
+    ทุกคิวมีขนาดจำกัด (queue_size): sink ช้า -> คิวเต็ม -> score และ fetch หยุดรอ (backpressure)
+    แทนการเก็บผลค้างไว้ใน memory ไม่จำกัด
+    """
+    def __init__(self, lang="th", fetch_workers=8, processes=None, score_batch=256, sink_batch=50,
+                 queue_size=16, scorer_name=None, store=True, post=True, fetch_fn=None):
+        self.lang = lang
+        self.fetch_workers = fetch_workers
+        self.processes = os.cpu_count() if processes is None else processes
+        self.score_batch = score_batch
+        self.sink_batch = sink_batch
+        self.queue_size = queue_size
+        self.scorer_name = scorer_name
+        self.store = store
+        self.post = post
+        self.fetch_fn = fetch_fn or google_sentiment.get_google_news
+        self.results = {}
+        self.stats = {"tickers": 0, "skipped": 0, "failed": 0, "items": 0, "scored": 0,
+                      "score_batches": 0, "sink_batches": 0, "seconds": 0.0}
+
+    def prepare(self, ticker, analysis_id):
+        with tracing.span("pipeline.fetch", keyword=ticker):
+            tracing.set_analysis_id(analysis_id)
+            news_table = self.fetch_fn(ticker, lang=self.lang)
+            if not news_table:
+                return [], []
+            return google_sentiment.prepare_records(news_table, ticker)
+
+    async def fetch_stage(self, pending, prepared):
+        while True:
+            try:
+                ticker = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            analysis_id = str(uuid.uuid4())
+            try:
+                records, representatives = await asyncio.to_thread(self.prepare, ticker, analysis_id)
+            except Exception as e:
+                print(f"❌ Fetch failed for '{ticker}': {e}")
+                self.stats["failed"] += 1
+                continue
+            if not records:
+                self.stats["skipped"] += 1
+                continue
+            self.stats["items"] += len(records)
+            await prepared.put((ticker, analysis_id, records, representatives))
+
+    async def score_stage(self, prepared, scored, pool):
+        loop = asyncio.get_running_loop()
+        scorer = None if pool else scorers.get_scorer(self.scorer_name)
+        done = False
+        while not done:
+            item = await prepared.get()
+            if item is _DONE:
+                return
+            batch = [item]
+            size = len(item[3])
+            # รวมงานที่รออยู่แล้วเข้าก้อนเดียว (ไม่รอเพิ่ม) ลดจำนวนรอบส่งข้อมูลข้าม process
+            while size < self.score_batch:
+                try:
+                    item = prepared.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+                size += len(item[3])
+
+            groups = [google_sentiment.distinct_records(representatives) for _, _, _, representatives in batch]
+            texts = [record.text for group in groups for record in group]
+            try:
+                # หนึ่งก้อนมีหลาย ticker: ผูกด้วย list ของ analysis_id
+                with tracing.span("pipeline.score", texts=len(texts), tickers=len(batch),
+                                  analysis_ids=[analysis_id for _, analysis_id, _, _ in batch]):
+                    if pool:
+                        results = await loop.run_in_executor(pool, _score_texts, texts, self.scorer_name)
+                    else:
+                        results = await asyncio.to_thread(scorer.score_batch, texts)
+            except Exception as e:
+                print(f"❌ Scoring failed for {len(batch)} ticker(s): {e}")
+                self.stats["failed"] += len(batch)
+                continue
+            self.stats["scored"] += len(texts)
+            self.stats["score_batches"] += 1
+
+            offset = 0
+            for (ticker, analysis_id, records, representatives), group in zip(batch, groups):
+                apply_scores(group, results[offset:offset + len(group)])
+                offset += len(group)
+                google_sentiment.copy_cluster_scores(records, representatives)
+                await scored.put((ticker, analysis_id, records))
+
+    async def sink_stage(self, scored):
+        done = False
+        while not done:
+            item = await scored.get()
+            if item is _DONE:
+                return
+            batch = [item]
+            while len(batch) < self.sink_batch:
+                try:
+                    item = scored.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            # ระหว่างนี้ไม่มีใครดึงจาก scored -> คิวเต็มแล้วขั้นก่อนหน้าจะรอเอง
+            await asyncio.to_thread(self.flush, batch)
+
+    def flush(self, batch):
+        payloads = [(ticker, records, google_sentiment.build_payload(ticker, records, analysis_id))
+                    for ticker, analysis_id, records in batch]
+        if self.store:
+            try:
+                with tracing.span("store.insert_record_batch", tickers=len(batch),
+                                  rows=sum(len(records) for _, _, records in batch)):
+                    sentiment_store.insert_record_batch([(ticker, records, payload["analysis_id"])
+                                                         for ticker, records, payload in payloads])
+            except Exception as e:
+                print(f"⚠️ Store write failed ({len(batch)} tickers): {e}")
+        for ticker, _, payload in payloads:
+            if self.post:
+                response = google_sentiment.send_results_to_api(payload, google_sentiment.API_ENDPOINT)
+                if response["status"] != "success":
+                    print(f"⚠️ API submission failed for '{ticker}': {response.get('details')}")
+            self.results[ticker] = payload
+        self.stats["sink_batches"] += 1
+
+    async def run(self, tickers):
+        """วิเคราะห์ทุก ticker คืน {ticker: payload} (ticker ที่ไม่มีข่าวที่เกี่ยวข้องจะไม่มีในผลลัพธ์)"""
+        start = time.perf_counter()
+        pending = asyncio.Queue()
+        for ticker in tickers:
+            pending.put_nowait(ticker)
+        self.stats["tickers"] += pending.qsize()
+        prepared = asyncio.Queue(self.queue_size)
+        scored = asyncio.Queue(self.queue_size)
+
+        pool = None
+        if self.processes:
+            pool = ProcessPoolExecutor(self.processes, initializer=_init_worker, initargs=(self.scorer_name,))
+            # เริ่ม process ทั้งหมดก่อนมี thread ของขั้น fetch (fork ตอนมี thread อื่นทำงานอยู่ไม่ปลอดภัย)
+            await asyncio.get_running_loop().run_in_executor(pool, _score_texts, [], self.scorer_name)
+
+        async def close_stages():
+            # ปิดคิวทีละขั้นเมื่อขั้นก่อนหน้าทำงานครบ
+            await asyncio.gather(*fetchers)
+            for _ in score_workers:
+                await prepared.put(_DONE)
+            await asyncio.gather(*score_workers)
+            await scored.put(_DONE)
+
+        try:
+            fetchers = [asyncio.create_task(self.fetch_stage(pending, prepared)) for _ in range(self.fetch_workers)]
+            score_workers = [asyncio.create_task(self.score_stage(prepared, scored, pool))
+                             for _ in range(max(self.processes, 1))]
+            sink = asyncio.create_task(self.sink_stage(scored))
+            tasks = fetchers + score_workers + [sink, asyncio.create_task(close_stages())]
+            try:
+                # ขั้นไหนพัง -> gather โยน error ทันที (ไม่ปล่อยให้ขั้นอื่นรอ put/get บนคิวที่ไม่มีใครดึงตลอดไป)
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stats["seconds"] += time.perf_counter() - start
+        return self.results
+
+
+def run_sweep(tickers, **kwargs):
+    """เวอร์ชัน sync ของ SweepPipeline.run คืน (ผลลัพธ์, สถิติ)"""
+    pipeline = SweepPipeline(**kwargs)
+    results = asyncio.run(pipeline.run(tickers))
+    return results, pipeline.stats
+
+
+if __name__ == "__main__":
+    from sweeper import WATCHLIST
+
+    parser = argparse.ArgumentParser(description="Analyze many tickers through the staged pipeline")
+    parser.add_argument("--tickers", help="comma separated tickers (default: sweeper watchlist)")
+    parser.add_argument("--lang", default="th", choices=["th", "en"])
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=None, help="scoring processes (0 = score in-process)")
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--no-post", action="store_true", help="skip sending payloads to the API")
+    args = parser.parse_args()
+
+    tickers = [t.strip() for t in args.tickers.split(",")] if args.tickers else WATCHLIST
+    results, stats = run_sweep(tickers, lang=args.lang, fetch_workers=args.fetch_workers,
+                               processes=args.processes, queue_size=args.queue_size, post=not args.no_post)
+    for ticker, payload in results.items():
+        print(f"{ticker}: {payload['average_sentiment']:+.4f} {payload['overall_label']} "
+              f"({payload['total_articles']} articles)")
+    stats["seconds"] = round(stats["seconds"], 3)
+    print(json.dumps(stats, indent=4))
@@ -0,0 +1,146 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import headline_dedup
+
+# ตาราง alias ของแต่ละ ticker (ticker<TAB>alias<TAB>weight)
+ALIASES_PATH = os.getenv('TICKER_ALIASES_PATH', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'lexicon', 'ticker_aliases.tsv'))
+
+# คะแนนเมื่อเจอ alias แค่ในชื่อสำนักข่าว/แหล่งข่าว (เช่น " - tisco.co.th") ไม่ใช่ในหัวข่าว
+SOURCE_MATCH_WEIGHT = 0.5
+# ต่ำกว่านี้ทิ้ง ไม่ส่งไปตัดคำ/ให้คะแนน (ที่เหลือคูณคะแนนเข้า weight ของข่าว)
+MIN_RELEVANCE = float(os.getenv('MIN_RELEVANCE', '0.25'))
+# จำนวน keyword ที่เก็บ pattern ไว้ (keyword มาจากผู้ใช้ได้ไม่จำกัด เก็บเฉพาะที่ใช้ล่าสุด)
+MAX_CACHED_PATTERNS = 1024
+
+_LATIN = re.compile(r'[A-Za-z0-9]')
+
+
+def read_aliases(path=ALIASES_PATH):
+    """{ticker: [(alias, weight), ...]} จากไฟล์ alias ไม่มีไฟล์ = ตารางว่าง"""
+    aliases = {}
+    if not os.path.exists(path):
+        return aliases
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            parts = line.split('\t')
+            if len(parts) < 2 or not parts[1].strip():
+                continue
+            weight = float(parts[2]) if len(parts) > 2 and parts[2] else 1.0
+            aliases.setdefault(parts[0].strip(), []).append((parts[1].strip(), weight))
+    return aliases
+
+
+def compile_alias(alias, ignore_case=False):
+    """
+    alias ภาษาอังกฤษ: ตรงตัวพิมพ์และต้องไม่ติดกับตัวอักษร/ตัวเลขอื่น (AIS ไม่ตรงกับ RAISE)
+    alias ภาษาไทย: substring ธรรมดา
+    ignore_case: ใช้กับ keyword ที่ไม่มีในตาราง (ผู้ใช้พิมพ์ delta / Delta ก็ต้องเจอ DELTA)
+    """
+    if not alias:
+        raise ValueError("Empty alias/keyword")
+    pattern = re.escape(alias)
+    if _LATIN.match(alias[0]):
+        pattern = r'(?<![A-Za-z0-9])' + pattern
+    if _LATIN.match(alias[-1]):
+        pattern += r'(?![A-Za-z0-9])'
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+
+class RelevanceFilter:
+    """
+    คัดข่าวที่ไม่เกี่ยวกับ ticker ออกก่อนขั้นตอนที่แพง (ตัดคำ, ให้คะแนน, บันทึก)
+    Google News ค้นคำสั้นๆ อย่าง AIS หรือ GULF แล้วได้ข่าวที่แค่มีคำนี้ผ่านๆ หรือไม่มีในหัวข่าวเลย
+
+    คะแนนความเกี่ยวข้องคล้าย KeywordRelevanceScorer ของ crawl4ai (Crawl2.py) แต่ดูที่หัวข่าว:
+    - alias อยู่ในหัวข่าว = weight ของ alias (1.0 หรือน้อยกว่าสำหรับบริษัทแม่/เครือ)
+    - alias อยู่แค่ในชื่อสำนักข่าว = weight * SOURCE_MATCH_WEIGHT
+    - ไม่เจอเลย = 0
+    """
+    def __init__(self, aliases=None, min_score=MIN_RELEVANCE):
+        self.aliases = read_aliases() if aliases is None else aliases
+        self.min_score = min_score
+        self.lock = threading.Lock()
+        self.patterns = OrderedDict()
+
+    def aliases_for(self, ticker):
+        """
+        alias ของ ticker (ไม่สนตัวพิมพ์ของ key) ถ้า keyword เป็นชื่อเรียกอื่นของ ticker ในตาราง
+        (เช่น "ปริ้นซ์ กรุ๊ป") ใช้ alias ชุดเดียวกัน ไม่เจอเลยคืน None
+        """
+        for key in (ticker, ticker.upper()):
+            if key in self.aliases:
+                return self.aliases[key]
+        for aliases in self.aliases.values():
+            if any(alias == ticker and weight >= 1.0 for alias, weight in aliases):
+                return aliases
+        return None
+
+    def patterns_for(self, ticker):
+        ticker = (ticker or '').strip()
+        if not ticker:
+            raise ValueError("Empty keyword")
+        with self.lock:
+            if ticker in self.patterns:
+                self.patterns.move_to_end(ticker)
+            else:
+                aliases = self.aliases_for(ticker)
+                if aliases is None:
+                    # ไม่มีในตาราง: ใช้ตัว keyword เองแบบไม่สนตัวพิมพ์ (กฎตรงตัวพิมพ์ใช้กับ alias ที่คัดมาแล้วเท่านั้น)
+                    self.patterns[ticker] = [(compile_alias(ticker, ignore_case=True), 1.0)]
+                else:
+                    self.patterns[ticker] = [(compile_alias(alias), weight) for alias, weight in aliases]
+                if len(self.patterns) > MAX_CACHED_PATTERNS:
+                    self.patterns.popitem(last=False)
+            return self.patterns[ticker]
+
+    def score(self, ticker, title, publisher=None):
+        title = title or ''
+        head = headline_dedup.strip_source_suffix(title)
+        source = ' '.join(filter(None, [title[len(head):], publisher]))
+
+        best = 0.0
+        for pattern, weight in self.patterns_for(ticker):
+            if weight <= best:
+                continue
+            if pattern.search(head):
+                best = weight
+            elif source and pattern.search(source):
+                best = max(best, weight * SOURCE_MATCH_WEIGHT)
+        return best
+
+    def filter_records(self, records, ticker=None):
+        """
+        คืน (records ที่เกี่ยวข้อง, จำนวนที่ทิ้ง) ข่าวที่เหลือถูกลด weight ตามคะแนน (แก้ใน record โดยตรง)
+        ticker=None ใช้ keyword ของแต่ละ record
+        """
+        kept = []
+        for record in records:
+            score = self.score(ticker or record.keyword, record.title or record.content, record.publisher)
+            if score < self.min_score:
+                continue
+            record.weight *= score
+            kept.append(record)
+        return kept, len(records) - len(kept)
+
+
+_FILTER = None
+_FILTER_LOCK = threading.Lock()
+
+def get_filter():
+    """RelevanceFilter ที่ใช้ร่วมกันทั้ง process"""
+    global _FILTER
+    with _FILTER_LOCK:
+        if _FILTER is None:
+            _FILTER = RelevanceFilter()
+        return _FILTER
+
+
+def filter_records(records, ticker=None):
+    return get_filter().filter_records(records, ticker)
@@ -0,0 +1,87 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+# ฟิลด์ที่ดึงจากแต่ละ <item> (ไม่มีในข่าว = 'N/A' เหมือนเดิม)
+# source = ชื่อสำนักข่าว (<source url="...">) ใช้เป็น publisher ของ NewsRecord
+RSS_FIELDS = ('title', 'link', 'pubDate', 'source')
+CHUNK_SIZE = 64 * 1024
+
+MONTHS = {name: i for i, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+UTC_ZONES = ('GMT', 'UT', 'UTC', 'Z')
+
+
+def _chunks(content, size=CHUNK_SIZE):
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+def iter_rss_items(source, limit=None, fields=RSS_FIELDS):
+    """
+    อ่าน <item> ของ RSS ทีละข่าวด้วย pull parser แล้วหยุดทันทีเมื่อครบ limit
+    source: bytes/str ของทั้ง feed หรือ iterable ของ chunk (เช่น response.iter_content())
+    แต่ละ <item> ไล่ลูกครั้งเดียว แล้ว clear ทิ้ง ไม่เก็บทั้งต้นไม้ไว้ใน memory
+    """
+    if limit is not None and limit <= 0:
+        return
+    chunks = _chunks(source) if isinstance(source, (bytes, str)) else source
+    parser = ET.XMLPullParser(events=('end',))
+    count = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if elem.tag != 'item':
+                continue
+            item = dict.fromkeys(fields, 'N/A')
+            for child in elem:
+                if child.tag in item:
+                    item[child.tag] = child.text
+            elem.clear()
+            yield item
+            count += 1
+            if limit is not None and count >= limit:
+                return
+    parser.close()
+
+
+def parse_rss_items(source, limit=20):
+    """
+    Parse RSS XML content into a list of news dicts
+    """
+    return list(iter_rss_items(source, limit))
+
+
+@lru_cache(maxsize=64)
+def _zone(value):
+    if value in UTC_ZONES:
+        return timezone.utc
+    if len(value) == 5 and value[0] in '+-' and value[1:].isdigit():
+        sign = -1 if value[0] == '-' else 1
+        return timezone(sign * timedelta(hours=int(value[1:3]), minutes=int(value[3:])))
+    raise ValueError(value)
+
+
+@lru_cache(maxsize=8192)
+def parse_rfc822(value):
+    """
+    แปลง pubDate ของ RSS เป็น datetime ที่มี timezone (None ถ้าแปลงไม่ได้)
+    รูปแบบมาตรฐาน 'Wed, 20 Nov 2025 08:31:46 GMT' แปลงเองโดยตรง รูปแบบอื่นส่งต่อ email.utils
+    ข่าวเดิมถูกดึงซ้ำทุกรอบ poll จึง cache ผลตาม string
+    """
+    if not isinstance(value, str):
+        return None
+    parts = value.split()
+    if len(parts) == 6 and parts[0].endswith(','):
+        _, day, month, year, clock, zone = parts
+        try:
+            hour, minute, second = clock.split(':')
+            return datetime(int(year), MONTHS[month], int(day),
+                            int(hour), int(minute), int(second), tzinfo=_zone(zone))
+        except (KeyError, ValueError):
+            pass
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,382 @@
+import os
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+import thai_lexicon
+import english_lexicon
+import text_language
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+# โฟลเดอร์ model (model.onnx + tokenizer.json + config.json แบบ export จาก Hugging Face)
+ONNX_MODEL_DIR = os.getenv("SENTIMENT_ONNX_MODEL")
+# scorer เริ่มต้นของทั้ง process: "lexicon", "onnx" หรือ "cascade" (lexicon ก่อน แล้วค่อย onnx)
+DEFAULT_SCORER = os.getenv("SENTIMENT_SCORER", "lexicon")
+
+
+def polarity_label(polarity):
+    if polarity > 0.1:
+        return 'positive'
+    if polarity < -0.1:
+        return 'negative'
+    return 'neutral'
+
+
+class Scorer:
+    """
+    Interface ของตัวให้คะแนน: score_batch(texts) -> list ของ (polarity, label, matched_words, version)
+    version บอกว่าคะแนนมาจากอะไร (lexicon version หรือชื่อ model) เก็บลง lexicon_version ของผลลัพธ์
+    """
+    name = 'base'
+
+    def score_batch(self, texts):
+        raise NotImplementedError
+
+    def score(self, text):
+        return self.score_batch([text])[0]
+
+
+class LexiconScorer(Scorer):
+    """
+    Lexicon scorer (lexicon=None = version ปัจจุบันของ manager ในแต่ละ batch)
+    manager: LexiconManager ของภาษาที่ใช้ ค่าเริ่มต้นคือภาษาไทย
+    """
+    name = 'lexicon'
+
+    def __init__(self, lexicon=None, batch_size=64, manager=None):
+        self.lexicon = lexicon
+        self.batch_size = batch_size
+        self.manager = manager or thai_lexicon.lexicon_manager
+
+    def score_batch(self, texts):
+        lexicon = self.lexicon or self.manager.get()
+        results = thai_lexicon.analyze_sentiment_batch(texts, batch_size=self.batch_size, lexicon=lexicon)
+        return [(polarity, label, matched, lexicon.version) for polarity, label, matched in results]
+
+
+# ชื่อ label ของ model ไทยที่พบบ่อย (เช่นชุด wisesight: pos / neu / neg / q) -> ชื่อมาตรฐาน
+LABEL_ALIASES = {"pos": "positive", "neg": "negative", "neu": "neutral"}
+
+
+class OnnxScorer(Scorer):
+    """
+    Thai text classifier บน CPU ผ่าน ONNX Runtime (ควรใช้ model ที่ quantize แล้ว ดู quantize_model)
+    polarity = P(positive) - P(negative)
+    """
+    name = 'onnx'
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, max_length=128, threads=None):
+        if onnxruntime is None or Tokenizer is None:
+            raise RuntimeError("onnxruntime and tokenizers are required for the ONNX scorer")
+        if not model_dir:
+            raise RuntimeError("Set SENTIMENT_ONNX_MODEL to the exported model directory")
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        model_path = os.path.join(model_dir, "model.onnx")
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+        labels = ["negative", "neutral", "positive"]
+        config_path = os.path.join(model_dir, "config.json")
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as f:
+                id2label = json.load(f).get("id2label") or {}
+            if id2label:
+                labels = [id2label[str(i)].lower() for i in range(len(id2label))]
+        labels = [LABEL_ALIASES.get(label, label) for label in labels]
+        if "positive" not in labels or "negative" not in labels:
+            raise RuntimeError(f"Model labels {labels} have no positive/negative class")
+        self.positive = labels.index("positive")
+        self.negative = labels.index("negative")
+        self.version = f"onnx:{os.path.basename(os.path.normpath(model_dir))}"
+
+    def score_batch(self, texts):
+        if not texts:
+            return []
+        encodings = self.tokenizer.encode_batch([text or '' for text in texts])
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+
+        logits = self.session.run(None, feeds)[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        polarities = probs[:, self.positive] - probs[:, self.negative]
+        return [(float(p), polarity_label(p), [], self.version) for p in polarities]
+
+
+def quantize_model(src_path, dst_path):
+    """Quantize น้ำหนักเป็น int8 (dynamic) ให้รันบน CPU เร็วขึ้นและเล็กลง"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(src_path, dst_path, weight_type=QuantType.QInt8)
+    return dst_path
+
+
+class BatchingScorer(Scorer):
+    """
+    รวมคำขอจากหลาย thread เป็น batch ก่อนส่งให้ backend (dynamic batching)
+    - รอรวมงานไม่เกิน max_wait วินาทีหรือจนครบ max_batch ข้อความ
+    - คิวมีขนาดจำกัด (max_queue ก้อน) ถ้าเต็ม ก้อนนั้นใช้ fallback (lexicon) ทันทีแทนการรอ
+    - ผลที่ไม่กลับมาภายใน timeout ก็ใช้ fallback เช่นกัน
+    """
+    def __init__(self, backend, fallback=None, max_batch=32, max_wait=0.01, max_queue=64, timeout=5.0):
+        self.backend = backend
+        self.fallback = fallback or LexiconScorer()
+        self.name = backend.name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.batches = 0
+        self.scored = 0
+        self.fallbacks = 0
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.running = True
+                self.thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "batches": self.batches,
+            "scored": self.scored,
+            "fallbacks": self.fallbacks,
+            "queued": self.queue.qsize(),
+        }
+
+    def _run(self):
+        while self.running:
+            try:
+                pending = [self.queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    chunk = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(chunk)
+                size += len(chunk[0])
+
+            texts = [text for chunk, _ in pending for text in chunk]
+            try:
+                results = []
+                for start in range(0, len(texts), self.max_batch):
+                    results.extend(self.backend.score_batch(texts[start:start + self.max_batch]))
+                    self.batches += 1
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.scored += len(texts)
+            offset = 0
+            for chunk, future in pending:
+                future.set_result(results[offset:offset + len(chunk)])
+                offset += len(chunk)
+
+    def score_batch(self, texts):
+        self.start()
+        submitted = []
+        for start in range(0, len(texts), self.max_batch):
+            chunk = list(texts[start:start + self.max_batch])
+            future = Future()
+            try:
+                self.queue.put_nowait((chunk, future))
+            except queue.Full:
+                future = None
+            submitted.append((start, chunk, future))
+
+        results = [None] * len(texts)
+        for start, chunk, future in submitted:
+            scored = None
+            if future is not None:
+                try:
+                    scored = future.result(timeout=self.timeout)
+                except FutureTimeout:
+                    pass
+                except Exception as e:
+                    print(f"⚠️ {self.name} scorer failed, using {self.fallback.name}: {e}")
+            if scored is None:
+                self.fallbacks += len(chunk)
+                scored = self.fallback.score_batch(chunk)
+            results[start:start + len(chunk)] = scored
+        return results
+
+
+class CascadeScorer(Scorer):
+    """
+    ให้ lexicon (ถูก) คะแนนทุกข้อความก่อน แล้วส่งต่อให้ backend หนักเฉพาะข้อความที่ lexicon ไม่มั่นใจ:
+    ไม่เจอคำใน lexicon เลย หรือ |polarity| <= margin (ใกล้เส้นแบ่ง neutral)
+    เก็บอัตราการส่งต่อและเวลาที่ใช้ของแต่ละชั้น (stats)
+    """
+    name = 'cascade'
+
+    def __init__(self, cheap=None, heavy=None, margin=0.1):
+        self.cheap = cheap or LexiconScorer()
+        self.heavy = heavy
+        self.margin = margin
+        self.lock = threading.Lock()
+        self.items = 0
+        self.escalated = 0
+        self.tier_seconds = {'cheap': 0.0, 'heavy': 0.0}
+
+    def needs_escalation(self, result):
+        polarity, _, matched_words, _ = result
+        return not matched_words or abs(polarity) <= self.margin
+
+    def score_batch(self, texts):
+        start = time.perf_counter()
+        results = self.cheap.score_batch(texts)
+        cheap_seconds = time.perf_counter() - start
+
+        escalate = [i for i, result in enumerate(results) if self.needs_escalation(result)]
+        heavy_seconds = 0.0
+        if escalate and self.heavy is not None:
+            start = time.perf_counter()
+            heavy_results = self.heavy.score_batch([texts[i] for i in escalate])
+            heavy_seconds = time.perf_counter() - start
+            for i, result in zip(escalate, heavy_results):
+                results[i] = result
+
+        with self.lock:
+            self.items += len(texts)
+            self.escalated += len(escalate)
+            self.tier_seconds['cheap'] += cheap_seconds
+            self.tier_seconds['heavy'] += heavy_seconds
+        return results
+
+    def stats(self):
+        with self.lock:
+            items, escalated = self.items, self.escalated
+            tiers = {
+                'cheap': {'scorer': self.cheap.name, 'items': items, 'seconds': self.tier_seconds['cheap']},
+                'heavy': {'scorer': self.heavy.name if self.heavy else None, 'items': escalated,
+                          'seconds': self.tier_seconds['heavy']},
+            }
+        for tier in tiers.values():
+            tier['ms_per_item'] = round(1000 * tier['seconds'] / tier['items'], 3) if tier['items'] else None
+            tier['seconds'] = round(tier['seconds'], 3)
+        return {
+            'items': items,
+            'escalated': escalated,
+            'escalation_rate': round(escalated / items, 4) if items else None,
+            'margin': self.margin,
+            'tiers': tiers,
+        }
+
+
+class LanguageRouter(Scorer):
+    """
+    แยกข้อความตามภาษา (text_language.detect_language) แล้วส่งแต่ละกลุ่มให้ scorer ของภาษานั้น
+    ในรอบเดียว feed ที่มีหัวข่าวไทยปนอังกฤษจึงไม่ต้องเอาหัวข่าวอังกฤษไปตัดคำไทย
+    ภาษาที่ไม่มี scorer ใช้ของภาษา default
+    """
+    def __init__(self, scorers, default=text_language.THAI):
+        self.scorers = scorers
+        self.default = default
+        self.primary = scorers[default]
+        self.name = self.primary.name
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def score_batch(self, texts):
+        groups = {}
+        for i, text in enumerate(texts):
+            language = text_language.detect_language(text, self.default)
+            if language not in self.scorers:
+                language = self.default
+            groups.setdefault(language, []).append(i)
+
+        results = [None] * len(texts)
+        for language, indices in groups.items():
+            scored = self.scorers[language].score_batch([texts[i] for i in indices])
+            for i, result in zip(indices, scored):
+                results[i] = result
+
+        with self.lock:
+            for language, indices in groups.items():
+                self.counts[language] = self.counts.get(language, 0) + len(indices)
+        return results
+
+    def stats(self):
+        stats = self.primary.stats() if hasattr(self.primary, 'stats') else {}
+        with self.lock:
+            stats['languages'] = dict(self.counts)
+        return stats
+
+
+def build_scorer(name):
+    """สร้าง scorer ตามชื่อ ถ้าสร้าง backend ไม่ได้ (ไม่มี onnxruntime / model) จะใช้ lexicon แทน"""
+    if name == 'lexicon':
+        return LexiconScorer()
+    if name in ('onnx', 'cascade'):
+        try:
+            heavy = BatchingScorer(OnnxScorer())
+        except Exception as e:
+            # onnxruntime โยน exception ของ pybind เอง (model เสีย/ไม่มีไฟล์) ไม่ใช่ OSError
+            print(f"⚠️ ONNX scorer unavailable, using lexicon: {type(e).__name__}: {e}")
+            return LexiconScorer()
+        return heavy if name == 'onnx' else CascadeScorer(heavy=heavy)
+    raise ValueError(f"Unknown scorer '{name}'")
+
+
+_SCORERS = {}
+_SCORERS_LOCK = threading.Lock()
+
+def get_scorer(name=None):
+    """
+    Scorer ที่ใช้ร่วมกันทั้ง process ตามชื่อ (ค่าเริ่มต้นจาก SENTIMENT_SCORER:
+    "lexicon", "onnx" หรือ "cascade") ใช้กับหัวข่าวไทย หัวข่าวอังกฤษใช้ English lexicon
+    """
+    name = name or DEFAULT_SCORER
+    with _SCORERS_LOCK:
+        if name not in _SCORERS:
+            _SCORERS[name] = LanguageRouter({
+                text_language.THAI: build_scorer(name),
+                text_language.ENGLISH: LexiconScorer(manager=english_lexicon.lexicon_manager),
+            })
+        return _SCORERS[name]
@@ -2,7 +2,7 @@ def scrape(url):
     import requests
     from bs4 import BeautifulSoup
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=15)
     response.encoding = 'utf-8'
     soup = BeautifulSoup(response.text, 'html.parser')
 
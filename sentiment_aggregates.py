@@ -0,0 +1,203 @@
+import math
+import time
+from datetime import datetime, timezone
+
+LABELS = ('positive', 'neutral', 'negative')
+
+# histogram สำหรับประมาณค่ามัธยฐาน: polarity อยู่ในช่วง [-1, 1] แบ่งเป็น bin ละ 0.05
+HISTOGRAM_BINS = 40
+
+# ชื่อ window -> (ความยาว window, ขนาด slot) หน่วยวินาที
+DEFAULT_WINDOWS = {
+    '1h': (3600, 60),
+    '1d': (86400, 3600),
+    '7d': (7 * 86400, 3600),
+}
+
+def to_timestamp(ts):
+    """รับ datetime / epoch seconds / None (ตอนนี้) คืน epoch seconds"""
+    if ts is None:
+        return time.time()
+    if isinstance(ts, datetime):
+        if ts.tzinfo is None:
+            ts = ts.astimezone()
+        return ts.timestamp()
+    return float(ts)
+
+
+class SentimentStats:
+    """
+    สถิติสะสมแบบ O(1) ต่อการเพิ่ม/ลบ: count, sum, sum of squares, จำนวนต่อ label
+    และ histogram สำหรับประมาณค่ามัธยฐาน
+    """
+    __slots__ = ('count', 'total', 'total_sq', 'labels', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.labels = dict.fromkeys(LABELS, 0)
+        self.histogram = [0] * HISTOGRAM_BINS
+
+    @staticmethod
+    def bin_index(polarity):
+        index = int((polarity + 1.0) / 2.0 * HISTOGRAM_BINS)
+        return max(0, min(HISTOGRAM_BINS - 1, index))
+
+    def add(self, polarity, label, sign=1):
+        self.count += sign
+        self.total += sign * polarity
+        self.total_sq += sign * polarity * polarity
+        self.labels[label] = self.labels.get(label, 0) + sign
+        self.histogram[self.bin_index(polarity)] += sign
+
+    def merge(self, other, sign=1):
+        """รวม (sign=1) หรือหักออก (sign=-1) สถิติของอีกชุด"""
+        self.count += sign * other.count
+        self.total += sign * other.total
+        self.total_sq += sign * other.total_sq
+        for label, count in other.labels.items():
+            self.labels[label] = self.labels.get(label, 0) + sign * count
+        for i, count in enumerate(other.histogram):
+            self.histogram[i] += sign * count
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def std(self):
+        """ส่วนเบี่ยงเบนมาตรฐานแบบ sample (ตรงกับ pandas .std())"""
+        if self.count < 2:
+            return None
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    @property
+    def median(self):
+        """ค่ามัธยฐานโดยประมาณจาก histogram (interpolate ภายใน bin)"""
+        if not self.count:
+            return None
+        half = self.count / 2
+        cumulative = 0
+        width = 2.0 / HISTOGRAM_BINS
+        for i, count in enumerate(self.histogram):
+            if count and cumulative + count >= half:
+                return -1.0 + width * (i + (half - cumulative) / count)
+            cumulative += count
+        return 1.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'median': self.median,
+            'std': self.std,
+            'positive': self.labels.get('positive', 0),
+            'neutral': self.labels.get('neutral', 0),
+            'negative': self.labels.get('negative', 0),
+        }
+
+
+class RollingWindow:
+    """
+    Window เลื่อนตามเวลา แบ่งเป็น slot คงที่ (ring buffer)
+    เก็บผลรวมของทั้ง window ไว้ตลอด slot ที่หมดอายุจะถูกหักออก จึง query ได้ O(1)
+    """
+    def __init__(self, span, slot):
+        self.span = span
+        self.slot = slot
+        self.size = int(math.ceil(span / slot))
+        self.slots = [None] * self.size
+        self.slot_ids = [None] * self.size
+        self.totals = SentimentStats()
+        self.head = None
+
+    def advance(self, slot_id):
+        """หัก slot ที่หลุด window ออกเมื่อเวลาเดินไปถึง slot_id"""
+        if self.head is not None and slot_id <= self.head:
+            return
+        if self.head is None or slot_id - self.head >= self.size:
+            # ข้ามไปไกลกว่าหนึ่ง window -> ทุก slot หมดอายุ
+            self.slots = [None] * self.size
+            self.slot_ids = [None] * self.size
+            self.totals = SentimentStats()
+        else:
+            for expired in range(self.head + 1, slot_id + 1):
+                index = expired % self.size
+                if self.slots[index] is not None:
+                    self.totals.merge(self.slots[index], sign=-1)
+                    self.slots[index] = None
+                    self.slot_ids[index] = None
+        self.head = slot_id
+
+    def add(self, ts, polarity, label):
+        slot_id = int(ts // self.slot)
+        self.advance(slot_id)
+        if slot_id <= self.head - self.size:
+            return False  # เก่ากว่า window
+        index = slot_id % self.size
+        if self.slots[index] is None:
+            self.slots[index] = SentimentStats()
+            self.slot_ids[index] = slot_id
+        self.slots[index].add(polarity, label)
+        self.totals.add(polarity, label)
+        return True
+
+    def query(self, now=None):
+        self.advance(int(to_timestamp(now) // self.slot))
+        return self.totals.summary()
+
+
+class SentimentAggregator:
+    """
+    Aggregate ต่อ ticker ที่อัปเดตทีละรายการเมื่อมีข่าวที่ให้คะแนนแล้วเข้ามา
+    - rolling window (1h/1d/7d) query ได้ O(1)
+    - สถิติรายวันไว้ดู trend ย้อนหลังหลายเดือนโดยไม่ต้องสแกนข้อมูลดิบ
+    """
+    def __init__(self, windows=None):
+        self.window_specs = dict(windows or DEFAULT_WINDOWS)
+        self.windows = {}
+        self.daily = {}
+
+    def ticker_windows(self, ticker):
+        if ticker not in self.windows:
+            self.windows[ticker] = {
+                name: RollingWindow(span, slot) for name, (span, slot) in self.window_specs.items()
+            }
+            self.daily[ticker] = {}
+        return self.windows[ticker]
+
+    def add(self, ticker, polarity, label, ts=None):
+        ts = to_timestamp(ts)
+        for window in self.ticker_windows(ticker).values():
+            window.add(ts, polarity, label)
+
+        day = datetime.fromtimestamp(ts, tz=timezone.utc).date()
+        stats = self.daily[ticker].get(day)
+        if stats is None:
+            stats = self.daily[ticker][day] = SentimentStats()
+        stats.add(polarity, label)
+
+    def add_many(self, ticker, items):
+        """items: iterable ของ (polarity, label, ts)"""
+        for polarity, label, ts in items:
+            self.add(ticker, polarity, label, ts)
+
+    def query(self, ticker, window='1d', now=None):
+        if ticker not in self.windows:
+            return SentimentStats().summary()
+        return self.windows[ticker][window].query(now)
+
+    def snapshot(self, ticker, now=None):
+        """สรุปทุก window ของ ticker"""
+        return {name: self.query(ticker, name, now) for name in self.window_specs}
+
+    def trend(self, ticker, start=None, end=None):
+        """สถิติรายวัน (UTC) เรียงตามวันที่ ในช่วง [start, end] (date)"""
+        days = self.daily.get(ticker, {})
+        return [
+            dict(date=day.isoformat(), **stats.summary())
+            for day, stats in sorted(days.items())
+            if (start is None or day >= start) and (end is None or day <= end)
+        ]
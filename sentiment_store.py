@@ -0,0 +1,361 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from rss_parser import parse_rfc822
+
+# ไฟล์ฐานข้อมูล SQLite (ตั้งผ่าน env ได้)
+DB_PATH = os.environ.get("SENTIMENT_DB_PATH", "sentiment.db")
+
+# bucket -> รูปแบบ strftime ของ SQLite ที่ใช้ group
+BUCKET_FORMATS = {
+    "hour": "%Y-%m-%dT%H:00:00",
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",
+    "month": "%Y-%m",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news_sentiment (
+    id INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT,
+    source TEXT,
+    sentiment REAL NOT NULL,
+    label TEXT NOT NULL,
+    analysis_id TEXT,
+    cluster_id TEXT,
+    lexicon_version TEXT,
+    UNIQUE (ticker, title, published_at)
+);
+CREATE INDEX IF NOT EXISTS idx_news_sentiment_ticker_time
+    ON news_sentiment (ticker, published_at);
+
+CREATE TABLE IF NOT EXISTS sentiment_submissions (
+    analysis_id TEXT PRIMARY KEY,
+    analysis_date TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    total_articles INTEGER NOT NULL,
+    average_sentiment REAL NOT NULL,
+    overall_label TEXT NOT NULL,
+    received_at TEXT NOT NULL,
+    lexicon_version TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sentiment_submissions_keyword_date
+    ON sentiment_submissions (keyword, analysis_date);
+"""
+
+# (ตาราง, คอลัมน์ TEXT) ที่เพิ่มภายหลัง
+MIGRATIONS = [
+    ("news_sentiment", "cluster_id"),
+    ("news_sentiment", "lexicon_version"),
+    ("sentiment_submissions", "lexicon_version"),
+]
+
+_local = threading.local()
+
+def get_connection(path=None):
+    """
+    Connection ต่อ thread (sqlite3 connection ใช้ข้าม thread ไม่ได้)
+    สร้าง schema ให้ครั้งแรกที่เปิด
+    """
+    path = path or DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        migrate(conn)
+        connections[path] = conn
+    return conn
+
+
+def migrate(conn):
+    """เพิ่มคอลัมน์ที่มาทีหลังให้ฐานข้อมูลเก่า"""
+    for table, column in MIGRATIONS:
+        columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            with conn:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+
+
+def to_utc_string(value):
+    """
+    แปลง datetime / RFC-822 (pubDate) / ISO string เป็น 'YYYY-MM-DDTHH:MM:SS' (UTC)
+    คืน None ถ้าแปลงไม่ได้
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        parsed = parse_rfc822(value)
+        if parsed is None:
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        value = parsed
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def insert_articles(ticker, articles, analysis_id=None, path=None, lexicon_version=None):
+    """
+    บันทึกข่าวที่ให้คะแนนแล้ว articles: iterable ของ dict ที่มี
+    published_at, title, sentiment, label (link, source, cluster_id, lexicon_version ไม่บังคับ)
+    lexicon_version: version ของ lexicon ที่ใช้ให้คะแนน (ถ้าข่าวไม่ได้ระบุเอง)
+    ข่าวที่เคยบันทึกแล้ว (ticker, title, published_at ซ้ำ) จะถูกข้าม
+    """
+    now = to_utc_string(datetime.now(timezone.utc))
+    rows = [
+        (
+            ticker,
+            to_utc_string(article.get("published_at")) or now,
+            article["title"],
+            article.get("link"),
+            article.get("source"),
+            float(article["sentiment"]),
+            article["label"],
+            analysis_id,
+            article.get("cluster_id"),
+            article.get("lexicon_version") or lexicon_version,
+        )
+        for article in articles
+    ]
+    return _insert_news_rows(rows, path)
+
+
+def insert_records(ticker, records, analysis_id=None, path=None):
+    """
+    บันทึก NewsRecord (sources.py) ที่ให้คะแนนแล้วโดยตรง ไม่ต้องแปลงเป็น dict ก่อน
+    """
+    return _insert_news_rows(_record_rows(ticker, records, analysis_id), path)
+
+
+def insert_record_batch(batch, path=None):
+    """
+    บันทึกผลของหลาย ticker ใน transaction เดียว batch: list ของ (ticker, records, analysis_id)
+    """
+    rows = []
+    for ticker, records, analysis_id in batch:
+        rows.extend(_record_rows(ticker, records, analysis_id))
+    return _insert_news_rows(rows, path)
+
+
+def _record_rows(ticker, records, analysis_id):
+    now = to_utc_string(datetime.now(timezone.utc))
+    return [
+        (
+            ticker,
+            to_utc_string(record.published_at) or now,
+            record.title,
+            record.url,
+            record.publisher,
+            float(record.sentiment),
+            record.sentiment_label,
+            analysis_id,
+            record.cluster_id,
+            record.lexicon_version,
+        )
+        for record in records
+    ]
+
+
+def _insert_news_rows(rows, path=None):
+    conn = get_connection(path)
+    with conn:
+        cursor = conn.executemany(
+            "INSERT OR IGNORE INTO news_sentiment "
+            "(ticker, published_at, title, link, source, sentiment, label, analysis_id, cluster_id, lexicon_version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return cursor.rowcount
+
+
+def insert_article_batch(batch, path=None):
+    """
+    บันทึกรายข่าวจากหลาย analysis พร้อมกัน batch: list ของ (ticker, analysis_id, article)
+    (ใช้กับ BatchWriter ที่รับรายข่าวมาจาก /api/sentiment)
+    """
+    groups = {}
+    for ticker, analysis_id, article in batch:
+        groups.setdefault((ticker, analysis_id), []).append(article)
+    inserted = 0
+    for (ticker, analysis_id), articles in groups.items():
+        # กลุ่มที่เสียทิ้งเฉพาะกลุ่มนั้น ไม่ลากกลุ่มอื่นใน batch เดียวกันไปด้วย
+        try:
+            inserted += insert_articles(ticker, articles, analysis_id=analysis_id, path=path)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"⚠️ Skipped {len(articles)} article(s) of '{ticker}' ({analysis_id}): {e!r}")
+    return inserted
+
+
+def query_sentiment(ticker, start=None, end=None, bucket="day", limit=100, offset=0, path=None):
+    """
+    ค่าเฉลี่ย sentiment และจำนวนต่อ label ของ ticker แยกตาม bucket ในช่วง [start, end)
+    ข่าวที่ลงซ้ำหลายสำนัก (cluster_id เดียวกัน) นับเป็นข่าวเดียวในค่าเฉลี่ยและจำนวนต่อ label
+    (label ของข่าวนั้นคิดจากค่าเฉลี่ยของทุกสำเนา ตามเกณฑ์ ±0.1 เดียวกับ scorers.polarity_label)
+    คืน (จำนวน bucket ทั้งหมด, list ของ bucket ในหน้านั้น)
+    """
+    if bucket not in BUCKET_FORMATS:
+        raise ValueError(f"Unsupported bucket '{bucket}', use one of {list(BUCKET_FORMATS)}")
+
+    where = ["ticker = ?"]
+    params = [ticker]
+    if start is not None:
+        where.append("published_at >= ?")
+        params.append(to_utc_string(start))
+    if end is not None:
+        where.append("published_at < ?")
+        params.append(to_utc_string(end))
+    where_sql = " AND ".join(where)
+    bucket_sql = f"strftime('{BUCKET_FORMATS[bucket]}', published_at)"
+
+    conn = get_connection(path)
+    total = conn.execute(
+        f"SELECT COUNT(DISTINCT {bucket_sql}) FROM news_sentiment WHERE {where_sql}", params
+    ).fetchone()[0]
+
+    rows = conn.execute(
+        f"""
+        WITH stories AS (
+            SELECT {bucket_sql} AS bucket,
+                   COUNT(*) AS copies,
+                   AVG(sentiment) AS sentiment
+            FROM news_sentiment
+            WHERE {where_sql}
+            GROUP BY bucket, COALESCE(cluster_id, 'row_' || id)
+        )
+        SELECT bucket,
+               SUM(copies) AS total_articles,
+               COUNT(*) AS total_stories,
+               AVG(sentiment) AS average_sentiment,
+               SUM(sentiment > 0.1) AS positive,
+               SUM(sentiment BETWEEN -0.1 AND 0.1) AS neutral,
+               SUM(sentiment < -0.1) AS negative
+        FROM stories
+        GROUP BY bucket
+        ORDER BY bucket
+        LIMIT ? OFFSET ?
+        """,
+        params + [limit, offset],
+    ).fetchall()
+    return total, [dict(row) for row in rows]
+
+
+def insert_submissions(submissions, path=None):
+    """
+    บันทึกผลลัพธ์รวม (Micro-Payload) หลายรายการใน transaction เดียว
+    submissions: list ของ dict ตาม SentimentData (analysis_id ซ้ำจะเขียนทับ)
+    """
+    received_at = to_utc_string(datetime.now(timezone.utc))
+    rows = [
+        (
+            item["analysis_id"],
+            to_utc_string(item["analysis_date"]),
+            item["keyword"],
+            int(item["total_articles"]),
+            float(item["average_sentiment"]),
+            item["overall_label"],
+            received_at,
+            item.get("lexicon_version"),
+        )
+        for item in submissions
+    ]
+    conn = get_connection(path)
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO sentiment_submissions "
+            "(analysis_id, analysis_date, keyword, total_articles, average_sentiment, overall_label, "
+            "received_at, lexicon_version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+class BatchWriter:
+    """
+    Write-behind buffer: รับรายการเข้าหน่วยความจำแล้วให้ thread เบื้องหลังเขียนลงฐานข้อมูลเป็นก้อน
+    flush เมื่อครบ flush_size รายการ หรือทุก flush_interval วินาที แล้วแต่อย่างไหนถึงก่อน
+    """
+    def __init__(self, write_fn, flush_size=200, flush_interval=1.0, max_buffer=50_000):
+        self.write_fn = write_fn
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffer = []
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.written = 0
+        self.failed = 0
+
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="batch-writer", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """หยุด thread และเขียนรายการที่ค้างให้หมด"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+
+    def add(self, item):
+        self.add_many([item])
+
+    def add_many(self, items):
+        with self.condition:
+            if len(self.buffer) + len(items) > self.max_buffer:
+                raise OverflowError("Write buffer is full")
+            self.buffer.extend(items)
+            if len(self.buffer) >= self.flush_size:
+                self.condition.notify()
+
+    def pending(self):
+        with self.condition:
+            return len(self.buffer)
+
+    def flush(self):
+        """เขียนรายการที่อยู่ใน buffer ตอนนี้ทั้งหมด"""
+        with self.condition:
+            batch, self.buffer = self.buffer, []
+        if not batch:
+            return 0
+        try:
+            self.write_fn(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"⚠️ Batch write failed ({len(batch)} rows): {e}")
+        return len(batch)
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            with self.condition:
+                while self.running and len(self.buffer) < self.flush_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                if not self.running:
+                    return
+            self.flush()
+            deadline = time.monotonic() + self.flush_interval
@@ -1,12 +1,11 @@
 import requests
 from bs4 import BeautifulSoup
-from textblob import TextBlob
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, date
 import xml.etree.ElementTree as ET
-from pythainlp.tokenize import word_tokenize
-from pythainlp.corpus import thai_stopwords
+from thai_lexicon import THAI_SENTIMENT_LEXICON, THAI_STOPWORDS, analyze_sentiment_lexicon
+from sources import NewsRecord, score_records
 import json
 import os
 from collections import Counter
@@ -14,45 +13,6 @@ from collections import Counter
 # ตั้งค่า matplotlib ให้รองรับภาษาไทย
 plt.rcParams['font.family'] = 'TH Sarabun New'  # หรือ 'Tahoma'
 
-# ขยาย Thai Sentiment Lexicon ให้ครอบคลุมมากขึ้น
-THAI_SENTIMENT_LEXICON = {
-    # คำเชิงบวกมาก (0.8 - 1.0)
-    "ดีเยี่ยม": 1.0, "เยี่ยมยอด": 1.0, "สุดยอด": 1.0, "ยอดเยี่ยม": 1.0, 
-    "เจริญ": 0.9, "รุ่งเรือง": 0.9, "เติบโต": 0.9, "พุ่ง": 0.9, "ทะยาน": 0.9,
-    "สำเร็จ": 0.8, "ชนะ": 0.8, "ได้": 0.8, "ดี": 0.8, "เยี่ยม": 0.9,
-    
-    # คำเชิงบวกปานกลาง (0.4 - 0.7)
-    "ชอบ": 0.7, "พอใจ": 0.7, "ยินดี": 0.7, "ดีใจ": 0.7, "สดใส": 0.7,
-    "ขึ้น": 0.6, "เพิ่ม": 0.6, "ดีขึ้น": 0.6, "ฟื้นตัว": 0.6, "แข็งแกร่ง": 0.6,
-    "มั่นคง": 0.5, "ราบรื่น": 0.5, "ปกติ": 0.4, "โอเค": 0.4,
-    
-    # คำเชิงลบมาก (-0.8 ถึง -1.0)
-    "แย่มาก": -1.0, "ล้มเหลว": -1.0, "เจ๊ง": -1.0, "ล่มสลาย": -1.0, "วิกฤต": -1.0,
-    "ทุจริต": -0.9, "โกง": -0.9, "ฉ้อโกง": -0.9, "คอร์รัปชั่น": -0.9, "หลอกลวง": -0.9,
-    "ขาดทุน": -0.9, "ตกต่ำ": -0.9, "ย่ำแย่": -0.9, "ตกกระป๋อง": -0.9, "ดิ่ง": -0.9,
-    "แย่": -0.8, "สแกม": -0.8, "สแกมเมอร์": -0.8, "เสีย": -0.8, "เลวร้าย": -0.8,
-    
-    # คำเชิงลบปานกลาง (-0.4 ถึง -0.7)
-    "ปัญหา": -0.7, "กังวล": -0.7, "ห่วง": -0.7, "เสี่ยง": -0.7, "อันตราย": -0.7,
-    "ลดลง": -0.6, "ลด": -0.6, "หด": -0.6, "ตก": -0.6, "ลง": -0.6,
-    "อ่อนแอ": -0.5, "ชะลอ": -0.5, "ซบเซา": -0.5, "ซึม": -0.5, "ติดขัด": -0.5,
-    "แพง": -0.4, "เหนื่อย": -0.4, "ยาก": -0.4,
-    
-    # คำเกี่ยวกับเศรษฐกิจและการเงิน
-    "กำไร": 0.8, "รายได้": 0.6, "เงินทุน": 0.5, "ลงทุน": 0.5,
-    "หนี้": -0.6, "ขาดดุล": -0.7, "เงินเฟ้อ": -0.6, "ว่างงาน": -0.7,
-    
-    # คำเกี่ยวกับหุ้น
-    "แกว่ง": 0.0, "คาดการณ์": 0.0, "ประเมิน": 0.0, "วิเคราะห์": 0.0,
-    "ขาย": -0.3, "ถือ": 0.1, "ซื้อ": 0.4, "แนะนำซื้อ": 0.7,
-    
-    # คำเสริมความหมาย (Intensifiers)
-    "มาก": 1.2, "มากมาย": 1.2, "สุด": 1.3, "ที่สุด": 1.3, "เกินไป": 1.2,
-    "ไม่": -1.5, "ไม่ใช่": -1.5, "ไม่ได้": -1.5,
-}
-
-THAI_STOPWORDS = set(thai_stopwords())
-
 def get_google_news(keyword, lang="th", max_results=100):
     """
     ดึงข่าวล่าสุดจาก Google News
@@ -103,121 +63,33 @@ def get_google_news(keyword, lang="th", max_results=100):
 
 def parse_news(news_list):
     """
-    แปลงข้อมูลข่าวให้อยู่ในรูปแบบที่ใช้งานง่าย
+    แปลงข้อมูลข่าวเป็น NewsRecord (record เดียวกันตั้งแต่ดึงข่าวจนถึงบันทึกผล)
     """
-    parsed_news = []
-    
-    for news_item in news_list:
-        title = news_item['title']
-        pub_date_str = news_item['pubDate']
-        keyword = news_item.get('keyword', 'N/A')
-        source = news_item.get('source', 'N/A')
-        link = news_item.get('link', 'N/A')
-
-        try:
-            dt = datetime.strptime(pub_date_str, '%a, %d %b %Y %H:%M:%S %Z')
-            current_date = dt.strftime("%Y-%m-%d")
-            time_str = dt.strftime("%H:%M:%S")
-        except ValueError:
-            current_date = date.today().strftime("%Y-%m-%d")
-            time_str = "N/A"
-
-        parsed_news.append({
-            'keyword': keyword,
-            'date': current_date,
-            'time': time_str,
-            'title': title,
-            'source': source,
-            'link': link
-        })
+    return [NewsRecord.from_rss(news_item, news_item.get('keyword', 'N/A')) for news_item in news_list]
 
-    return parsed_news
-
-def analyze_sentiment_lexicon(title):
+def analyze_sentiment(records):
     """
-    วิเคราะห์ sentiment ด้วย Lexicon-based approach (ปรับปรุงแล้ว)
+    วิเคราะห์ sentiment ของข่าวทั้งหมด (แก้ค่าใน record โดยตรง)
     """
-    # 1. Tokenization
-    tokens = word_tokenize(title, engine='newmm')
-    
-    # 2. คำนวณคะแนน
-    total_score = 0
-    word_count = 0
-    matched_words = []
-    
-    # ตรวจสอบ negation (ไม่, ไม่ใช่, ไม่ได้)
-    negation = False
-    negation_words = ['ไม่', 'ไม่ใช่', 'ไม่ได้', 'มิ', 'มิใช่']
-    
-    for i, token in enumerate(tokens):
-        token = token.strip()
-        
-        # ข้าม stopwords และคำสั้นเกินไป
-        if not token or len(token) < 2:
-            continue
-        
-        # เช็ค negation
-        if token in negation_words:
-            negation = True
-            continue
-        
-        # ข้าม stopwords ทั่วไป (แต่ไม่ข้าม sentiment words)
-        if token in THAI_STOPWORDS and token not in THAI_SENTIMENT_LEXICON:
-            continue
-        
-        # หาคะแนนจาก lexicon
-        score = THAI_SENTIMENT_LEXICON.get(token, 0)
-        
-        if score != 0:
-            # ถ้าเจอคำปฏิเสธก่อนหน้า ให้กลับเครื่องหมาย
-            if negation:
-                score = -score
-                negation = False
-            
-            # เช็คคำเสริมความหมาย (intensifiers) ข้างหลัง
-            if i + 1 < len(tokens):
-                next_token = tokens[i + 1].strip()
-                intensifier = THAI_SENTIMENT_LEXICON.get(next_token, 1.0)
-                if intensifier > 1.0:  # เป็น intensifier
-                    score = score * (intensifier / 1.0)
-            
-            total_score += score
-            word_count += 1
-            matched_words.append(f"{token}({score:.2f})")
-    
-    # คำนวณ polarity เฉลี่ย
-    polarity = total_score / word_count if word_count > 0 else 0
-    
-    # จำกัดช่วงคะแนน
-    polarity = max(-1.0, min(1.0, polarity))
-    
-    # กำหนด label
-    if polarity > 0.1:
-        label = 'positive'
-    elif polarity < -0.1:
-        label = 'negative'
-    else:
-        label = 'neutral'
-    
-    return polarity, label, matched_words
+    return score_records(records)
 
-def analyze_sentiment(parsed_news):
+def news_frame(records):
     """
-    วิเคราะห์ sentiment ของข่าวทั้งหมด
+    DataFrame สำหรับ save_results / plot_sentiment (คอลัมน์เดิมของไฟล์นี้)
     """
-    analyzed_news = []
-    
-    for news in parsed_news:
-        title = news['title']
-        polarity, label, matched_words = analyze_sentiment_lexicon(title)
-        
-        news['sentiment'] = polarity
-        news['sentiment_label'] = label
-        news['matched_words'] = ', '.join(matched_words) if matched_words else 'ไม่มี'
-        
-        analyzed_news.append(news)
-    
-    return analyzed_news
+    return pd.DataFrame({
+        'keyword': [r.keyword for r in records],
+        'date': [r.published_at.strftime("%Y-%m-%d") if r.published_at else date.today().strftime("%Y-%m-%d")
+                 for r in records],
+        'time': [r.published_at.strftime("%H:%M:%S") if r.published_at else "N/A" for r in records],
+        'title': [r.title for r in records],
+        'source': [r.publisher or 'N/A' for r in records],
+        'link': [r.url or 'N/A' for r in records],
+        'sentiment': [r.sentiment for r in records],
+        'sentiment_label': [r.sentiment_label for r in records],
+        'matched_words': [r.matched_words for r in records],
+        'lexicon_version': [r.lexicon_version for r in records],
+    })
 
 def save_results(df, keyword, output_dir='results'):
     """
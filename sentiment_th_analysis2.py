@@ -1,47 +1,17 @@
 import requests
 from bs4 import BeautifulSoup
-from textblob import TextBlob
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, date
 import xml.etree.ElementTree as ET
-from pythainlp.tokenize import word_tokenize
-from pythainlp.corpus import thai_stopwords
 import json
 import os
+import thai_lexicon
+from thai_lexicon import THAI_SENTIMENT_LEXICON, THAI_STOPWORDS, analyze_sentiment_lexicon
 
 # ตั้งค่า matplotlib ให้รองรับภาษาไทย
 plt.rcParams['font.family'] = 'TH Sarabun New'
 
-# ขยาย Thai Sentiment Lexicon
-THAI_SENTIMENT_LEXICON = {
-    # คำเชิงบวกมาก (0.8-1.0)
-    "ดีเยี่ยม": 1.0, "เยี่ยมยอด": 1.0, "สุดยอด": 1.0, "ยอดเยี่ยม": 1.0, 
-    "เจริญ": 0.9, "รุ่งเรือง": 0.9, "เติบโต": 0.9, "พุ่ง": 0.9, "ทะยาน": 0.9,
-    "สำเร็จ": 0.8, "ชนะ": 0.8, "ดี": 0.8, "เยี่ยม": 0.9, "ยอด": 0.8,
-    # คำเชิงบวกปานกลาง (0.4-0.7)
-    "ชอบ": 0.7, "พอใจ": 0.7, "ยินดี": 0.7, "ดีใจ": 0.7, "สดใส": 0.7,
-    "ขึ้น": 0.6, "เพิ่ม": 0.6, "ดีขึ้น": 0.6, "ฟื้นตัว": 0.6, "แข็งแกร่ง": 0.6,
-    "มั่นคง": 0.5, "ราบรื่น": 0.5,
-    # คำเชิงลบมาก (-0.8 ถึง -1.0)
-    "แย่มาก": -1.0, "ล้มเหลว": -1.0, "เจ๊ง": -1.0, "ล่มสลาย": -1.0, "วิกฤต": -1.0,
-    "ทุจริต": -0.9, "โกง": -0.9, "ฉ้อโกง": -0.9, "หลอกลวง": -0.9,
-    "ขาดทุน": -0.9, "ตกต่ำ": -0.9, "ย่ำแย่": -0.9, "ดิ่ง": -0.9,
-    "แย่": -0.8, "สแกม": -0.8, "สแกมเมอร์": -0.8, "เสีย": -0.8, "เลวร้าย": -0.8,
-    # คำเชิงลบปานกลาง (-0.4 ถึง -0.7)
-    "ปัญหา": -0.7, "กังวล": -0.7, "ห่วง": -0.7, "เสี่ยง": -0.7, "อันตราย": -0.7,
-    "ลดลง": -0.6, "ลด": -0.6, "หด": -0.6, "ตก": -0.6, "ลง": -0.6,
-    "อ่อนแอ": -0.5, "ชะลอ": -0.5, "ซบเซา": -0.5, "ติดขัด": -0.5,
-    # เศรษฐกิจและการเงิน
-    "กำไร": 0.8, "รายได้": 0.6, "ลงทุน": 0.5,
-    "หนี้": -0.6, "ขาดดุล": -0.7, "เงินเฟ้อ": -0.6, "ว่างงาน": -0.7,
-    # หุ้น
-    "ขาย": -0.3, "ถือ": 0.1, "ซื้อ": 0.4, "แนะนำซื้อ": 0.7,
-    # คำเสริม
-    "มาก": 1.2, "สุด": 1.3, "ที่สุด": 1.3, "ไม่": -1.5,
-}
-
-THAI_STOPWORDS = set(thai_stopwords())
 
 def get_google_news(keyword, lang="th", max_results=100):
     """ดึงข่าวล่าสุดจาก Google News"""
@@ -100,48 +70,16 @@ def parse_news(news_list):
         })
     return parsed_news
 
-def analyze_sentiment_lexicon(title):
-    """วิเคราะห์ sentiment ด้วย Lexicon"""
-    tokens = word_tokenize(title, engine='newmm')
-    total_score, word_count = 0, 0
-    matched_words, negation = [], False
-    
-    for i, token in enumerate(tokens):
-        token = token.strip()
-        if not token or len(token) < 2:
-            continue
-        if token in ['ไม่', 'ไม่ใช่', 'ไม่ได้', 'มิ']:
-            negation = True
-            continue
-        if token in THAI_STOPWORDS and token not in THAI_SENTIMENT_LEXICON:
-            continue
-        
-        score = THAI_SENTIMENT_LEXICON.get(token, 0)
-        if score != 0:
-            if negation:
-                score = -score
-                negation = False
-            if i + 1 < len(tokens):
-                next_token = tokens[i + 1].strip()
-                intensifier = THAI_SENTIMENT_LEXICON.get(next_token, 1.0)
-                if intensifier > 1.0:
-                    score *= (intensifier / 1.0)
-            total_score += score
-            word_count += 1
-            matched_words.append(f"{token}({score:.2f})")
-    
-    polarity = max(-1.0, min(1.0, total_score / word_count if word_count > 0 else 0))
-    label = 'positive' if polarity > 0.1 else 'negative' if polarity < -0.1 else 'neutral'
-    return polarity, label, matched_words
-
 def analyze_sentiment(parsed_news):
     """วิเคราะห์ sentiment ทั้งหมด"""
     analyzed_news = []
+    lexicon = thai_lexicon.get_lexicon()
     for news in parsed_news:
-        polarity, label, matched = analyze_sentiment_lexicon(news['title'])
+        polarity, label, matched = analyze_sentiment_lexicon(news['title'], lexicon=lexicon)
         news['sentiment'] = polarity
         news['sentiment_label'] = label
         news['matched_words'] = ', '.join(matched) if matched else 'ไม่มี'
+        news['lexicon_version'] = lexicon.version
         analyzed_news.append(news)
     return analyzed_news
 
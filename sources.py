@@ -0,0 +1,269 @@
+import asyncio
+import sys
+from datetime import datetime
+import pandas as pd
+import scorers
+from rss_parser import parse_rfc822
+from meili_json import make_document_id, content_hash
+
+class NewsRecord:
+    """
+    Record กลางของทุกแหล่งข่าว (Google News, crawl4ai, Facebook, HTML)
+    ใช้ __slots__ เพื่อไม่ให้แต่ละ record มี __dict__ ของตัวเอง
+    และ intern ค่าที่ซ้ำกันทุก record (source, keyword, publisher) ให้ชี้ string ตัวเดียวกัน
+    """
+    __slots__ = ('source', 'keyword', 'title', 'content', 'url', 'published_at', 'publisher',
+                 'weight', 'sentiment', 'sentiment_label', 'matched_words', 'lexicon_version', 'cluster_id')
+
+    FIELDS = __slots__
+
+    def __init__(self, source, keyword, title, content=None, url=None, published_at=None, weight=1.0,
+                 publisher=None):
+        self.source = _intern(source)
+        self.keyword = _intern(keyword)
+        self.publisher = _intern(publisher)
+        self.title = title
+        self.content = content
+        self.url = url
+        self.published_at = published_at
+        self.weight = weight
+        self.sentiment = None
+        self.sentiment_label = None
+        self.matched_words = None
+        self.lexicon_version = None
+        self.cluster_id = None
+
+    @classmethod
+    def from_rss(cls, item, keyword, source='google_news'):
+        """สร้างจาก dict ของ rss_parser ('N/A' = ไม่มีค่า)"""
+        link = item.get('link')
+        publisher = item.get('source')
+        return cls(source, keyword, item.get('title'),
+                   url=link if link != 'N/A' else None,
+                   published_at=parse_rfc822(item.get('pubDate')),
+                   publisher=publisher if publisher != 'N/A' else None)
+
+    @property
+    def text(self):
+        """ข้อความที่ใช้ให้คะแนน: หัวข้อข่าว หรือเนื้อหาถ้าไม่มีหัวข้อ"""
+        return self.title or self.content or ''
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def to_article(self):
+        """รายข่าวสำหรับ payload_codec / sentiment_store"""
+        return {
+            "published_at": self.published_at.isoformat() if self.published_at else None,
+            "title": self.title,
+            "link": self.url,
+            "source": self.publisher,
+            "sentiment": round(float(self.sentiment), 4),
+            "label": self.sentiment_label,
+            "cluster_id": self.cluster_id,
+            "lexicon_version": self.lexicon_version,
+        }
+
+    def copy_score(self, other):
+        """ใช้คะแนนของ record อื่น (เช่นตัวแทนกลุ่มข่าวซ้ำ) โดยไม่ต้องให้คะแนนใหม่"""
+        self.sentiment = other.sentiment
+        self.sentiment_label = other.sentiment_label
+        self.matched_words = other.matched_words
+        self.lexicon_version = other.lexicon_version
+
+    def to_document(self):
+        """แปลงเป็นเอกสารสำหรับ Meilisearch (id มาจาก URL ถ้ามี)"""
+        doc = self.to_dict()
+        doc['id'] = make_document_id(self.url) if self.url else 'rec_' + content_hash(self.text)[:40]
+        doc['content_hash'] = content_hash(self.content or self.title)
+        if isinstance(self.published_at, datetime):
+            doc['published_at'] = self.published_at.isoformat()
+        return doc
+
+    def __repr__(self):
+        return f"NewsRecord(source={self.source!r}, keyword={self.keyword!r}, text={self.text[:40]!r})"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class SourceAdapter:
+    """
+    Interface ของแหล่งข่าว: subclass ต้อง implement fetch(keyword) -> list[NewsRecord]
+    ถ้าแหล่งข่าวเป็น async อยู่แล้วให้ override afetch แทน
+    """
+    name = 'base'
+
+    def fetch(self, keyword):
+        raise NotImplementedError
+
+    async def afetch(self, keyword):
+        # adapter แบบ blocking (requests/selenium) รันใน thread เพื่อไม่บล็อก event loop
+        return await asyncio.to_thread(self.fetch, keyword)
+
+
+class GoogleNewsSource(SourceAdapter):
+    """Google News RSS (google_sentiment.get_google_news)"""
+    name = 'google_news'
+
+    def __init__(self, lang="th", limit=20):
+        self.lang = lang
+        self.limit = limit
+
+    def fetch(self, keyword):
+        from google_sentiment import get_google_news
+
+        return [
+            NewsRecord.from_rss(item, keyword, self.name)
+            for item in get_google_news(keyword, lang=self.lang, limit=self.limit)
+        ]
+
+
+class HtmlSource(SourceAdapter):
+    """หน้า HTML ธรรมดา (scraper_python.scrape) urls_by_keyword: {keyword: [url, ...]}"""
+    name = 'html'
+
+    def __init__(self, urls_by_keyword):
+        self.urls_by_keyword = urls_by_keyword
+
+    def fetch(self, keyword):
+        from scraper_python import scrape
+
+        records = []
+        for url in self.urls_by_keyword.get(keyword, []):
+            try:
+                title, text, link = scrape(url)
+            except Exception as e:
+                print(f"❌ Error scraping {url}: {e}")
+                continue
+            records.append(NewsRecord(self.name, keyword, title, content=text, url=url))
+        return records
+
+
+def post_title(text, limit=120):
+    """หัวข้อของโพสต์ที่ไม่มีหัวข้อ: บรรทัดแรกของข้อความ ตัดไม่เกิน limit ตัวอักษร"""
+    line = text.strip().split('\n', 1)[0].strip()
+    return line if len(line) <= limit else line[:limit - 1].rstrip() + '…'
+
+
+class FacebookSource(SourceAdapter):
+    """เพจ Facebook ผ่าน FacebookScraperPool pages_by_keyword: {keyword: [page_url, ...]}"""
+    name = 'facebook'
+
+    def __init__(self, pool, pages_by_keyword, max_posts=30):
+        self.pool = pool
+        self.pages_by_keyword = pages_by_keyword
+        self.max_posts = max_posts
+
+    def fetch(self, keyword):
+        from fb_sentiment import parse_engagement, parse_post_time, engagement_weight
+
+        records = []
+        now = datetime.now()
+        for page in self.pages_by_keyword.get(keyword, []):
+            for post in self.pool.scrape_profile(page, self.max_posts):
+                weight = engagement_weight(parse_engagement(post.get('likes')),
+                                           parse_engagement(post.get('comments')),
+                                           parse_engagement(post.get('shares')))
+                text = (post.get('post_text') or '').strip()
+                if not text:
+                    continue
+                # url = permalink ของโพสต์ (ไม่มี = None ให้ to_document ใช้ hash ของข้อความแทน)
+                # ห้ามใช้ url ของเพจ ไม่งั้นทุกโพสต์ในเพจได้ id เดียวกันใน Meilisearch
+                records.append(NewsRecord(self.name, keyword, post_title(text), content=text,
+                                          url=post.get('permalink'),
+                                          published_at=parse_post_time(post.get('post_time'), now=now),
+                                          weight=weight))
+        return records
+
+
+class Crawl4aiSource(SourceAdapter):
+    """บทความผ่าน crawl4ai (Markdown) urls_by_keyword: {keyword: [url, ...]}"""
+    name = 'crawl4ai'
+
+    def __init__(self, urls_by_keyword):
+        self.urls_by_keyword = urls_by_keyword
+
+    def fetch(self, keyword):
+        return asyncio.run(self.afetch(keyword))
+
+    async def afetch(self, keyword):
+        from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
+        from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+
+        config = CrawlerRunConfig(
+            markdown_generator=DefaultMarkdownGenerator(content_source="cleaned_html",
+                                                        options={"ignore_links": True}),
+            excluded_tags=['form', 'header', 'footer', 'nav'],
+            verbose=False,
+        )
+        urls = self.urls_by_keyword.get(keyword, [])
+        if not urls:
+            return []
+
+        records = []
+        async with AsyncWebCrawler() as crawler:
+            results = await crawler.arun_many(urls=urls, config=config)
+            for result in results:
+                if not result.success:
+                    print(f"❌ Crawl failed: {result.url}")
+                    continue
+                title = (result.metadata or {}).get('title')
+                records.append(NewsRecord(self.name, keyword, title, content=str(result.markdown),
+                                          url=result.url, published_at=datetime.now()))
+        return records
+
+
+async def run_sources(adapters, keywords, max_concurrency=8):
+    """
+    รันทุก adapter x ทุก keyword พร้อมกัน (จำกัดจำนวนงานพร้อมกันด้วย semaphore)
+    คืน list ของ NewsRecord รวมจากทุกแหล่ง
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(adapter, keyword):
+        async with semaphore:
+            try:
+                return await adapter.afetch(keyword)
+            except Exception as e:
+                print(f"❌ {adapter.name} failed for '{keyword}': {e}")
+                return []
+
+    batches = await asyncio.gather(*(run_one(a, kw) for a in adapters for kw in keywords))
+    return [record for batch in batches for record in batch]
+
+
+def collect(adapters, keywords, max_concurrency=8):
+    """เวอร์ชัน sync ของ run_sources"""
+    return asyncio.run(run_sources(adapters, keywords, max_concurrency=max_concurrency))
+
+
+def score_records(records, batch_size=64, lexicon=None, scorer=None):
+    """
+    ให้คะแนน sentiment ของ records (แก้ค่าใน record โดยตรง ไม่สร้างสำเนา)
+    scorer: scorers.Scorer ที่จะใช้ (ค่าเริ่มต้นคือ scorers.get_scorer() หรือ lexicon ที่ระบุ)
+    """
+    if scorer is None:
+        scorer = scorers.LexiconScorer(lexicon, batch_size) if lexicon else scorers.get_scorer()
+    return apply_scores(records, scorer.score_batch([record.text for record in records]))
+
+
+def apply_scores(records, results):
+    """ใส่ผลของ Scorer.score_batch (4-tuple ตามลำดับเดียวกับ records) ลงใน records"""
+    for record, (polarity, label, matched_words, version) in zip(records, results):
+        record.lexicon_version = version
+        record.sentiment = polarity
+        record.sentiment_label = label
+        record.matched_words = ', '.join(matched_words) if matched_words else 'ไม่มี'
+    return records
+
+
+def records_to_frame(records):
+    """แปลง records เป็น DataFrame (คอลัมน์ละ list ไม่ผ่าน dict ต่อแถว)"""
+    return pd.DataFrame({field: [getattr(r, field) for r in records] for field in NewsRecord.FIELDS})
+
+
+def records_to_documents(records):
+    """แปลง records เป็นเอกสารสำหรับส่งเข้า Meilisearch (meili_json.send_changed_documents)"""
+    return [record.to_document() for record in records]
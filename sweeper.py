@@ -0,0 +1,122 @@
+import argparse
+import heapq
+import random
+import time
+from datetime import datetime
+from rss_parser import parse_rfc822
+import google_sentiment
+import thai_lexicon
+import english_lexicon
+from feed_poller import FeedPoller
+from sentiment_aggregates import SentimentAggregator
+
+# หุ้นที่ติดตามอยู่ (ชุดเดียวกับไฟล์ *_thai_sentiment.csv ที่เก็บไว้)
+WATCHLIST = [
+    "AIS", "KBANK", "SCB", "CPALL", "PTTEP", "GULF", "TISCO", "ADVANCE",
+    "ทิสโก้", "ปริ๊นซ์ กรุ๊ป",
+]
+
+class WatchlistSweeper:
+    """
+    Daemon ที่วนวิเคราะห์ sentiment ของ watchlist ตามรอบเวลา
+    - เริ่มแต่ละ ticker แบบเหลื่อมเวลากัน (stagger) ไม่ยิงพร้อมกันทีเดียว
+    - สุ่ม jitter ทุกรอบ
+    - ticker ที่มีข่าวใหม่เยอะจะถูก poll ถี่ขึ้น ticker ที่เงียบจะห่างขึ้น (ปรับโดย FeedPoller)
+    - ไม่มีข่าวใหม่ (หรือ feed ตอบ 304) จะไม่วิเคราะห์ซ้ำ
+    ผลลัพธ์ถูกส่งเข้า /api/sentiment ผ่าน google_sentiment.main
+    """
+    def __init__(self, watchlist=None, interval=900, min_interval=120, max_interval=3600, jitter=0.2, lang="th"):
+        self.watchlist = list(watchlist or WATCHLIST)
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.poller = FeedPoller(lang=lang, interval=interval, min_interval=min_interval, max_interval=max_interval)
+        self.aggregator = SentimentAggregator()
+        self.queue = []
+        self.running = False
+
+        # กระจายเวลาเริ่มของแต่ละ ticker ให้เท่ากันตลอดหนึ่งรอบ
+        now = time.monotonic()
+        step = interval / max(len(self.watchlist), 1)
+        for i, ticker in enumerate(self.watchlist):
+            heapq.heappush(self.queue, (now + i * step, ticker))
+
+    def with_jitter(self, seconds):
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def poll(self, ticker):
+        """
+        ดึง feed ของ ticker ถ้ามีข่าวใหม่จึงวิเคราะห์และส่งผล คืนจำนวนข่าวใหม่
+        """
+        news_list, new_items = self.poller.poll(ticker)
+        if not new_items:
+            return 0
+
+        try:
+            df = google_sentiment.main(ticker, news_table=news_list)
+        except Exception as e:
+            print(f"❌ Sweep failed for '{ticker}': {e}")
+            return len(new_items)
+
+        if df is not None:
+            self.record(ticker, df, new_items)
+        return len(new_items)
+
+    def record(self, ticker, df, new_items):
+        """
+        เพิ่มเฉพาะข่าวใหม่เข้า rolling aggregate (ข่าวเดิมนับไปแล้วในรอบก่อน)
+        """
+        published = {item['title']: item['pubDate'] for item in new_items}
+        for row in df[df['title'].isin(published)].itertuples(index=False):
+            ts = parse_rfc822(published[row.title])
+            self.aggregator.add(ticker, row.sentiment, row.label, ts)
+
+    def run_once(self):
+        """
+        รอจนถึงคิวถัดไป poll หนึ่ง ticker แล้วจัดคิวใหม่
+        """
+        due, ticker = heapq.heappop(self.queue)
+        wait = due - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        # ไฟล์ lexicon ถูกแก้ระหว่างรอ -> ใช้ version ใหม่ตั้งแต่รอบนี้
+        thai_lexicon.lexicon_manager.maybe_reload()
+        english_lexicon.lexicon_manager.maybe_reload()
+        new_items = self.poll(ticker)
+        interval = self.with_jitter(self.poller.next_interval(ticker))
+        heapq.heappush(self.queue, (time.monotonic() + interval, ticker))
+
+        day = self.aggregator.query(ticker, '1d')
+        day_mean = f"{day['mean']:.3f}" if day['mean'] is not None else "n/a"
+        print(f"[{datetime.now().isoformat(timespec='seconds')}] {ticker}: "
+              f"{new_items} new, 1d mean {day_mean} ({day['count']} items), next poll in {interval:.0f}s")
+        return ticker, new_items
+
+    def run_forever(self):
+        self.running = True
+        while self.running and self.queue:
+            self.run_once()
+
+    def stop(self):
+        self.running = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scheduled watchlist sentiment sweeper")
+    parser.add_argument("--tickers", help="comma separated tickers (default: built-in watchlist)")
+    parser.add_argument("--interval", type=float, default=900, help="base polling interval in seconds")
+    parser.add_argument("--min-interval", type=float, default=120)
+    parser.add_argument("--max-interval", type=float, default=3600)
+    parser.add_argument("--jitter", type=float, default=0.2, help="random +/- fraction applied to every interval")
+    parser.add_argument("--lang", default="th", choices=["th", "en"], help="Google News edition to poll")
+    args = parser.parse_args()
+
+    tickers = [t.strip() for t in args.tickers.split(",")] if args.tickers else None
+    sweeper = WatchlistSweeper(tickers, interval=args.interval, min_interval=args.min_interval,
+                               max_interval=args.max_interval, jitter=args.jitter, lang=args.lang)
+    try:
+        sweeper.run_forever()
+    except KeyboardInterrupt:
+        print("Sweeper stopped.")
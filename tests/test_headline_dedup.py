@@ -0,0 +1,47 @@
+import itertools
+
+import headline_dedup
+
+SAME_STORY = [
+    "ธนาคารกสิกรไทยประกาศกำไรไตรมาส 3 เติบโต 25% - มิติหุ้น",
+    "ธนาคารกสิกรไทย ประกาศกำไรไตรมาส 3 เติบโต 25% - ThaiPost",
+    "ธนาคารกสิกรไทยประกาศกำไรไตรมาส 3 เติบโต 25%! - ข่าวหุ้นธุรกิจออนไลน์",
+]
+OTHER = "ปตท.สผ. เดินหน้าลงทุนแหล่งก๊าซใหม่ คาดรายได้เติบโตต่อเนื่อง - efinanceThai"
+
+
+def ids_by_title(titles):
+    cluster_ids, _ = headline_dedup.cluster_headlines(titles)
+    return dict(zip(titles, cluster_ids))
+
+
+def test_near_duplicates_share_one_cluster():
+    cluster_ids, representatives = headline_dedup.cluster_headlines(SAME_STORY + [OTHER])
+    assert len(set(cluster_ids[:3])) == 1
+    assert cluster_ids[3] != cluster_ids[0]
+    assert representatives == [0, 0, 0, 3]
+
+
+def test_cluster_id_does_not_depend_on_feed_order():
+    expected = ids_by_title(SAME_STORY + [OTHER])
+    for order in itertools.permutations(SAME_STORY + [OTHER]):
+        assert ids_by_title(list(order)) == expected
+
+
+def test_cluster_id_is_stable_across_polls():
+    # รอบถัดไปได้แค่บางสำเนา ตัวที่เหลือยังได้ id เดิมถ้าหัวข่าวที่น้อยที่สุดยังอยู่
+    first = ids_by_title(SAME_STORY)
+    second = ids_by_title(list(reversed(SAME_STORY)))
+    assert first == second
+
+
+def test_different_numbers_are_different_stories():
+    titles = ["ค่าเงินบาทเปิดตลาดเช้าวันที่ 26 อ่อนค่า - มิติหุ้น",
+              "ค่าเงินบาทเปิดตลาดเช้าวันที่ 28 อ่อนค่า - มิติหุ้น"]
+    cluster_ids, _ = headline_dedup.cluster_headlines(titles)
+    assert cluster_ids[0] != cluster_ids[1]
+
+
+def test_strip_source_suffix():
+    assert headline_dedup.strip_source_suffix("หุ้นไทยปิดบวก 10 จุด - มิติหุ้น") == "หุ้นไทยปิดบวก 10 จุด"
+    assert headline_dedup.strip_source_suffix("สั้น - x") == "สั้น - x"
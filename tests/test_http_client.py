@@ -0,0 +1,169 @@
+from unittest import mock
+
+import pytest
+import requests
+
+import http_client
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_client.time, "monotonic", clock)
+    monkeypatch.setattr(http_client.time, "sleep", clock.sleep)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(http_client, "_BREAKERS", {})
+
+
+def make_response(status=200, headers=None, body_error=None):
+    response = mock.MagicMock(status_code=status, headers=headers or {})
+    response.__enter__.return_value = response
+    if body_error:
+        response.iter_content.side_effect = body_error
+    else:
+        response.iter_content.return_value = [b"ok"]
+    return response
+
+
+def make_session(effects, **kwargs):
+    kwargs.setdefault("failure_threshold", 2)
+    kwargs.setdefault("reset_timeout", 60)
+    session = http_client.ResilientSession(**kwargs)
+    session.local.session = mock.Mock()
+    session.local.session.request.side_effect = effects
+    return session
+
+
+def read_body(response):
+    return b"".join(response.iter_content())
+
+
+def test_breaker_closed_open_half_open_closed(clock):
+    breaker = http_client.CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now += 31
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # half-open ให้ผ่านทีละคำขอ
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = http_client.CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 11
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+
+
+def test_retry_after_opens_immediately(clock):
+    breaker = http_client.CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    breaker.record_failure(retry_after=20)
+    assert breaker.state == "open"
+    assert breaker.retry_in() == pytest.approx(20)
+
+
+def test_probe_released_on_non_retryable_error(clock):
+    ok = make_response()
+    session = make_session([requests.exceptions.ConnectionError(), requests.exceptions.ConnectionError(),
+                            requests.exceptions.TooManyRedirects(), ok], retries=0, reset_timeout=0)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.get("http://feed.test/rss")
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        session.get("http://feed.test/rss")
+    assert session.get("http://feed.test/rss") is ok
+    assert http_client.get_breaker("feed.test").state == "closed"
+
+
+def test_probe_released_on_interrupt(clock):
+    breaker = http_client.get_breaker("feed.test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    session = make_session([KeyboardInterrupt(), make_response()], retries=0, failure_threshold=1)
+    with pytest.raises(KeyboardInterrupt):
+        session.get("http://feed.test/rss")
+    assert session.get("http://feed.test/rss").status_code == 200
+
+
+def test_open_breaker_fails_fast(clock):
+    session = make_session([requests.exceptions.Timeout()] * 2, retries=1)
+    with pytest.raises(requests.exceptions.Timeout):
+        session.get("http://feed.test/rss")
+    with pytest.raises(http_client.CircuitOpenError):
+        session.get("http://feed.test/rss")
+    assert session.local.session.request.call_count == 2
+
+
+def test_body_read_failure_is_counted_and_retried(clock):
+    broken = make_response(body_error=requests.exceptions.ChunkedEncodingError("truncated"))
+    session = make_session([broken, make_response()], retries=1, failure_threshold=5)
+    assert session.get("http://feed.test/rss", stream=True, consume=read_body) == b"ok"
+    assert session.local.session.request.call_count == 2
+    broken.__exit__.assert_called()
+
+
+def test_body_read_failure_opens_breaker(clock):
+    error = requests.exceptions.ConnectionError("read timed out")
+    session = make_session([make_response(body_error=error), make_response(body_error=error)], retries=1)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get("http://feed.test/rss", stream=True, consume=read_body)
+    assert http_client.get_breaker("feed.test").state == "open"
+
+
+def test_consume_error_is_not_a_host_failure(clock):
+    def parse(response):
+        raise ValueError("not xml")
+
+    session = make_session([make_response()] * 3, retries=0)
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            session.get("http://feed.test/rss", stream=True, consume=parse)
+    assert http_client.get_breaker("feed.test").state == "closed"
+
+
+def test_throttle_returns_last_response(clock):
+    throttled = make_response(503, headers={"Retry-After": "1"})
+    session = make_session([throttled, throttled], retries=1, failure_threshold=5)
+    assert session.get("http://feed.test/rss") is throttled
+    assert session.local.session.request.call_count == 2
+
+
+def test_post_is_not_retried(clock):
+    session = make_session([requests.exceptions.ConnectionError(), make_response()], retries=3)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.post("http://feed.test/api")
+    assert session.local.session.request.call_count == 1
+
+
+def test_parse_retry_after():
+    assert http_client.parse_retry_after("5") == 5.0
+    assert http_client.parse_retry_after(None) is None
+    assert http_client.parse_retry_after("soon") is None
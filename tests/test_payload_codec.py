@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import pytest
+
+import payload_codec
+
+AGGREGATE = {
+    "analysis_id": "a1",
+    "analysis_date": "2026-10-19T08:00:00",
+    "keyword": "KBANK",
+    "total_articles": 2,
+    "average_sentiment": 0.25,
+    "overall_label": "Positive",
+}
+ARTICLES = [
+    {"title": "กสิกรไทยกำไรเพิ่ม", "published_at": "2026-10-19T01:00:00", "link": "https://a.example/1",
+     "sentiment": 0.6, "label": "positive", "cluster_id": "c_1"},
+    {"title": "KBANK shares fall", "published_at": None, "link": None,
+     "sentiment": -0.1, "label": "neutral", "cluster_id": None},
+]
+
+
+def roundtrip(articles, encoding):
+    body, headers = payload_codec.encode_payload(AGGREGATE, articles, encoding=encoding)
+    return payload_codec.decode_payload(body, headers["Content-Type"], headers.get("Content-Encoding"))
+
+
+@pytest.mark.parametrize("encoding", ["ndjson", "msgpack"])
+def test_roundtrip_with_articles(encoding):
+    aggregate, articles = roundtrip(ARTICLES, encoding)
+    assert aggregate == AGGREGATE
+    assert articles == ARTICLES
+
+
+def test_msgpack_falls_back_to_ndjson_when_missing(monkeypatch):
+    monkeypatch.setattr(payload_codec, "msgpack", None)
+    body, headers = payload_codec.encode_payload(AGGREGATE, ARTICLES, encoding="msgpack")
+    assert headers["Content-Type"] == payload_codec.NDJSON_CONTENT_TYPE
+    assert payload_codec.decode_payload(body, headers["Content-Type"], "gzip") == (AGGREGATE, ARTICLES)
+
+
+def test_plain_json_has_no_articles():
+    aggregate, articles = roundtrip(None, "json")
+    assert aggregate == AGGREGATE
+    assert articles == []
+
+
+def test_json_with_news_articles():
+    body = json.dumps(dict(AGGREGATE, news_articles=ARTICLES)).encode("utf-8")
+    assert payload_codec.decode_payload(body, "application/json; charset=utf-8") == (AGGREGATE, ARTICLES)
+
+
+def test_ndjson_without_gzip():
+    lines = [json.dumps(AGGREGATE)] + [json.dumps(payload_codec.compact_article(a)) for a in ARTICLES]
+    aggregate, articles = payload_codec.decode_payload("\n".join(lines).encode("utf-8"),
+                                                       payload_codec.NDJSON_CONTENT_TYPE)
+    assert aggregate == AGGREGATE
+    assert articles == ARTICLES
+
+
+@pytest.mark.parametrize("body, content_type, encoding", [
+    (b"x", "text/plain", None),
+    (b"not gzip", payload_codec.NDJSON_CONTENT_TYPE, "gzip"),
+    (gzip.compress(b"\n"), payload_codec.NDJSON_CONTENT_TYPE, "gzip"),
+])
+def test_unsupported_or_broken_bodies(body, content_type, encoding):
+    with pytest.raises(ValueError):
+        payload_codec.decode_payload(body, content_type, encoding)
@@ -0,0 +1,92 @@
+import asyncio
+import os
+
+import pytest
+
+import google_sentiment
+import pipeline
+import sentiment_store
+
+HEADLINES = [
+    "{t} กำไรไตรมาส 3 เติบโต 25% นักวิเคราะห์แนะนำซื้อ - ข่าวหุ้นธุรกิจออนไลน์",
+    "{t} ราคาหุ้นร่วงหนัก หลังงบออกมาต่ำกว่าคาด - Thunhoon",
+    "{t} shares plunge as quarterly profit misses estimates - Bangkok Post",
+]
+
+
+def make_feed(ticker):
+    return [{"title": headline.format(t=ticker), "link": f"https://news.example.com/{ticker}/{i}",
+             "pubDate": "Wed, 20 Nov 2025 08:31:46 GMT", "source": "example"}
+            for i, headline in enumerate(HEADLINES)]
+
+
+def fetch(ticker, lang="th"):
+    if ticker == "EMPTY":
+        return []
+    if ticker == "BROKEN":
+        raise RuntimeError("feed down")
+    return make_feed(ticker)
+
+
+@pytest.fixture(autouse=True)
+def store_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(sentiment_store, "DB_PATH", os.path.join(tmp_path, "sentiment.db"))
+
+
+def run(sweep, tickers, timeout=30):
+    # หมดเวลา = pipeline ค้าง (ถือว่าเทสต์ล้ม)
+    return asyncio.run(asyncio.wait_for(sweep.run(tickers), timeout))
+
+
+def make_pipeline(cls=pipeline.SweepPipeline, **kwargs):
+    kwargs.setdefault("processes", 0)
+    kwargs.setdefault("queue_size", 1)
+    return cls(fetch_fn=fetch, post=False, **kwargs)
+
+
+def test_run_scores_every_ticker_and_shuts_down():
+    tickers = [f"T{i:03d}" for i in range(30)]
+    sweep = make_pipeline(fetch_workers=4, sink_batch=4)
+    results = run(sweep, tickers)
+    assert sorted(results) == tickers
+    assert sweep.stats["tickers"] == 30
+    assert sweep.stats["items"] == 30 * len(HEADLINES)
+    for payload in results.values():
+        assert payload["total_articles"] == len(HEADLINES)
+        assert -1.0 <= payload["average_sentiment"] <= 1.0
+
+
+def test_empty_and_failed_fetches_are_counted():
+    sweep = make_pipeline()
+    results = run(sweep, ["AAA", "EMPTY", "BROKEN"])
+    assert list(results) == ["AAA"]
+    assert sweep.stats["skipped"] == 1
+    assert sweep.stats["failed"] == 1
+
+
+def test_empty_ticker_list():
+    assert run(make_pipeline(), []) == {}
+
+
+def test_score_stage_crash_fails_the_sweep(monkeypatch):
+    def boom(records, representatives):
+        raise ZeroDivisionError("bad scores")
+
+    monkeypatch.setattr(google_sentiment, "copy_cluster_scores", boom)
+    with pytest.raises(ZeroDivisionError):
+        run(make_pipeline(fetch_workers=4), [f"T{i:03d}" for i in range(40)])
+
+
+def test_sink_crash_fails_the_sweep():
+    class BrokenSink(pipeline.SweepPipeline):
+        def flush(self, batch):
+            raise RuntimeError("sink down")
+
+    with pytest.raises(RuntimeError, match="sink down"):
+        run(make_pipeline(BrokenSink, sink_batch=1), [f"T{i:03d}" for i in range(40)])
+
+
+def test_process_pool():
+    sweep = make_pipeline(processes=2, queue_size=4)
+    results = run(sweep, ["AAA", "BBB", "CCC"], timeout=120)
+    assert sorted(results) == ["AAA", "BBB", "CCC"]
@@ -0,0 +1,66 @@
+import pytest
+
+import relevance
+
+ALIASES = {
+    "AIS": [("AIS", 1.0), ("เอไอเอส", 1.0), ("อินทัช", 0.5)],
+    "TISCO": [("TISCO", 1.0), ("ทิสโก้", 1.0)],
+}
+
+
+@pytest.fixture
+def rf():
+    return relevance.RelevanceFilter(aliases=ALIASES)
+
+
+def test_alias_in_headline(rf):
+    assert rf.score("AIS", "AIS กำไรไตรมาส 3 เพิ่มขึ้น - มิติหุ้น") == 1.0
+    assert rf.score("AIS", "เอไอเอสเปิดตัวแพ็กเกจใหม่") == 1.0
+
+
+def test_latin_alias_needs_word_boundary_and_case(rf):
+    assert rf.score("AIS", "Company to RAISE capital") == 0.0
+    assert rf.score("AIS", "ais news in lowercase") == 0.0
+
+
+def test_partial_weight_alias(rf):
+    assert rf.score("AIS", "อินทัชประกาศปันผล") == 0.5
+
+
+def test_source_only_match_is_discounted(rf):
+    assert rf.score("TISCO", "ตลาดหุ้นไทยวันนี้ปิดบวก - tisco.co.th TISCO") == relevance.SOURCE_MATCH_WEIGHT
+    assert rf.score("TISCO", "ตลาดหุ้นไทยวันนี้ปิดบวก", publisher="TISCO") == relevance.SOURCE_MATCH_WEIGHT
+
+
+def test_keyword_variant_uses_ticker_aliases(rf):
+    assert rf.score("ทิสโก้", "TISCO shares rise") == 1.0
+    assert rf.score("tisco", "ทิสโก้ประกาศกำไร") == 1.0
+
+
+def test_unknown_ticker_matches_case_insensitively(rf):
+    for keyword in ("delta", "Delta", "DELTA"):
+        assert rf.score(keyword, "DELTA shares jump - Reuters") == 1.0
+    assert rf.score("delta", "Deltas unrelated") == 0.0
+
+
+def test_empty_keyword_is_rejected(rf):
+    with pytest.raises(ValueError):
+        rf.score("   ", "anything")
+
+
+def test_pattern_cache_is_bounded(rf, monkeypatch):
+    monkeypatch.setattr(relevance, "MAX_CACHED_PATTERNS", 10)
+    for i in range(50):
+        rf.score(f"K{i}", "K1 news")
+    assert len(rf.patterns) == 10
+
+
+def test_filter_records_drops_and_reweights(rf):
+    from sources import NewsRecord
+
+    records = [NewsRecord("google_news", "AIS", title) for title in
+               ("AIS กำไรเพิ่ม", "อินทัชปันผล", "RAISE capital")]
+    kept, dropped = rf.filter_records(records)
+    assert [r.title for r in kept] == ["AIS กำไรเพิ่ม", "อินทัชปันผล"]
+    assert [r.weight for r in kept] == [1.0, 0.5]
+    assert dropped == 1
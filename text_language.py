@@ -0,0 +1,21 @@
+# ตรวจภาษาของหัวข่าวจากชนิดตัวอักษร (ไม่ต้องใช้ model) สำหรับเลือก scorer
+THAI, ENGLISH = 'th', 'en'
+
+# สัดส่วนตัวอักษรไทยขั้นต่ำ: หัวข่าวไทยมักมีชื่อแบรนด์ภาษาอังกฤษปน
+# (เช่น "KBank ร่วมกับ Orbix Technology เปิดตัว ...") แต่คำที่มี sentiment เป็นภาษาไทย
+MIN_THAI_RATIO = 0.1
+
+
+def detect_language(text, default=THAI):
+    """'th' ถ้ามีตัวอักษรไทยถึง MIN_THAI_RATIO ของตัวอักษรทั้งหมด, 'en' ถ้ามีแต่ตัวอักษรละติน"""
+    thai = latin = 0
+    for ch in text or '':
+        if 'ก' <= ch <= '๛':
+            thai += 1
+        elif ch.isascii() and ch.isalpha():
+            latin += 1
+    if thai and thai >= MIN_THAI_RATIO * (thai + latin):
+        return THAI
+    if latin:
+        return ENGLISH
+    return default
@@ -0,0 +1,310 @@
+import os
+import hashlib
+import threading
+from itertools import chain
+
+import pythainlp
+from pythainlp.tokenize import word_tokenize
+from pythainlp.util import Trie
+from pythainlp.corpus import thai_stopwords, thai_words
+
+import lexicon_snapshot
+import tracing
+
+# ไฟล์ lexicon ที่แก้ได้โดยไม่ต้อง deploy โค้ด และโฟลเดอร์เก็บ snapshot ที่ compile แล้ว
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicon')
+LEXICON_PATH = os.getenv('THAI_LEXICON_PATH', os.path.join(LEXICON_DIR, 'thai_sentiment.tsv'))
+LEXICON_COMPILED_DIR = os.getenv('THAI_LEXICON_COMPILED_DIR', os.path.join(LEXICON_DIR, 'compiled'))
+
+# คำเฉพาะทาง (ชื่อบริษัท ศัพท์การเงิน) ที่เพิ่มเข้าพจนานุกรมตัดคำ
+DOMAIN_TERMS_PATH = os.getenv('THAI_DOMAIN_TERMS_PATH', os.path.join(LEXICON_DIR, 'domain_terms.txt'))
+
+# พจนานุกรมตัดคำและ stopwords เป็นข้อมูลอ่านอย่างเดียว THAI_SHARED_TABLES=1 จะ compile เป็นไฟล์ใน
+# LEXICON_COMPILED_DIR แล้ว mmap ให้ทุก uvicorn worker ใช้หน้า memory ชุดเดียวกัน
+# ค่าเริ่มต้น (0) สร้าง Trie ใน process: ตัดคำเร็วกว่า (~131 เทียบ ~186 us/หัวข่าว ดู bench_tokenizer.py)
+# แต่ใช้ memory ~80 MB ต่อ process เทียบ ~8 MB แบบ mmap (PSS, 4 workers ดู bench_worker_memory.py)
+# เปิดเมื่อรันหลาย worker แล้ว memory สำคัญกว่าความเร็วตัดคำ
+SHARED_TABLES = os.getenv('THAI_SHARED_TABLES', '0') != '0'
+
+def load_stopwords():
+    if not SHARED_TABLES:
+        return set(thai_stopwords())
+    # ผูกชื่อไฟล์กับ version ของ pythainlp: อัปเกรดแล้วจะ compile ใหม่จาก corpus ใหม่
+    name = f'thai_stopwords.{pythainlp.__version__}'
+    return lexicon_snapshot.load_or_compile_words(name, thai_stopwords, LEXICON_COMPILED_DIR)
+
+THAI_STOPWORDS = load_stopwords()
+
+
+def read_domain_terms(path=DOMAIN_TERMS_PATH):
+    """คำในไฟล์ domain terms (บรรทัดละคำ '#' เป็น comment) ไม่มีไฟล์ = ไม่มีคำเพิ่ม"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8-sig') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def build_word_trie(extra_words):
+    """
+    พจนานุกรมตัดคำ = คำของ pythainlp + extra_words (domain terms + คำใน lexicon)
+    คืน (trie, key) key เป็น hash ของคำที่เพิ่ม ใช้แยก snapshot และ version
+    """
+    extra = sorted(set(extra_words))
+    key = hashlib.sha1('\n'.join(extra).encode('utf-8')).hexdigest()[:8]
+    if not SHARED_TABLES:
+        return Trie(chain(thai_words(), extra)), key
+    name = f'thai_words.{pythainlp.__version__}.{key}'
+    trie = lexicon_snapshot.load_or_compile_words(name, lambda: chain(thai_words(), extra), LEXICON_COMPILED_DIR)
+    return trie, key
+
+
+def tokenize(text, word_trie=None):
+    """ตัดคำด้วย newmm (พจนานุกรมของ lexicon ปัจจุบัน) และตัด token ที่เป็นช่องว่างออก"""
+    if word_trie is None:
+        word_trie = get_lexicon().word_trie
+    return [t for t in (t.strip() for t in word_tokenize(text, engine='newmm', custom_dict=word_trie)) if t]
+
+# คำปฏิเสธ: กลับเครื่องหมายคำ sentiment ถัดไปภายใน NEGATION_WINDOW token
+NEGATION_WORDS = ('ไม่', 'ไม่ใช่', 'ไม่ได้', 'มิ', 'มิใช่')
+NEGATION_WINDOW = 3
+
+# คำเสริม (ค่าใน lexicon > 1.0) ที่ตามหลังคำ sentiment ภายใน INTENSIFIER_WINDOW token
+INTENSIFIER_WINDOW = 2
+
+NEGATION, INTENSIFIER, SENTIMENT = 'negation', 'intensifier', 'sentiment'
+
+
+class PhraseTrie:
+    """
+    Trie ของลำดับ token: แต่ละวลีใน lexicon ถูกตัดคำด้วย newmm แบบเดียวกับหัวข่าว
+    จึงจับวลีที่ newmm แยกเป็นหลาย token ได้ (เช่น "แนะนำซื้อ" -> แนะนำ|ซื้อ)
+    """
+    def __init__(self):
+        self.root = {}
+        self.max_depth = 0
+
+    def add(self, tokens, entry):
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[None] = entry
+        self.max_depth = max(self.max_depth, len(tokens))
+
+    def longest_match(self, tokens, start):
+        """วลีที่ยาวที่สุดที่เริ่มที่ tokens[start] คืน (ตำแหน่งจบ, entry) หรือ None"""
+        node = self.root
+        match = None
+        end = min(len(tokens), start + self.max_depth)
+        for i in range(start, end):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if None in node:
+                match = (i + 1, node[None])
+        return match
+
+
+def build_phrase_trie(lexicon, negation_words=NEGATION_WORDS, word_trie=None, tokenizer=None):
+    """
+    สร้าง trie จาก lexicon: entry = (วลี, ชนิด, ค่า)
+    แต่ละวลีใส่ทั้งรูปที่ newmm ตัดและรูปคำเดียว (เผื่อ newmm ไม่ตัด)
+    tokenizer: ตัวตัดคำของภาษาอื่น (ค่าเริ่มต้นคือ newmm กับ word_trie)
+    """
+    trie = PhraseTrie()
+    entries = {word: (NEGATION, -1.0) for word in negation_words}
+    for word, value in lexicon.items():
+        if word in entries or value == 0:
+            continue
+        entries[word] = (INTENSIFIER, value) if value > 1.0 else (SENTIMENT, value)
+
+    for word, (kind, value) in entries.items():
+        entry = (word, kind, value)
+        trie.add((word,), entry)
+        tokens = tuple(tokenizer(word) if tokenizer else tokenize(word, word_trie))
+        if len(tokens) > 1:
+            trie.add(tokens, entry)
+    return trie
+
+
+class CompiledLexicon:
+    """
+    Lexicon หนึ่ง version: snapshot (mmap) + พจนานุกรมตัดคำ + trie ของวลีที่สร้างจากมัน
+    ไม่ถูกแก้หลังสร้าง การ reload จึงแค่สลับ object ใหม่เข้าไปแทน
+    พจนานุกรมตัดคำมีผลต่อคะแนน version จึงรวม key ของ domain terms ไว้ด้วย
+    """
+    __slots__ = ('version', 'entries', 'word_trie', 'trie')
+
+    def __init__(self, entries, domain_terms=()):
+        self.entries = entries
+        self.word_trie, terms_key = build_word_trie(chain(domain_terms, entries.keys()))
+        self.version = f"{entries.version}.t{terms_key}"
+        self.trie = build_phrase_trie(entries, word_trie=self.word_trie)
+
+    def tokenize(self, text):
+        return tokenize(text, self.word_trie)
+
+
+class LexiconManager:
+    """
+    ถือ CompiledLexicon ปัจจุบันและ reload เมื่อไฟล์ lexicon เปลี่ยน
+    ผู้อ่านหยิบ manager.current ครั้งเดียวต่องาน จึงได้ version เดียวตลอดงานนั้น
+    (ภาษาอื่น subclass แล้ว override compile / language)
+    """
+    language = 'Thai'
+
+    def __init__(self, path=LEXICON_PATH, compiled_dir=LEXICON_COMPILED_DIR, terms_path=DOMAIN_TERMS_PATH):
+        self.path = path
+        self.compiled_dir = compiled_dir
+        self.terms_path = terms_path
+        self.current = None
+        self.source_stat = None
+        self.lock = threading.Lock()
+
+    def _stat(self):
+        st = os.stat(self.path)
+        terms = os.stat(self.terms_path) if self.terms_path and os.path.exists(self.terms_path) else None
+        return (st.st_mtime_ns, st.st_size, terms and (terms.st_mtime_ns, terms.st_size))
+
+    def get(self):
+        if self.current is None:
+            self.reload()
+        return self.current
+
+    def reload(self, force=False):
+        """Compile (ถ้าจำเป็น) และสลับไปใช้ lexicon / domain terms จากไฟล์ คืน True ถ้า version เปลี่ยน"""
+        with self.lock:
+            stat = self._stat()
+            if not force and self.current is not None and stat == self.source_stat:
+                return False
+            compiled = self.compile(lexicon_snapshot.load_or_compile(self.path, self.compiled_dir))
+            changed = self.current is None or compiled.version != self.current.version
+            if changed:
+                print(f"Loaded {self.language} lexicon {compiled.version} ({len(compiled.entries)} entries)")
+                self.current = compiled
+            self.source_stat = stat
+            return changed
+
+    def compile(self, entries):
+        return CompiledLexicon(entries, read_domain_terms(self.terms_path))
+
+    def maybe_reload(self):
+        """เช็คแค่ mtime/size ของไฟล์ ถ้าไม่เปลี่ยนก็ไม่ทำอะไร ไฟล์เสียจะใช้ version เดิมต่อ"""
+        stat = None
+        try:
+            stat = self._stat()
+            if self.current is not None and stat == self.source_stat:
+                return False
+            return self.reload()
+        except (OSError, ValueError) as e:
+            print(f"Lexicon reload failed, keeping {self.current.version if self.current else None}: {e}")
+            if self.current is not None and stat is not None:
+                # ไม่ลองไฟล์เดิมซ้ำจนกว่าจะถูกแก้อีกครั้ง
+                self.source_stat = stat
+            return False
+
+
+lexicon_manager = LexiconManager()
+
+def get_lexicon():
+    return lexicon_manager.get()
+
+def current_lexicon_version():
+    return lexicon_manager.get().version
+
+# dict ของ lexicon ตอน import (สำหรับโค้ดเดิมที่อ่านค่าตรงๆ; ไม่อัปเดตตอน reload)
+THAI_SENTIMENT_LEXICON = get_lexicon().entries.to_dict()
+
+
+def analyze_sentiment_lexicon(title, lexicon=None):
+    """
+    วิเคราะห์ sentiment ด้วย Lexicon-based approach (ปรับปรุงแล้ว)
+    จับวลีหลาย token, ขอบเขตคำปฏิเสธ และคำเสริมในรอบเดียวของ token
+    lexicon: CompiledLexicon ที่จะใช้ (ค่าเริ่มต้นคือ version ปัจจุบัน)
+    """
+    # 1. Tokenization (ตัดช่องว่างออก เพื่อให้วลีจับข้ามช่องว่างได้)
+    lexicon = lexicon or get_lexicon()
+    return score_tokens(lexicon.tokenize(title), lexicon)
+
+def score_tokens(tokens, lexicon):
+    """คะแนนจาก token ที่ตัดแล้ว (ส่วนที่สองของ analyze_sentiment_lexicon)"""
+    trie = lexicon.trie
+
+    # 2. คำนวณคะแนน
+    total_score = 0
+    word_count = 0
+    matched_words = []
+
+    # ตำแหน่ง token สุดท้ายที่คำปฏิเสธยังมีผล
+    negation_until = -1
+    # คำ sentiment ล่าสุดที่ยังรับคำเสริมได้: (index ใน matched_words, ตำแหน่งสุดท้ายที่รับได้)
+    last_match = None
+
+    i = 0
+    while i < len(tokens):
+        match = trie.longest_match(tokens, i)
+        if match is None:
+            i += 1
+            continue
+
+        end, (phrase, kind, value) = match
+
+        if kind == NEGATION:
+            negation_until = end - 1 + NEGATION_WINDOW
+            last_match = None
+
+        elif kind == INTENSIFIER:
+            if last_match is not None and i <= last_match[1]:
+                index, _ = last_match
+                word, score = matched_words[index]
+                score *= value
+                total_score += score - matched_words[index][1]
+                matched_words[index] = (word, score)
+                last_match = None
+
+        else:
+            score = value
+            # ถ้าเจอคำปฏิเสธก่อนหน้า (ภายใน window) ให้กลับเครื่องหมาย
+            if i <= negation_until:
+                score = -score
+                negation_until = -1
+            total_score += score
+            word_count += 1
+            matched_words.append((phrase, score))
+            last_match = (len(matched_words) - 1, end - 1 + INTENSIFIER_WINDOW)
+
+        i = end
+    
+    # คำนวณ polarity เฉลี่ย
+    polarity = total_score / word_count if word_count > 0 else 0
+    
+    # จำกัดช่วงคะแนน
+    polarity = max(-1.0, min(1.0, polarity))
+    
+    # กำหนด label
+    if polarity > 0.1:
+        label = 'positive'
+    elif polarity < -0.1:
+        label = 'negative'
+    else:
+        label = 'neutral'
+    
+    return polarity, label, [f"{word}({score:.2f})" for word, score in matched_words]
+
+def analyze_sentiment_batch(texts, batch_size=64, lexicon=None):
+    """
+    วิเคราะห์ sentiment ของข้อความหลายรายการทีละ batch
+    ข้อความที่ซ้ำกันใน batch จะ tokenize/คำนวณแค่ครั้งเดียว
+    ทุกข้อความใช้ lexicon version เดียวกันแม้จะมีการ reload ระหว่างทาง
+    """
+    lexicon = lexicon or get_lexicon()
+    results = []
+    for start in range(0, len(texts), batch_size):
+        batch = [text or '' for text in texts[start:start + batch_size]]
+        unique = list(dict.fromkeys(batch))
+        # ตัดคำกับจับคำแยกเป็นสอง span ให้เห็นว่าเวลาหมดไปกับ newmm หรือ lexicon
+        with tracing.span("tokenize", texts=len(unique), lexicon_version=lexicon.version):
+            tokens = [lexicon.tokenize(text) for text in unique]
+        with tracing.span("lexicon_match", texts=len(unique)):
+            cache = {text: score_tokens(t, lexicon) for text, t in zip(unique, tokens)}
+        results.extend(cache[text] for text in batch)
+    return results
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import secrets
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry import propagate as otel_propagate
+except ImportError:
+    otel_trace = None
+    otel_propagate = None
+
+# ปลายทางของ span:
+#   ไม่ตั้ง / "off" = ปิด (span ไม่ทำอะไร)
+#   "otel"          = ส่งผ่าน OpenTelemetry API (ตั้ง SDK/exporter เอง เช่น opentelemetry-instrument)
+#   "console"       = JSON หนึ่งบรรทัดต่อ span ออก stderr
+#   path อื่น       = JSON lines ต่อท้ายไฟล์นั้น (เช่น traces.jsonl)
+TRACE_TARGET = os.getenv("SENTIMENT_TRACE", "off")
+SERVICE_NAME = "bot_sentiment_analysis"
+
+# span ปัจจุบันและ analysis_id ของงานนี้ (ส่งต่อเข้า asyncio task / asyncio.to_thread อัตโนมัติ)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_analysis_id = contextvars.ContextVar("analysis_id", default=None)
+
+
+class Span:
+    """span ของ exporter ในตัว (ชื่อ field ตาม OpenTelemetry: trace_id, span_id, parent_span_id)"""
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "attributes", "start_ns", "status", "error")
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.status = "OK"
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def to_dict(self, end_ns):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time": datetime.fromtimestamp(self.start_ns / 1e9, timezone.utc).isoformat(),
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+            "service": SERVICE_NAME,
+        }
+
+
+class _RemoteParent:
+    """span ฝั่ง client ที่ส่งมากับ header traceparent (W3C Trace Context)"""
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id, span_id):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+
+def parse_traceparent(value):
+    """'00-<trace_id 32 hex>-<span_id 16 hex>-<flags>' -> _RemoteParent หรือ None"""
+    parts = (value or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return _RemoteParent(parts[1], parts[2])
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class JsonLinesExporter:
+    """เขียน span ที่จบแล้วทีละบรรทัด (file=None = stderr)"""
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            if self.path is None:
+                print(line, file=sys.stderr)
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+
+def _configure(target):
+    if target in (None, "", "off", "0"):
+        return None, None
+    if target == "otel":
+        if otel_trace is None:
+            print("⚠️ SENTIMENT_TRACE=otel but opentelemetry is not installed, tracing disabled")
+            return None, None
+        return None, otel_trace.get_tracer(SERVICE_NAME)
+    return JsonLinesExporter(None if target == "console" else target), None
+
+
+_exporter, _tracer = _configure(TRACE_TARGET)
+
+
+def configure(target):
+    """เปลี่ยนปลายทางของ span ระหว่างรัน (ค่าเดียวกับ SENTIMENT_TRACE)"""
+    global _exporter, _tracer
+    _exporter, _tracer = _configure(target)
+
+
+def enabled():
+    return _exporter is not None or _tracer is not None
+
+
+def current_analysis_id():
+    return _analysis_id.get()
+
+
+def set_attribute(key, value):
+    """ใส่ attribute ให้ span ปัจจุบัน (ไม่มี span / ปิด tracing = ไม่ทำอะไร)"""
+    current = _current_span.get()
+    if current is not None and value is not None:
+        current.set_attribute(key, value)
+
+
+def inject_headers(headers):
+    """ใส่ traceparent ของ span ปัจจุบันลง headers ของ HTTP request ให้ฝั่ง server ต่อ trace เดียวกันได้"""
+    if _tracer is not None:
+        otel_propagate.inject(headers)
+    else:
+        current = _current_span.get()
+        if isinstance(current, Span):
+            headers["traceparent"] = f"00-{current.trace_id}-{current.span_id}-01"
+    return headers
+
+
+def set_analysis_id(analysis_id):
+    """
+    ผูก analysis_id กับ span ปัจจุบันและทุก span ลูกที่เปิดหลังจากนี้
+    (มีผลถึงตอน span ปัจจุบันปิด)
+    """
+    if not enabled():
+        return
+    _analysis_id.set(analysis_id)
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute("analysis_id", analysis_id)
+
+
+@contextmanager
+def span(name, headers=None, **attributes):
+    """
+    เปิด span ครอบงานหนึ่งช่วง ใช้ได้ทั้งตอนปิด tracing (ไม่ทำอะไร) และเปิดแบบ otel / JSON lines
+    attribute ที่เป็น None จะไม่ถูกบันทึก
+    headers: header ของ HTTP request ขาเข้า (ต่อ trace จาก traceparent ของ client ถ้ามี)
+    """
+    if not enabled():
+        yield _NOOP
+        return
+
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    analysis_id = _analysis_id.get()
+    if analysis_id is not None:
+        attributes.setdefault("analysis_id", analysis_id)
+
+    if _tracer is not None:
+        context = otel_propagate.extract(headers) if headers is not None else None
+        with _tracer.start_as_current_span(name, context=context, attributes=attributes) as otel_span:
+            span_token = _current_span.set(otel_span)
+            try:
+                yield otel_span
+            finally:
+                _current_span.reset(span_token)
+                _analysis_id.set(analysis_id)
+        return
+
+    parent = _current_span.get()
+    if parent is None and headers is not None:
+        parent = parse_traceparent(headers.get("traceparent"))
+    current = Span(name, parent, attributes)
+    span_token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "ERROR"
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(span_token)
+        # analysis_id ที่ตั้งภายใน span มีผลแค่ภายใน span นั้น
+        _analysis_id.set(analysis_id)
+        _exporter.export(current.to_dict(time.time_ns()))
+
+
+def traced(name=None):
+    """Decorator: ครอบทั้งฟังก์ชันด้วย span (ชื่อเริ่มต้นคือชื่อฟังก์ชัน)"""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator